@@ -1,17 +1,17 @@
 import streamlit as st
+import numpy as np
 import pandas as pd
-import re
-import io
-import os
-import fitz  # PyMuPDF
-from openpyxl import Workbook
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.utils import get_column_letter # <--- Faltava esta linha
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
+
+# Todo o processamento fica no pacote conciliacao, que não depende do
+# Streamlit (processos de leitura paralela e linha de comando)
+from conciliacao import (
+    formatar_moeda_br, executar_processo, mascara_divergencias, tabela_relatorio,
+    impressao_digital, preparar_relatorio, relatorio_sob_demanda, medicoes_relatorios,
+    to_excel_styled, to_pdf, tabela_medicoes, medicoes_json, medicoes_csv, perfilar,
+    receber, pendentes, situacao_recepcao, resultados_recebidos, extratos_do_zip,
+    impressao_entradas, resultado_compartilhado, resultado_guardado, situacao_resultados,
+    registrar_execucao, execucoes_registradas, historico_conta, divergencias_consecutivas,
+)
 
 # ==========================================
 # CONFIGURAÇÃO GERAL
@@ -23,6 +23,12 @@ st.set_page_config(
     initial_sidebar_state="collapsed"
 )
 
+# Linhas por página nas tabelas de resultado: só a página aberta é formatada e enviada ao navegador
+LINHAS_POR_PAGINA = 500
+
+# Competência sugerida para gravar no histórico: o mês anterior ao atual
+COMPETENCIA_PADRAO = (pd.Timestamp.today() - pd.DateOffset(months=1)).strftime("%Y-%m")
+
 st.markdown("""
     <style>
         .block-container {padding-top: 2rem; padding-bottom: 2rem;}
@@ -33,459 +39,17 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # ==========================================
-# 1. FUNÇÕES DE LIMPEZA E FORMATAÇÃO
-# ==========================================
-def gerar_chave_padronizada(texto_conta):
-    if not isinstance(texto_conta, str): return None
-    texto_conta = texto_conta.strip()
-    
-    if '.' in texto_conta and len(texto_conta) > 12:
-        partes = texto_conta.split('.')
-        maior_parte = ""
-        for p in partes:
-            limpo = re.sub(r'\D', '', p)
-            if len(limpo) > len(maior_parte): maior_parte = limpo
-        if len(maior_parte) > 4: texto_conta = maior_parte
-    elif '/' in texto_conta:
-        texto_conta = texto_conta.split('/')[-1]
-            
-    parte_numerica = re.sub(r'\D', '', texto_conta)
-    if not parte_numerica: return None
-    
-    return parte_numerica[-7:].zfill(7)
-
-def limpar_valor_monetario(valor_str):
-    if not isinstance(valor_str, str): return 0.0
-    valor_upper = valor_str.upper()
-    eh_negativo = 'D' in valor_upper or 'DEB' in valor_upper or '-' in valor_str or '(' in valor_str
-    
-    limpo = re.sub(r'[^\d,\.]', '', valor_str)
-    
-    try:
-        if not limpo: return 0.0
-        if ',' in limpo and '.' in limpo:
-             limpo = limpo.replace('.', '').replace(',', '.')
-        elif ',' in limpo:
-             limpo = limpo.replace(',', '.')
-        
-        valor_float = float(limpo)
-        return -valor_float if eh_negativo else valor_float
-    except ValueError:
-        return 0.0
-
-def formatar_moeda_br(valor):
-    if pd.isna(valor): return "0,00"
-    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
-
-# ==========================================
-# 2. MOTOR DE LEITURA DE PDF
-# ==========================================
-def extrair_pdf_melhorado(arquivo, tipo_extrato):
-    try:
-        doc = fitz.open(stream=arquivo.read(), filetype="pdf")
-        texto_completo = ""
-        for pag in doc:
-            texto_completo += pag.get_text() + "\n"
-        doc.close()
-        
-        linhas = texto_completo.split('\n')
-        
-        conta_encontrada = "N/A"
-        padroes_conta = [
-            r"Conta:\s*(\d{4}\/\d{3,4}\/[\d\-]+)", 
-            r"Conta\s*Vinculada:\s*(\d{4}\/\d{3,4}\/[\d\-]+)", 
-            r"Conta\s*Corrente\s*[:\s]*([\d\.\-\/]+)",    
-            r"Conta\s*[:\s]*([\d\.\-\/]+)",                
-            r"Agência.*?Conta.*?([\d\.\-]{5,})",           
-            r"C\/C\s*[:\s]*([\d\.\-\/]+)"                  
-        ]
-        
-        for p in padroes_conta:
-            match = re.search(p, texto_completo, re.IGNORECASE)
-            if match:
-                conta_raw = match.group(1).strip()
-                if len(re.sub(r'\D', '', conta_raw)) > 4:
-                    conta_encontrada = conta_raw
-                    break
-        
-        if conta_encontrada == "N/A":
-            cabecalho = "\n".join(linhas[:25]) 
-            match_solto = re.search(r"(\d{4,6}-\d)", cabecalho)
-            if match_solto: conta_encontrada = match_solto.group(1)
-
-        saldo_final = 0.0
-        rendimento_total = 0.0
-        regex_valor = r"(\d{1,3}(?:\.\d{3})*,\d{2}|\d{1,3}(?:,\d{3})*\.\d{2})"
-
-        for i, linha in enumerate(linhas):
-            linha_upper = linha.upper().strip()
-            
-            gatilhos_saldo = ["SALDO FINAL", "SALDO TOTAL", "SALDO ATUAL", "SALDO EM", "SALDO LÍQUIDO", "SALDO BRUTO", "VALOR LIQUIDO", "TOTAL DISPONIVEL", "POSICAO EM", "TOTAL EM COTAS", "S A L D O"]
-            ignorar = ["ANTERIOR", "BLOQUEADO", "PROVISORIO", "RENDIMENTO", "RENTABILIDADE"]
-            
-            if any(g in linha_upper for g in gatilhos_saldo) and not any(ign in linha_upper for ign in ignorar):
-                match_val = re.search(regex_valor, linha_upper)
-                if match_val:
-                    sinal = "-" if " D" in linha_upper or "DEB" in linha_upper or "-" in linha_upper else ""
-                    v = limpar_valor_monetario(f"{sinal}{match_val.group(0)}")
-                    if v != 0: saldo_final = v
-                elif i + 1 < len(linhas):
-                    match_prox = re.search(regex_valor, linhas[i+1])
-                    if match_prox:
-                        v = limpar_valor_monetario(match_prox.group(0))
-                        if v != 0: saldo_final = v
-
-            if tipo_extrato == 'INV':
-                gatilhos_rend = ["RENDIMENTO BRUTO", "RENTABILIDADE", "RENDIMENTO NO MÊS", "RENDIMENTO LIQUIDO", "RENTAB."]
-                if any(g in linha_upper for g in gatilhos_rend) and "ACUMULADO" not in linha_upper and "ANO" not in linha_upper:
-                    valor_capturado = 0.0
-                    match_val = re.search(regex_valor, linha)
-                    if match_val: valor_capturado = limpar_valor_monetario(match_val.group(0))
-                    elif i + 1 < len(linhas):
-                        match_prox = re.search(regex_valor, linhas[i+1])
-                        if match_prox: valor_capturado = limpar_valor_monetario(match_prox.group(0))
-                    
-                    if valor_capturado != 0 and valor_capturado < 50000000:
-                         rendimento_total += valor_capturado
-
-        if saldo_final == 0.0 and ("NAO HOUVE MOVIMENTO" in texto_completo.upper() or "SEM MOVIMENTO" in texto_completo.upper()):
-             match_ant = re.search(r"(?:SALDO ANTERIOR|SALDO).*?(\d{1,3}(?:\.\d{3})*,\d{2})", texto_completo, re.IGNORECASE | re.DOTALL)
-             if match_ant: saldo_final = limpar_valor_monetario(match_ant.group(1))
-
-        if saldo_final == 0.0 and tipo_extrato == 'INV':
-            match_last = re.findall(r"(?:TOTAL|SALDO|ATUAL|LÍQUIDO).*?(\d{1,3}(?:\.\d{3})*,\d{2})", texto_completo, re.IGNORECASE)
-            if match_last: saldo_final = limpar_valor_monetario(match_last[-1])
-
-        texto_limpo = texto_completo[:300].replace('\n', ' ').replace(';', ',')
-        return {"Conta": conta_encontrada, "Saldo": saldo_final, "Rendimento": rendimento_total, "Texto_Raw": texto_limpo}
-    except Exception as e:
-        return {"Conta": "Erro", "Saldo": 0.0, "Rendimento": 0.0, "Texto_Raw": str(e)}
-
-def carregar_depara():
-    diretorio_atual = os.path.dirname(os.path.abspath(__file__))
-    caminho_arquivo = os.path.join(diretorio_atual, "depara", "DEPARA_CONTAS BANCÁRIAS_CEF.xlsx")
-    try:
-        df_depara = pd.read_excel(caminho_arquivo, sheet_name="2025_JUNHO (2)", dtype=str, engine='openpyxl')
-        df_depara.columns = ['Conta Antiga', 'Conta Nova']
-        if 'gerar_chave_padronizada' in globals():
-            df_depara['Chave Antiga'] = df_depara['Conta Antiga'].apply(gerar_chave_padronizada)
-            df_depara['Chave Nova'] = df_depara['Conta Nova'].apply(gerar_chave_padronizada)
-        else:
-            return pd.DataFrame()
-        return df_depara
-    except (FileNotFoundError, Exception):
-        return pd.DataFrame()
-
-# ==========================================
-# 3. LEITURA CONTÁBIL
+# 1-2. LIMPEZA, FORMATAÇÃO, LEITURA DE PDF E DE-PARA: ver pacote conciliacao
 # ==========================================
-def processar_contabil(arquivo, tipo='SALDO'):
-    if arquivo is None: return pd.DataFrame()
-    try:
-        df = pd.read_csv(arquivo, encoding='latin-1', sep=';', header=1, dtype=str)
-        col_chave = None
-        possiveis_chaves = ['Domicílio bancário', 'Conta', 'Nº Conta', 'Descrição', 'Conta Contabil']
-        for col in df.columns:
-            for p in possiveis_chaves:
-                if p.lower() in str(col).lower(): col_chave = col; break
-        
-        if not col_chave:
-            arquivo.seek(0)
-            df = pd.read_csv(arquivo, encoding='latin-1', sep=';', header=0, dtype=str)
-            for col in df.columns:
-                for p in possiveis_chaves:
-                    if p.lower() in str(col).lower(): col_chave = col; break
-        if not col_chave: return pd.DataFrame()
-
-        col_valor = None
-        possiveis_valores = ['Saldo Final', 'Saldo Atual', 'Movimento', 'Valor']
-        for col in df.columns:
-            if 'anterior' in str(col).lower(): continue
-            for p in possiveis_valores:
-                if p.lower() in str(col).lower(): col_valor = col; break
-        if not col_valor: return pd.DataFrame()
-
-        df['Chave Primaria'] = df[col_chave].apply(gerar_chave_padronizada)
-        df = df.dropna(subset=['Chave Primaria'])
-        df['Valor_Numerico'] = df[col_valor].astype(str).apply(limpar_valor_monetario)
-        
-        col_desc_original = col_chave 
-        for col in df.columns:
-            if ('descri' in str(col).lower() or 'nome' in str(col).lower()) and col != col_chave:
-                col_desc_original = col
-                break
-
-        if tipo == 'SALDO':
-            if any('contábil' in str(c).lower() for c in df.columns):
-                col_contabil = next(c for c in df.columns if 'contábil' in str(c).lower())
-                df_pivot = df.pivot_table(index='Chave Primaria', columns=col_contabil, values='Valor_Numerico', aggfunc='sum').reset_index()
-                
-                col_mov = next((c for c in df_pivot.columns if '1111119' in str(c) or 'Conta Movimento' in str(c) or 'MOVIMENTO' in str(c).upper()), None)
-                col_app = next((c for c in df_pivot.columns if '1111150' in str(c) or 'Aplicação' in str(c) or 'APLICACAO' in str(c).upper()), None)
-                
-                df_res = pd.DataFrame()
-                df_res['Chave Primaria'] = df_pivot['Chave Primaria']
-                df_res['Saldo_Contabil_CC'] = df_pivot[col_mov].fillna(0) if col_mov else 0.0
-                df_res['Saldo_Contabil_Aplic'] = df_pivot[col_app].fillna(0) if col_app else 0.0
-                
-                desc = df[['Chave Primaria', col_desc_original]].drop_duplicates(subset='Chave Primaria')
-                df_res = df_res.merge(desc, on='Chave Primaria', how='left')
-                df_res.rename(columns={col_desc_original: 'Descrição_ERP'}, inplace=True)
-                return df_res
-            else:
-                df_agrup = df.groupby('Chave Primaria')['Valor_Numerico'].sum().reset_index()
-                df_agrup.rename(columns={'Valor_Numerico': 'Saldo_Contabil_CC'}, inplace=True)
-                df_agrup['Saldo_Contabil_Aplic'] = 0.0
-                
-                desc = df[['Chave Primaria', col_desc_original]].drop_duplicates(subset='Chave Primaria')
-                df_agrup = df_agrup.merge(desc, on='Chave Primaria', how='left')
-                df_agrup.rename(columns={col_desc_original: 'Descrição_ERP'}, inplace=True)
-                return df_agrup
-
-        elif tipo == 'RENDIMENTO':
-            df_agrup = df.groupby('Chave Primaria')['Valor_Numerico'].sum().reset_index()
-            df_agrup.rename(columns={'Valor_Numerico': 'Rendimento_Contabil'}, inplace=True)
-            return df_agrup
-    except Exception as e:
-        return pd.DataFrame()
 
 # ==========================================
-# 4. CONSOLIDAÇÃO, DE-PARA E CLASSIFICAÇÃO
+# 3-4. LEITURA CONTÁBIL, CONSOLIDAÇÃO E CLASSIFICAÇÃO: ver conciliacao.contabil e conciliacao.processo
 # ==========================================
-def identificar_banco_por_texto(row):
-    # 1. Se veio do PDF, já temos certeza
-    if pd.notna(row.get('Nome_Banco')) and str(row.get('Nome_Banco')) not in ['0', '0.0', 'nan', 'None']:
-        return str(row['Nome_Banco']).upper()
-    
-    # Prepara texto do ERP para análise
-    desc = str(row.get('Descrição_ERP', '')).upper()
-    
-    # 2. Busca por palavras-chave explícitas
-    if 'BRASIL' in desc or 'BB ' in desc or 'BCO DO BRASIL' in desc:
-        return "BANCO DO BRASIL"
-    elif 'CAIXA' in desc or 'CEF' in desc or 'FEDERAL' in desc or 'ECONÔMICA' in desc:
-        return "CAIXA ECONÔMICA"
-    
-    # 3. Busca por CÓDIGOS BANCÁRIOS
-    if '001' in desc:
-        return "BANCO DO BRASIL"
-    if '104' in desc:
-        return "CAIXA ECONÔMICA"
-    
-    return desc
-
-def executar_processo(file_saldos, file_rendim, lista_arquivos_bancarios):
-    df_saldos = processar_contabil(file_saldos, 'SALDO')
-    df_rendim = processar_contabil(file_rendim, 'RENDIMENTO')
-    
-    if df_saldos.empty:
-        st.error("Erro na leitura do CSV de Saldos.")
-        return pd.DataFrame(), pd.DataFrame()
-
-    df_depara = carregar_depara()
-    
-    if not df_depara.empty:
-        dicionario_depara = dict(zip(df_depara['Chave Antiga'], df_depara['Chave Nova']))
-        df_saldos['Chave Primaria'] = df_saldos['Chave Primaria'].replace(dicionario_depara)
-        if not df_rendim.empty:
-            df_rendim['Chave Primaria'] = df_rendim['Chave Primaria'].replace(dicionario_depara)
-
-    df_contabil = df_saldos
-    if not df_rendim.empty:
-        df_contabil = pd.merge(df_saldos, df_rendim, on='Chave Primaria', how='outer').fillna(0)
-    else:
-        df_contabil['Rendimento_Contabil'] = 0.0
-
-    dados_banco = []
-    log_leitura = []
-
-    for item in lista_arquivos_bancarios:
-        f = item['arquivo']
-        banco_nome = item['banco']
-        tipo_extrato = item['tipo']
-        
-        res = extrair_pdf_melhorado(f, tipo_extrato)
-        chave = gerar_chave_padronizada(res['Conta'])
-        
-        log_leitura.append({
-            'Arquivo': f.name, 
-            'Banco': banco_nome,
-            'Conta Lida': res['Conta'], 
-            'Chave Gerada': str(chave), 
-            'Saldo': res['Saldo'], 
-            'Rendimento': res['Rendimento'] if tipo_extrato == 'INV' else 0.0
-        })
-
-        if chave: 
-            dados_banco.append({
-                'Chave Primaria': chave, 
-                'Nome_Banco': banco_nome,
-                'Saldo_Banco_CC': res['Saldo'] if tipo_extrato == 'CC' else 0.0,
-                'Saldo_Banco_Aplic': res['Saldo'] if tipo_extrato == 'INV' else 0.0, 
-                'Rendimento_Banco': res['Rendimento'] if tipo_extrato == 'INV' else 0.0
-            })
-
-    df_log = pd.DataFrame(log_leitura)
-    
-    if dados_banco:
-        df_banco = pd.DataFrame(dados_banco).groupby('Chave Primaria').agg({
-            'Saldo_Banco_CC': 'sum',
-            'Saldo_Banco_Aplic': 'sum',
-            'Rendimento_Banco': 'sum',
-            'Nome_Banco': 'first'
-        }).reset_index()
-    else:
-        df_banco = pd.DataFrame(columns=['Chave Primaria', 'Saldo_Banco_CC', 'Saldo_Banco_Aplic', 'Rendimento_Banco', 'Nome_Banco'])
-
-    df_final = pd.merge(df_contabil, df_banco, on='Chave Primaria', how='outer').fillna(0)
-
-    df_final['Descrição'] = df_final.apply(identificar_banco_por_texto, axis=1)
-    
-    df_final['Descrição'] = df_final['Descrição'].astype(str).str.upper().replace(['NAN', 'NONE', '0', ''], '-')
-
-    df_final['Diferenca_Saldo_CC'] = df_final['Saldo_Contabil_CC'] - df_final['Saldo_Banco_CC']
-    df_final['Diferenca_Saldo_Aplic'] = df_final['Saldo_Contabil_Aplic'] - df_final['Saldo_Banco_Aplic']
-    df_final['Diferenca_Rendimento'] = df_final['Rendimento_Contabil'] - df_final['Rendimento_Banco']
-
-    cols = ['Descrição', 'Chave Primaria', 'Saldo_Contabil_CC', 'Saldo_Banco_CC', 'Diferenca_Saldo_CC',
-            'Saldo_Contabil_Aplic', 'Saldo_Banco_Aplic', 'Diferenca_Saldo_Aplic',
-            'Rendimento_Contabil', 'Rendimento_Banco', 'Diferenca_Rendimento']
-    colunas_finais = [c for c in cols if c in df_final.columns]
-    return df_final[colunas_finais], df_log
 
 # ==========================================
-# 5. GERADORES DE ARQUIVO (Excel e PDF)
+# 5. GERADORES DE ARQUIVO (Excel e PDF): ver conciliacao.relatorios
 # ==========================================
 
-def to_excel_styled(df):
-    """Gera Excel com formatação profissional, bordas e cores."""
-    output = io.BytesIO()
-    
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Conciliação"
-
-    # Estilos
-    header_fill = PatternFill(start_color="D9D9D9", end_color="D9D9D9", fill_type="solid")
-    header_font = Font(bold=True, name="Calibri", size=11)
-    border_style = Side(border_style="thin", color="000000")
-    thin_border = Border(left=border_style, right=border_style, top=border_style, bottom=border_style)
-    alignment_center = Alignment(horizontal="center", vertical="center")
-    number_fmt = '#,##0.00'
-    
-    # Extrai headers do MultiIndex
-    headers_lvl0 = [c[0] for c in df.columns]
-    headers_lvl1 = [c[1] for c in df.columns]
-    
-    # Escreve Linha 1 (Categorias)
-    for col_idx, header in enumerate(headers_lvl0, 1):
-        cell = ws.cell(row=1, column=col_idx, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = alignment_center
-        cell.border = thin_border
-    
-    # Escreve Linha 2 (Detalhes)
-    for col_idx, header in enumerate(headers_lvl1, 1):
-        cell = ws.cell(row=2, column=col_idx, value=header)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = alignment_center
-        cell.border = thin_border
-
-    # Escreve Dados
-    rows = dataframe_to_rows(df, index=False, header=False)
-    for r_idx, row in enumerate(rows, 3):
-        for c_idx, value in enumerate(row, 1):
-            cell = ws.cell(row=r_idx, column=c_idx, value=value)
-            cell.border = thin_border
-            
-            # Formatação Numérica
-            if isinstance(value, (int, float)):
-                cell.number_format = number_fmt
-                if value < -0.01:
-                    cell.font = Font(color="FF0000")
-                
-                header_name = headers_lvl1[c_idx-1]
-                if "Diferença" in header_name and abs(value) > 0.01:
-                     cell.font = Font(color="FF0000", bold=True)
-            
-    # Ajuste de largura das colunas
-    for i in range(1, len(df.columns) + 1):
-        ws.column_dimensions[get_column_letter(i)].width = 18
-
-    wb.save(output)
-    return output.getvalue()
-
-def to_pdf(df):
-    """Gera PDF em paisagem com tabela zebrada."""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
-    
-    elements = []
-    
-    # Título
-    styles = getSampleStyleSheet()
-    title_style = styles['Heading1']
-    title_style.alignment = 1 # Center
-    elements.append(Paragraph("Relatório de Conciliação Contábil", title_style))
-    elements.append(Spacer(1, 12))
-
-    # Prepara dados para o ReportLab
-    # Achata o cabeçalho MultiIndex
-    headers = [f"{c[0]}\n{c[1]}" for c in df.columns]
-    
-    data = [headers]
-    
-    # Converte dados do DF para lista
-    for index, row in df.iterrows():
-        row_list = []
-        for col_name, val in row.items():
-            if isinstance(val, (int, float)):
-                row_list.append(formatar_moeda_br(val))
-            else:
-                row_list.append(str(val))
-        data.append(row_list)
-
-    # Cria Tabela
-    # Colunas: Desc(100), Conta(60), Resto(70)
-    col_widths = [100, 60] + [70] * 9 
-    t = Table(data, colWidths=None)
-
-    # Estilo da Tabela
-    style = TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 8),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
-        ('FONTSIZE', (0, 1), (-1, -1), 7),
-        ('ALIGN', (0, 1), (1, -1), 'LEFT'), 
-        ('ALIGN', (2, 1), (-1, -1), 'RIGHT'), 
-    ])
-    
-    # Zebra
-    for i in range(1, len(data)):
-        if i % 2 == 0:
-            bg_color = colors.whitesmoke
-        else:
-            bg_color = colors.white
-        style.add('BACKGROUND', (0, i), (-1, i), bg_color)
-        
-        # Pinta texto de vermelho se negativo
-        for j, val in enumerate(data[i]):
-            if j > 1 and ("-" in val or "(" in val) and val != "0,00":
-                 style.add('TEXTCOLOR', (j, i), (j, i), colors.red)
-
-    t.setStyle(style)
-    elements.append(t)
-    
-    doc.build(elements)
-    return buffer.getvalue()
-
 # ==========================================
 # 6. INTERFACE DO USUÁRIO
 # ==========================================
@@ -511,70 +75,210 @@ with col_right:
         f_caixa_cc = st.file_uploader("🟠 Caixa Econômica - Conta Corrente", type='pdf', accept_multiple_files=True)
         f_caixa_inv = st.file_uploader("🟠 Caixa Econômica - Investimentos", type='pdf', accept_multiple_files=True)
 
+        st.divider()
+
+        f_pacotes = st.file_uploader("📦 Pacote de extratos (.ZIP) - banco e tipo identificados pelo nome ou pela 1ª página",
+                                     type='zip', accept_multiple_files=True)
+
+lista_arquivos = []
+if f_bb_cc:
+    for f in f_bb_cc: lista_arquivos.append({'arquivo': f, 'banco': 'BANCO DO BRASIL', 'tipo': 'CC'})
+if f_bb_inv:
+    for f in f_bb_inv: lista_arquivos.append({'arquivo': f, 'banco': 'BANCO DO BRASIL', 'tipo': 'INV'})
+if f_caixa_cc:
+    for f in f_caixa_cc: lista_arquivos.append({'arquivo': f, 'banco': 'CAIXA ECONÔMICA', 'tipo': 'CC'})
+if f_caixa_inv:
+    for f in f_caixa_inv: lista_arquivos.append({'arquivo': f, 'banco': 'CAIXA ECONÔMICA', 'tipo': 'INV'})
+
+# Cada pacote é aberto e classificado uma vez por sessão (a tela roda de novo a cada segundo durante a leitura)
+if 'pacotes_zip' not in st.session_state: st.session_state['pacotes_zip'] = {}
+pacotes_zip = st.session_state['pacotes_zip']
+for chave in [c for c in pacotes_zip if c not in {f.file_id for f in f_pacotes or []}]: del pacotes_zip[chave]
+for f in f_pacotes or []:
+    if f.file_id not in pacotes_zip:
+        try:
+            pacotes_zip[f.file_id] = extratos_do_zip(f)
+        except Exception as e:
+            pacotes_zip[f.file_id] = ([], [(f.name, f"pacote ilegível: {e}")])
+    extraidos_zip, ignorados_zip = pacotes_zip[f.file_id]
+    lista_arquivos.extend(extraidos_zip)
+    if ignorados_zip:
+        with col_right.expander(f"⚠️ {f.name}: {len(ignorados_zip)} arquivo(s) não classificado(s)"):
+            st.dataframe(pd.DataFrame(ignorados_zip, columns=['Arquivo', 'Motivo']), use_container_width=True, hide_index=True)
+
+# Cada extrato começa a ser lido assim que chega; o botão só espera o que faltar e faz o cruzamento
+if 'recepcao' not in st.session_state: st.session_state['recepcao'] = {}
+fila_recepcao = st.session_state['recepcao']
+receber(fila_recepcao, lista_arquivos)
+
+def acompanhar_recepcao():
+    linhas = situacao_recepcao(fila_recepcao)
+    faltam = pendentes(fila_recepcao)
+    # O intervalo do fragmento só é escolhido numa execução completa: quando a
+    # leitura termina, uma execução completa desliga a atualização automática
+    if not faltam and st.session_state.get('recepcao_em_andamento'): st.rerun()
+    if not linhas: return
+    st.progress((len(linhas) - faltam) / len(linhas), text=f"Extratos lidos: {len(linhas) - faltam} de {len(linhas)}")
+    with st.expander("Leitura dos extratos", expanded=False):
+        st.dataframe(pd.DataFrame(linhas), use_container_width=True, hide_index=True,
+                     column_config={'Progresso': st.column_config.ProgressColumn('Progresso', min_value=0.0, max_value=1.0)})
+
+# Enquanto houver extrato sendo lido, o acompanhamento se atualiza sozinho a cada segundo
+st.session_state['recepcao_em_andamento'] = pendentes(fila_recepcao) > 0
+st.fragment(acompanhar_recepcao, run_every=1 if st.session_state['recepcao_em_andamento'] else None)()
+
 st.markdown("<br>", unsafe_allow_html=True)
 btn_processar = st.button("Processar Conciliação", type="primary", use_container_width=True)
-
+perfil_ativo = st.checkbox("Gerar perfil detalhado da execução (cProfile)", value=False,
+                           help="Deixa o processamento mais lento; o perfil fica disponível na aba Desempenho.")
+
+def conciliar():
+    """Processamento completo das entradas atuais; None se não houver dados."""
+    # O estado da sessão guarda o último cruzamento: um reenvio só refaz as contas afetadas
+    if 'estado_conciliacao' not in st.session_state: st.session_state['estado_conciliacao'] = {}
+    medicoes = []
+    with perfilar(perfil_ativo) as perfil:
+        df_final, df_log = executar_processo(f_saldos, f_rendim, lista_arquivos, avisar=st.error,
+                                             estado=st.session_state['estado_conciliacao'],
+                                             medicoes=medicoes,
+                                             extraidos=resultados_recebidos(fila_recepcao, lista_arquivos))
+    if df_final.empty: return None
+
+    # Uma só tabela numérica para a tela e os relatórios; a máscara de divergências é calculada uma vez
+    return {'df_final': df_final, 'df_log': df_log, 'df_display': tabela_relatorio(df_final),
+            'divergentes': np.flatnonzero(mascara_divergencias(df_final)), 'medicoes': medicoes, 'perfil': perfil}
+
+def grade_paginada(df, posicoes, chave):
+    """Uma página das linhas `posicoes` de df, com os valores em R$ formatados só na exibição."""
+    total = len(posicoes)
+    paginas = max(1, -(-total // LINHAS_POR_PAGINA))
+    pagina = st.number_input(f"Página (de {paginas})", min_value=1, max_value=paginas, value=1, key=chave) if paginas > 1 else 1
+    inicio = (pagina - 1) * LINHAS_POR_PAGINA
+    trecho = df.iloc[posicoes[inicio:inicio + LINHAS_POR_PAGINA]]
+    numericas = list(trecho.select_dtypes(include='number').columns)
+    st.dataframe(trecho.style.format(formatar_moeda_br, subset=numericas), use_container_width=True, height=500)
+    if paginas > 1: st.caption(f"Contas {inicio + 1} a {min(inicio + LINHAS_POR_PAGINA, total)} de {total}")
+
+resultado = None
 if btn_processar:
     if not f_saldos:
         st.warning("⚠️ Obrigatório carregar o arquivo de Saldos (CSV).")
     else:
-        lista_arquivos = []
-        if f_bb_cc:
-            for f in f_bb_cc: lista_arquivos.append({'arquivo': f, 'banco': 'BANCO DO BRASIL', 'tipo': 'CC'})
-        if f_bb_inv:
-            for f in f_bb_inv: lista_arquivos.append({'arquivo': f, 'banco': 'BANCO DO BRASIL', 'tipo': 'INV'})
-        if f_caixa_cc:
-            for f in f_caixa_cc: lista_arquivos.append({'arquivo': f, 'banco': 'CAIXA ECONÔMICA', 'tipo': 'CC'})
-        if f_caixa_inv:
-            for f in f_caixa_inv: lista_arquivos.append({'arquivo': f, 'banco': 'CAIXA ECONÔMICA', 'tipo': 'INV'})
-        
         with st.spinner("Lendo arquivos e cruzando dados..."):
-            df_final, df_log = executar_processo(f_saldos, f_rendim, lista_arquivos)
-            
-            if not df_final.empty:
-                df_display = df_final.copy()
-                mapa_colunas = {
-                    'Descrição': ('Dados', 'Banco / Descrição'), 
-                    'Chave Primaria': ('Dados', 'Conta Reduzida'),
-                    'Saldo_Contabil_CC': ('Conta Corrente', 'Contábil'), 
-                    'Saldo_Banco_CC': ('Conta Corrente', 'Banco'), 
-                    'Diferenca_Saldo_CC': ('Conta Corrente', 'Diferença'),
-                    'Saldo_Contabil_Aplic': ('Aplicação', 'Contábil'), 
-                    'Saldo_Banco_Aplic': ('Aplicação', 'Banco'), 
-                    'Diferenca_Saldo_Aplic': ('Aplicação', 'Diferença'),
-                    'Rendimento_Contabil': ('Rendimentos', 'Contábil'), 
-                    'Rendimento_Banco': ('Rendimentos', 'Banco'), 
-                    'Diferenca_Rendimento': ('Rendimentos', 'Diferença')
-                }
-                
-                cols_existentes = [c for c in df_display.columns if c in mapa_colunas]
-                df_display = df_display[cols_existentes]
-                df_display.columns = pd.MultiIndex.from_tuples([mapa_colunas[c] for c in df_display.columns])
-                
-                numeric_cols = df_display.select_dtypes(include=['float', 'int']).columns
-                df_formatado = df_display.copy()
-                for col in numeric_cols: df_formatado[col] = df_formatado[col].apply(formatar_moeda_br)
-
-                st.success("Processamento concluído.")
-                tab1, tab2, tab3 = st.tabs(["📊 Visão Geral", "🚨 Apenas Divergências", "📝 Log de Leitura"])
-                
-                with tab1:
-                    st.dataframe(df_formatado, use_container_width=True, height=500)
-                    col_dl1, col_dl2 = st.columns(2)
-                    with col_dl1:
-                        st.download_button("📥 Baixar Excel Formatado", to_excel_styled(df_display), "conciliacao_completa.xlsx", type='primary', use_container_width=True)
-                    with col_dl2:
-                        st.download_button("📄 Baixar Relatório PDF", to_pdf(df_display), "relatorio_conciliacao.pdf", use_container_width=True)
-                
-                with tab2:
-                    filtro = (df_final['Diferenca_Saldo_CC'].abs() > 0.01) | \
-                             (df_final['Diferenca_Saldo_Aplic'].abs() > 0.01) | \
-                             (df_final['Diferenca_Rendimento'].abs() > 0.01)
-                    df_div = df_formatado[filtro]
-                    if df_div.empty: st.info("Tudo certo! Nenhuma divergência encontrada.")
-                    else: st.dataframe(df_div, use_container_width=True)
-                
-                with tab3:
-                    st.dataframe(df_log, use_container_width=True)
-            else:
-                st.error("O processamento não retornou dados.")
+            # Resultados guardados no servidor pela impressão das entradas: outra sessão
+            # (ou esta, depois de um rerun) com as mesmas entradas não refaz o trabalho
+            chave_entradas = impressao_entradas(f_saldos, f_rendim, lista_arquivos)
+            resultado, origem = resultado_compartilhado(chave_entradas, conciliar, recalcular=perfil_ativo)
+        if resultado is None:
+            st.session_state.pop('resultado_atual', None)
+            st.error("O processamento não retornou dados.")
+        else:
+            # A execução com perfil não vai para o cache do servidor: fica só nesta sessão
+            st.session_state['resultado_atual'] = (chave_entradas, origem, resultado if perfil_ativo else None)
+
+# O resultado continua na tela nos reruns (troca de aba, downloads) enquanto estiver no cache do servidor
+if resultado is None and 'resultado_atual' in st.session_state:
+    chave_entradas, origem, resultado = st.session_state['resultado_atual']
+    if resultado is None: resultado = resultado_guardado(chave_entradas)
+    if resultado is None:
+        del st.session_state['resultado_atual']
+        st.info("O resultado anterior saiu do cache do servidor (validade ou limite de memória). Processe novamente.")
+
+if resultado is not None:
+    df_final, df_log = resultado['df_final'], resultado['df_log']
+    df_display, divergentes = resultado['df_display'], resultado['divergentes']
+    medicoes, perfil = resultado['medicoes'], resultado['perfil']
+
+    st.success({'acerto': "Processamento concluído (resultado reaproveitado do cache do servidor).",
+                'aguardado': "Processamento concluído (mesmas entradas processadas por outra sessão).",
+                'calculado': "Processamento concluído."}[origem])
+    tab1, tab2, tab3, tab4 = st.tabs(["📊 Visão Geral", "🚨 Apenas Divergências", "📝 Log de Leitura", "⏱️ Desempenho"])
+    
+    # Relatórios gerados em segundo plano e só entregues quando pedidos,
+    # memorizados pela impressão digital do resultado
+    chave_resultado = impressao_digital(df_final)
+    preparar_relatorio(chave_resultado, 'xlsx', to_excel_styled, df_display)
+    preparar_relatorio(chave_resultado, 'pdf', to_pdf, df_display)
+
+    with tab1:
+        grade_paginada(df_display, np.arange(len(df_display)), f"pagina_geral_{chave_resultado}")
+        col_dl1, col_dl2, col_hist = st.columns(3)
+        with col_dl1:
+            st.download_button("📥 Baixar Excel Formatado", relatorio_sob_demanda(chave_resultado, 'xlsx', to_excel_styled, df_display), "conciliacao_completa.xlsx", type='primary', use_container_width=True, on_click="ignore")
+        with col_dl2:
+            st.download_button("📄 Baixar Relatório PDF", relatorio_sob_demanda(chave_resultado, 'pdf', to_pdf, df_display), "relatorio_conciliacao.pdf", use_container_width=True, on_click="ignore")
+        with col_hist:
+            # Gravar de novo a mesma competência substitui a gravação anterior
+            with st.popover("🗄️ Gravar no histórico", use_container_width=True):
+                competencia = st.text_input("Competência (AAAA-MM)", value=COMPETENCIA_PADRAO)
+                unidade = st.text_input("Unidade", value="")
+                if st.button("Gravar", use_container_width=True):
+                    try:
+                        contas = registrar_execucao(df_final, df_log, competencia.strip(), unidade.strip())
+                        st.success(f"{contas} contas gravadas em {competencia.strip()}.")
+                    except ValueError as e:
+                        st.error(str(e))
+    
+    with tab2:
+        if not len(divergentes): st.info("Tudo certo! Nenhuma divergência encontrada.")
+        else: grade_paginada(df_display, divergentes, f"pagina_divergencias_{chave_resultado}")
+    
+    with tab3:
+        st.dataframe(df_log, use_container_width=True)
+
+    with tab4:
+        # As exportações entram na tabela assim que terminam de ser geradas
+        todas_medicoes = lambda: medicoes + medicoes_relatorios(chave_resultado)
+        st.dataframe(tabela_medicoes(todas_medicoes()), use_container_width=True, hide_index=True)
+        st.caption("Pico RSS da Etapa é quanto a memória do servidor subiu durante a etapa; Pico Alocado, o mesmo "
+                   "pelo tracemalloc, só com o perfil (cProfile) ligado. Etapas simultâneas podem contar a memória "
+                   "umas das outras. Pico RSS do Processo é o máximo do servidor desde que ele começou.")
+        col_m1, col_m2, col_m3 = st.columns(3)
+        with col_m1:
+            st.download_button("Baixar medições (JSON)", lambda: medicoes_json(todas_medicoes()), "medicoes.json", use_container_width=True, on_click="ignore")
+        with col_m2:
+            st.download_button("Baixar medições (CSV)", lambda: medicoes_csv(todas_medicoes()), "medicoes.csv", use_container_width=True, on_click="ignore")
+        if perfil.get('prof'):
+            with col_m3:
+                st.download_button("Baixar perfil (cProfile)", perfil['prof'], "perfil_conciliacao.prof", use_container_width=True, on_click="ignore")
+            st.code(perfil['resumo'])
+
+        st.markdown("**Cache de resultados do servidor**")
+        st.dataframe(pd.DataFrame([situacao_resultados()]), use_container_width=True, hide_index=True)
+
+# ==========================================
+# 7. HISTÓRICO DE CONCILIAÇÕES
+# ==========================================
+# Consultas direto no histórico gravado, sem reler nenhum arquivo de origem
+st.markdown("---")
+with st.expander("🗄️ Histórico de conciliações", expanded=False):
+    execucoes = execucoes_registradas()
+    if execucoes.empty:
+        st.info("Nenhuma execução gravada ainda. Use \"Gravar no histórico\" depois de processar.")
+    else:
+        unidades = sorted(execucoes['unidade'].unique())
+        col_h1, col_h2, col_h3 = st.columns(3)
+        with col_h1:
+            filtro_unidade = st.selectbox("Unidade", ["Todas"] + unidades, format_func=lambda u: u or "(sem nome)")
+        unidade_consulta = None if filtro_unidade == "Todas" else filtro_unidade
+        with col_h2:
+            competencias = sorted(execucoes['competencia'].unique(), reverse=True)
+            ate = st.selectbox("Até a competência", competencias)
+        with col_h3:
+            meses = st.number_input("Meses seguidos com divergência", min_value=1, max_value=120, value=3)
+
+        seguidas = divergencias_consecutivas(meses, ate, unidade_consulta)
+        st.markdown(f"**Contas divergentes nos {meses} meses até {ate}:** {len(seguidas)}")
+        if not seguidas.empty:
+            st.dataframe(seguidas.style.format(formatar_moeda_br, subset=list(seguidas.select_dtypes(include='number').columns)),
+                         use_container_width=True, hide_index=True)
+
+        chave_consulta = st.text_input("Histórico de uma conta (Chave Primaria)")
+        if chave_consulta.strip():
+            historico = historico_conta(chave_consulta.strip(), unidade_consulta)
+            if historico.empty: st.info("Conta não encontrada no histórico.")
+            else: st.dataframe(historico.style.format(formatar_moeda_br, subset=list(historico.select_dtypes(include='number').columns.drop('divergente'))),
+                               use_container_width=True, hide_index=True)
+
+        st.markdown("**Execuções gravadas**")
+        st.dataframe(execucoes, use_container_width=True, hide_index=True)
@@ -0,0 +1,65 @@
+"""Compara a classificação antiga (apply linha a linha) com identificar_bancos.
+
+Uso:
+    python benchmarks/bench_bancos.py [linhas]
+
+Gera um df_final sintético com nomes de banco vindos do PDF e descrições do
+ERP e mostra os tempos. A conferência de resultado idêntico ao da versão
+antiga fica em tests/test_bancos.py.
+"""
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conciliacao.bancos import identificar_bancos
+
+
+def identificar_banco_por_texto(row):
+    """Classificação como era feita antes, uma linha por vez."""
+    if pd.notna(row.get('Nome_Banco')) and str(row.get('Nome_Banco')) not in ['0', '0.0', 'nan', 'None']:
+        return str(row['Nome_Banco']).upper()
+    desc = str(row.get('Descrição_ERP', '')).upper()
+    if 'BRASIL' in desc or 'BB ' in desc or 'BCO DO BRASIL' in desc:
+        return "BANCO DO BRASIL"
+    elif 'CAIXA' in desc or 'CEF' in desc or 'FEDERAL' in desc or 'ECONÔMICA' in desc:
+        return "CAIXA ECONÔMICA"
+    if '001' in desc:
+        return "BANCO DO BRASIL"
+    if '104' in desc:
+        return "CAIXA ECONÔMICA"
+    return desc
+
+
+def df_final_sintetico(n=200_000, semente=42):
+    rnd = random.Random(semente)
+    pedacos = ["bb ", "Brasil", "Bco do Brasil", "cef", "Caixa", "econômica", "Federal",
+               "001", "104", "Fundo", "conta movimento", "ß", "0"]
+    nomes = [None, np.nan, 0, 0.0, "nan", "None", "", "Banco do Brasil", "Caixa Econômica"]
+    descricoes = [None, np.nan, 0, 1.5] + [
+        " ".join(rnd.choices(pedacos, k=rnd.randint(1, 3))) + f" {i}" for i in range(50_000)
+    ]
+    return pd.DataFrame({
+        'Nome_Banco': pd.Series(rnd.choices(nomes, k=n), dtype=object),
+        'Descrição_ERP': pd.Series(rnd.choices(descricoes, k=n), dtype=object),
+    })
+
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    df = df_final_sintetico(n)
+
+    inicio = time.perf_counter()
+    antigo = df.apply(identificar_banco_por_texto, axis=1)
+    t_antigo = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    novo = identificar_bancos(df)
+    t_novo = time.perf_counter() - inicio
+
+    print(f"{n} linhas  antigo {t_antigo:.2f}s  vetorizado {t_novo:.2f}s  ({t_antigo / t_novo:.1f}x)")
@@ -0,0 +1,68 @@
+"""Compara a varredura antiga (vários any() por linha) com classificar_linha.
+
+Uso:
+    python benchmarks/bench_gatilhos.py [extrato1.pdf extrato2.pdf ...]
+
+Sem argumentos, usa linhas sintéticas no formato dos extratos BB/CEF.
+Mostra linhas/s das duas varreduras. A conferência de resultado idêntico
+fica em tests/test_gatilhos.py.
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conciliacao.extrato_pdf import (
+    GATILHOS_SALDO, IGNORAR_SALDO, GATILHOS_RENDIMENTO,
+    SALDO, IGNORA_SALDO, RENDIMENTO, IGNORA_RENDIMENTO, classificar_linha,
+)
+
+
+def classificar_linha_antiga(linha_upper):
+    """Varredura como era feita antes, gatilho por gatilho."""
+    categorias = 0
+    if any(g in linha_upper for g in GATILHOS_SALDO): categorias |= SALDO
+    if any(ign in linha_upper for ign in IGNORAR_SALDO): categorias |= IGNORA_SALDO
+    if any(g in linha_upper for g in GATILHOS_RENDIMENTO): categorias |= RENDIMENTO
+    if "ACUMULADO" in linha_upper or "ANO" in linha_upper: categorias |= IGNORA_RENDIMENTO
+    return categorias
+
+
+def linhas_sinteticas(n=200_000, semente=42):
+    rnd = random.Random(semente)
+    especiais = ["SALDO FINAL 1.234,56 C", "SALDO ANTERIOR 10,00", "RENDIMENTO BRUTO 99,10",
+                 "RENDIMENTO NO MÊS", "RENTABILIDADE NO ANO 1,2", "S A L D O", "Rentab. 3,33",
+                 "SALDO TOTAL EM COTAS 5,00", "POSICAO EM 30/06/2025 7.000,00", "Saldo Líquido 1,00"]
+    linhas = []
+    for i in range(n):
+        if rnd.random() < 0.05:
+            linhas.append(rnd.choice(especiais))
+        else:
+            linhas.append(f"{i % 28 + 1:02d}/06/2025 PIX RECEBIDO {rnd.randint(1, 999)} {rnd.uniform(1, 9999):.2f} C")
+    return linhas
+
+
+def linhas_de_pdfs(caminhos):
+    import fitz  # PyMuPDF
+    linhas = []
+    for caminho in caminhos:
+        with fitz.open(caminho) as doc:
+            for pag in doc: linhas.extend(pag.get_text().split('\n'))
+    return linhas
+
+
+def medir(funcao, linhas):
+    inicio = time.perf_counter()
+    resultado = [funcao(l.upper().strip()) for l in linhas]
+    return resultado, len(linhas) / (time.perf_counter() - inicio)
+
+
+if __name__ == "__main__":
+    linhas = linhas_de_pdfs(sys.argv[1:]) if len(sys.argv) > 1 else linhas_sinteticas()
+    antes, lps_antes = medir(classificar_linha_antiga, linhas)
+    depois, lps_depois = medir(classificar_linha, linhas)
+    print(f"linhas: {len(linhas)}")
+    print(f"antes:  {lps_antes:,.0f} linhas/s")
+    print(f"depois: {lps_depois:,.0f} linhas/s  ({lps_depois / lps_antes:.1f}x)")
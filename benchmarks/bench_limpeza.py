@@ -0,0 +1,76 @@
+"""Mede as versões vetorizadas de gerar_chave_padronizada e limpar_valor_monetario.
+
+Uso:
+    python benchmarks/bench_limpeza.py [linhas]
+
+Grava um CSV sintético no formato Flexvision (padrão: 1 milhão de linhas)
+e compara o tempo de Series.apply com o das versões vetorizadas. A
+conferência de resultado idêntico ao das funções escalares fica em
+tests/test_limpeza.py.
+"""
+import io
+import os
+import random
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conciliacao.limpeza import (
+    gerar_chave_padronizada, limpar_valor_monetario,
+    gerar_chaves_padronizadas, limpar_valores_monetarios,
+)
+
+ALFABETO = "0123456789..//--,, ()DdEBCabx\tº"
+
+
+def texto_aleatorio(rnd):
+    tamanho = rnd.randint(0, 30)
+    return "".join(rnd.choice(ALFABETO) for _ in range(tamanho))
+
+
+def conta_aleatoria(rnd):
+    modelo = rnd.random()
+    if modelo < 0.3:
+        return f"104.{rnd.randint(0, 9999)}.{rnd.randint(0, 999):03d}.{rnd.randint(0, 99999999):08d}-{rnd.randint(0, 9)}"
+    if modelo < 0.5:
+        return f" {rnd.randint(0, 9999)}/{rnd.randint(0, 9999999)}-{rnd.randint(0, 9)} "
+    if modelo < 0.6:
+        return str(rnd.randint(0, 10**12))
+    if modelo < 0.65:
+        return rnd.choice([None, np.nan, 123, 4.5])
+    return texto_aleatorio(rnd)
+
+
+def csv_sintetico(linhas, contas_distintas=50_000, semente=11):
+    """CSV no formato Flexvision: cada conta aparece em várias linhas, os valores quase nunca se repetem."""
+    rnd = random.Random(semente)
+    contas = [str(conta_aleatoria(rnd) or '') for _ in range(contas_distintas)]
+    buffer = io.StringIO()
+    buffer.write("Relatório 013083;;\nDomicílio bancário;Conta Contábil;Saldo Final\n")
+    for _ in range(linhas):
+        v = rnd.uniform(-10**6, 10**6)
+        valor = f"{abs(v):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") + (" D" if v < 0 else " C")
+        buffer.write(f"{rnd.choice(contas)};1111119 - Conta Movimento;{valor}\n")
+    return io.BytesIO(buffer.getvalue().encode('latin-1', errors='replace'))
+
+
+def medir(linhas):
+    df = pd.read_csv(csv_sintetico(linhas), encoding='latin-1', sep=';', header=1, dtype=str)
+    contas, valores = df['Domicílio bancário'], df['Saldo Final'].astype(str)
+
+    for nome, chave, valor in [
+        ("Series.apply", lambda: contas.apply(gerar_chave_padronizada), lambda: valores.apply(limpar_valor_monetario)),
+        ("vetorizado", lambda: gerar_chaves_padronizadas(contas), lambda: limpar_valores_monetarios(valores)),
+    ]:
+        inicio = time.perf_counter(); chave()
+        meio = time.perf_counter(); valor()
+        fim = time.perf_counter()
+        print(f"{nome:>13}: chaves {meio - inicio:6.2f}s  valores {fim - meio:6.2f}s  ({linhas} linhas)")
+
+
+if __name__ == "__main__":
+    medir(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,51 @@
+"""Mede to_excel_styled e to_pdf com resultados sintéticos de vários tamanhos.
+
+Uso:
+    python benchmarks/bench_relatorios.py [linhas ...]
+
+Padrão: 1.000, 10.000 e 50.000 contas, no mesmo formato (cabeçalho de dois
+níveis) que a tela de resultados envia para os geradores.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from conciliacao.relatorios import to_excel_styled, to_pdf
+
+COLUNAS = [
+    ('Dados', 'Banco / Descrição'), ('Dados', 'Conta Reduzida'),
+    ('Conta Corrente', 'Contábil'), ('Conta Corrente', 'Banco'), ('Conta Corrente', 'Diferença'),
+    ('Aplicação', 'Contábil'), ('Aplicação', 'Banco'), ('Aplicação', 'Diferença'),
+    ('Rendimentos', 'Contábil'), ('Rendimentos', 'Banco'), ('Rendimentos', 'Diferença'),
+]
+
+
+def resultado_sintetico(linhas, semente=3):
+    rng = np.random.default_rng(semente)
+    dados = {
+        COLUNAS[0]: rng.choice(["BANCO DO BRASIL", "CAIXA ECONÔMICA", "-"], size=linhas),
+        COLUNAS[1]: [f"{n:07d}" for n in rng.integers(0, 10**7, size=linhas)],
+    }
+    for grupo in ('Conta Corrente', 'Aplicação', 'Rendimentos'):
+        contabil = np.round(rng.normal(0, 5e5, size=linhas), 2)
+        # Maioria das contas bate; algumas divergem
+        banco = np.where(rng.random(linhas) < 0.9, contabil, np.round(rng.normal(0, 5e5, size=linhas), 2))
+        dados[(grupo, 'Contábil')], dados[(grupo, 'Banco')], dados[(grupo, 'Diferença')] = contabil, banco, contabil - banco
+    df = pd.DataFrame({c: dados[c] for c in COLUNAS})
+    df.columns = pd.MultiIndex.from_tuples(COLUNAS)
+    return df
+
+
+if __name__ == "__main__":
+    tamanhos = [int(a) for a in sys.argv[1:]] or [1_000, 10_000, 50_000]
+    for linhas in tamanhos:
+        df = resultado_sintetico(linhas)
+        for nome, gerador in (("Excel", to_excel_styled), ("PDF", to_pdf)):
+            inicio = time.perf_counter()
+            tamanho = len(gerador(df))
+            print(f"{linhas:>7} linhas  {nome:<5} {time.perf_counter() - inicio:7.2f}s  {tamanho / 1024:9.0f} KB")
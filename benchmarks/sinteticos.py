@@ -0,0 +1,149 @@
+"""Entradas sintéticas para os benchmarks: extratos BB/CEF, CSVs Flexvision e DE-PARA.
+
+As contas dos extratos saem do mesmo conjunto das contas dos CSVs (com a
+pontuação de cada banco), de modo que o cruzamento encontre pares, como
+num fechamento real. Tudo é determinístico a partir da semente.
+"""
+import io
+import os
+import random
+
+import pandas as pd
+
+BANCOS = ['BANCO DO BRASIL', 'CAIXA ECONÔMICA']
+TIPOS = ['CC', 'INV']
+MOVIMENTOS = ["PIX RECEBIDO", "PIX ENVIADO", "TED RECEBIDA", "PAGAMENTO BOLETO", "TARIFA PACOTE",
+              "TRANSFERENCIA ENTRE CONTAS", "DEPOSITO ONLINE", "APLICACAO AUTOMATICA", "RESGATE AUTOMATICO"]
+LINHAS_POR_PAGINA = 48
+
+
+def moeda(v):
+    return f"{abs(v):,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def contas_sinteticas(quantidade, semente=1):
+    """Chaves de 7 dígitos distintas (o formato de gerar_chave_padronizada)."""
+    rnd = random.Random(semente)
+    return [f"{n:07d}" for n in rnd.sample(range(1_000_000, 10_000_000), quantidade)]
+
+
+def domicilio(chave, banco, agencia):
+    """Conta como aparece no Flexvision (Domicílio bancário)."""
+    if banco == 'CAIXA ECONÔMICA':
+        return f"104.{agencia}.006.{chave[:-1]}-{chave[-1]}"
+    return f"001.{agencia}-{agencia % 10}.{chave[:-1]}-{chave[-1]}"
+
+
+# ==========================================
+# EXTRATOS EM PDF
+# ==========================================
+def linhas_extrato(banco, tipo, chave, agencia, saldo, rendimento, paginas, rnd):
+    """Páginas (listas de linhas) de um extrato com o layout do banco e do tipo."""
+    if banco == 'BANCO DO BRASIL':
+        cabecalho = ["BANCO DO BRASIL", "Extrato de Conta Corrente" if tipo == 'CC' else "Extrato de Investimentos - BB RF",
+                     f"Agência: {agencia}-{agencia % 10}   Conta corrente: {chave[:-1]}-{chave[-1]}",
+                     "Período: 01/06/2025 a 30/06/2025"]
+    else:
+        conta = f"Conta: {agencia}/006/{chave[:-1]}-{chave[-1]}" if tipo == 'CC' else f"Conta Vinculada: {agencia}/0006/{chave[:-1]}-{chave[-1]}"
+        cabecalho = ["CAIXA ECONÔMICA FEDERAL", "Extrato por período" if tipo == 'CC' else "Extrato de Fundos de Investimento",
+                     conta, "Período: 01/06/2025 a 30/06/2025"]
+
+    resultado = []
+    for p in range(paginas):
+        linhas = list(cabecalho) if p == 0 else [f"{banco} - página {p + 1}"]
+        if p == 0: linhas.append(f"SALDO ANTERIOR  {moeda(rnd.uniform(0, 10**6))} C")
+        while len(linhas) < LINHAS_POR_PAGINA - 6:
+            v = rnd.uniform(-50_000, 50_000)
+            linhas.append(f"{rnd.randint(1, 30):02d}/06/2025  {rnd.choice(MOVIMENTOS)} {rnd.randint(100, 999999)}"
+                          f"   {moeda(v)} {'D' if v < 0 else 'C'}")
+        resultado.append(linhas)
+
+    final = resultado[-1]
+    if tipo == 'INV':
+        final += [f"RENDIMENTO BRUTO  {moeda(rendimento)}", f"RENDIMENTO LIQUIDO  {moeda(rendimento * 0.85)}",
+                  "RENTABILIDADE NO ANO  8,91", f"SALDO FINAL  {moeda(saldo)}"]
+    else:
+        final.append(f"SALDO FINAL  {moeda(saldo)} {'D' if saldo < 0 else 'C'}")
+    return resultado
+
+
+def pdf_de_linhas(paginas):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4)
+    for linhas in paginas:
+        texto = c.beginText(40, 800)
+        texto.setFont("Helvetica", 9)
+        for linha in linhas: texto.textLine(linha)
+        c.drawText(texto)
+        c.showPage()
+    c.save()
+    return buffer.getvalue()
+
+
+def extratos_sinteticos(quantidade, contas, semente=2, max_paginas=5):
+    """Lista de dicts {'nome', 'conteudo', 'banco', 'tipo', 'chave'} alternando BB/CEF e CC/INV."""
+    rnd = random.Random(semente)
+    extratos = []
+    for i in range(quantidade):
+        banco, tipo = BANCOS[i % 2], TIPOS[(i // 2) % 2]
+        chave = contas[rnd.randrange(len(contas))]
+        agencia = rnd.randint(1000, 9999)
+        paginas = rnd.choice([1, 1, 2, 3, max_paginas])
+        saldo = round(rnd.uniform(-5_000, 900_000), 2) if tipo == 'CC' else round(rnd.uniform(0, 900_000), 2)
+        rendimento = round(rnd.uniform(0, 5_000), 2)
+        conteudo = pdf_de_linhas(linhas_extrato(banco, tipo, chave, agencia, saldo, rendimento, paginas, rnd))
+        sigla = 'bb' if banco == 'BANCO DO BRASIL' else 'cef'
+        extratos.append({'nome': f"{sigla}_{tipo.lower()}_{i:05d}.pdf", 'conteudo': conteudo,
+                         'banco': banco, 'tipo': tipo, 'chave': chave})
+    return extratos
+
+
+# ==========================================
+# CSVs FLEXVISION (013083 e 014387) E DE-PARA
+# ==========================================
+def csv_saldos(caminho, linhas, contas, semente=3):
+    """Relatório 013083: uma linha por conta e item contábil (movimento / aplicação)."""
+    rnd = random.Random(semente)
+    itens = ["1111119 - Conta Movimento", "1111150 - Aplicação Financeira"]
+    descricoes = ["BCO DO BRASIL AG {}", "CAIXA ECONÔMICA FEDERAL {}", "CEF - FUNDO {}", "BB RF LP {}", "FUNDO MUNICIPAL {}"]
+    with open(caminho, 'w', encoding='latin-1', newline='') as fh:
+        fh.write("Relatório 013083 - Saldos;;;;\n")
+        fh.write("Descrição;Item Contábil;Domicílio bancário;Saldo Anterior;Saldo Final\n")
+        for i in range(linhas):
+            chave = contas[i % len(contas)] if i < len(contas) else contas[rnd.randrange(len(contas))]
+            banco = BANCOS[int(chave) % 2]
+            v = rnd.uniform(-10_000, 1_000_000)
+            fh.write(f"{rnd.choice(descricoes).format(chave[:3])};{rnd.choice(itens)};"
+                     f"{domicilio(chave, banco, 1000 + int(chave[:3]))};{moeda(rnd.uniform(0, 1000))} C;"
+                     f"{moeda(v)} {'D' if v < 0 else 'C'}\n")
+
+
+def csv_rendimentos(caminho, linhas, contas, semente=4):
+    """Relatório 014387: rendimento por conta.
+
+    Descrição vem antes de Domicílio bancário, como no 013083: das colunas que
+    podem ser a chave, processar_contabil fica com a última.
+    """
+    rnd = random.Random(semente)
+    with open(caminho, 'w', encoding='latin-1', newline='') as fh:
+        fh.write("Relatório 014387 - Rendimentos;;\n")
+        fh.write("Descrição;Domicílio bancário;Valor\n")
+        for i in range(linhas):
+            chave = contas[rnd.randrange(len(contas))]
+            banco = BANCOS[int(chave) % 2]
+            fh.write(f"RENDIMENTO APLICACAO;{domicilio(chave, banco, 1000 + int(chave[:3]))};{moeda(rnd.uniform(0, 5_000))}\n")
+
+
+def planilha_depara(caminho, contas, proporcao=0.05, semente=5):
+    """DE-PARA (aba usada por carregar_depara) trocando uma fração das contas por outras novas."""
+    from conciliacao.depara import ABA_DEPARA
+
+    rnd = random.Random(semente)
+    antigas = rnd.sample(contas, max(1, int(len(contas) * proporcao)))
+    novas = contas_sinteticas(len(antigas), semente=semente + 100)
+    df = pd.DataFrame({'Conta Antiga': [f"600{c}" for c in antigas], 'Conta Nova': [f"575{c}" for c in novas]})
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    df.to_excel(caminho, sheet_name=ABA_DEPARA, index=False)
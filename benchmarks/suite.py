@@ -0,0 +1,204 @@
+"""Suíte de benchmarks do pipeline completo, com entradas sintéticas.
+
+Uso:
+    python benchmarks/suite.py [--extratos 10,100,1000] [--linhas 10000,100000,1000000]
+                               [--salvar resultado.json] [--comparar linha_base.json]
+                               [--tolerancia 0.25]
+
+Cada cenário gera as entradas (benchmarks/sinteticos.py) numa pasta
+temporária e roda executar_processo medindo cada etapa (conciliacao.medicao),
+mais as exportações Excel/PDF e a carga do DE-PARA:
+
+    extratos=N   N extratos BB/CEF CC/INV e um CSV pequeno
+    linhas=L     CSVs Flexvision 013083/014387 com L linhas e 10 extratos
+    depara       planilha DE-PARA: compilação, artefato .npz e memória
+
+O resultado é gravado em JSON (padrão: benchmarks/resultados/<data>.json).
+Com --comparar, cada etapa é comparada com a mesma etapa da linha de base;
+a saída é 1 se alguma ficou mais lenta que a tolerância.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+# Caches em pasta temporária: cada execução da suíte começa a frio
+DIR_TEMP = tempfile.mkdtemp(prefix="bench_conciliacao_")
+os.environ["CONCILIACAO_CACHE_DIR"] = os.path.join(DIR_TEMP, "cache")
+os.environ["CONCILIACAO_DEPARA_CACHE"] = os.path.join(DIR_TEMP, "depara.npz")
+
+DIR_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(DIR_BENCH))
+
+import pandas as pd
+
+from conciliacao import depara, executar_processo, medir, tabela_relatorio, to_excel_styled, to_pdf
+from sinteticos import (
+    contas_sinteticas, extratos_sinteticos, csv_saldos, csv_rendimentos, planilha_depara,
+)
+
+# Acima disso as exportações são puladas (o PDF de 100 mil contas leva minutos)
+MAX_CONTAS_EXCEL = 100_000
+MAX_CONTAS_PDF = 20_000
+# Diferenças menores que isso (s) são ruído e não contam como regressão
+PISO_REGRESSAO = 0.05
+
+
+# ==========================================
+# CENÁRIOS
+# ==========================================
+def _gravar_extratos(pasta, extratos):
+    os.makedirs(pasta, exist_ok=True)
+    lista = []
+    for e in extratos:
+        caminho = os.path.join(pasta, e['nome'])
+        with open(caminho, 'wb') as fh: fh.write(e['conteudo'])
+        lista.append({'arquivo': caminho, 'banco': e['banco'], 'tipo': e['tipo']})
+    return lista
+
+
+def _rodar(pasta, contas, linhas_csv, extratos, caminho_depara):
+    os.makedirs(pasta, exist_ok=True)
+    saldos, rendimentos = os.path.join(pasta, "saldos_013083.csv"), os.path.join(pasta, "rendimentos_014387.csv")
+    csv_saldos(saldos, linhas_csv, contas)
+    csv_rendimentos(rendimentos, max(1, linhas_csv // 2), contas)
+    lista = _gravar_extratos(os.path.join(pasta, "extratos"), extratos)
+
+    medicoes = []
+    with medir(medicoes, 'Total executar_processo'):
+        df_final, _ = executar_processo(saldos, rendimentos, lista, medicoes=medicoes, caminho_depara=caminho_depara)
+    return df_final, medicoes
+
+
+def cenario_extratos(quantidade, pasta, caminho_depara):
+    contas = contas_sinteticas(max(quantidade, 500), semente=quantidade)
+    inicio = time.perf_counter()
+    extratos = extratos_sinteticos(quantidade, contas, semente=quantidade)
+    print(f"  {quantidade} extratos gerados em {time.perf_counter() - inicio:.1f}s")
+    return _rodar(pasta, contas, 2 * len(contas), extratos, caminho_depara)[1]
+
+
+def cenario_linhas(linhas, pasta, caminho_depara, linhas_por_conta):
+    contas = contas_sinteticas(max(1, linhas // linhas_por_conta), semente=linhas)
+    df_final, medicoes = _rodar(pasta, contas, linhas, extratos_sinteticos(10, contas, semente=linhas), caminho_depara)
+
+    df_display = tabela_relatorio(df_final)
+    for formato, gerador, limite in (('xlsx', to_excel_styled, MAX_CONTAS_EXCEL), ('pdf', to_pdf, MAX_CONTAS_PDF)):
+        if len(df_display) > limite:
+            print(f"  exportação {formato} pulada ({len(df_display)} contas > {limite})")
+            continue
+        with medir(medicoes, 'Exportação', formato) as linha:
+            linha['Linhas'] = len(df_display)
+            gerador(df_display)
+    return medicoes
+
+
+def cenario_depara(pasta, quantidade=20_000):
+    caminho = os.path.join(pasta, "depara.xlsx")
+    planilha_depara(caminho, contas_sinteticas(quantidade, semente=9), proporcao=1.0)
+    compilado = os.path.join(pasta, "depara.npz")
+    medicoes = []
+    with medir(medicoes, 'DE-PARA', 'compilar planilha'):
+        depara.carregar_depara(caminho, compilado)
+    depara._carregadas.clear()
+    with medir(medicoes, 'DE-PARA', 'artefato .npz'):
+        depara.carregar_depara(caminho, compilado)
+    with medir(medicoes, 'DE-PARA', 'memória') as linha:
+        linha['Linhas'] = len(depara.carregar_depara(caminho, compilado))
+    return medicoes
+
+
+# ==========================================
+# RESULTADOS
+# ==========================================
+def resumir(cenario, medicoes):
+    """Uma linha por etapa: extratos do mesmo banco/tipo são somados (tempo nos processos de leitura)."""
+    df = pd.DataFrame(medicoes)
+    df['Item'] = df['Item'].fillna('') if 'Item' in df else ''
+    # PDFs: agrupados por banco/tipo; demais etapas: por etapa + item (ex.: Exportação xlsx)
+    df['chave'] = df['Etapa'].where(df['Etapa'].str.startswith('PDF'), df['Etapa'] + ' ' + df['Item'].astype(str))
+    numericas = [c for c in ['Tempo (s)', 'CPU (s)', 'Abrir (s)', 'Texto (s)', 'Varredura (s)', 'Páginas', 'Páginas Lidas', 'Linhas'] if c in df]
+    resultado = []
+    for chave, grupo in df.groupby('chave', sort=False):
+        linha = {'cenario': cenario, 'etapa': chave.strip(), 'n': len(grupo)}
+        for coluna in numericas:
+            if grupo[coluna].notna().any(): linha[coluna] = round(float(grupo[coluna].sum()), 6)
+        for coluna in ['Pico RSS da Etapa (MB)', 'Pico RSS do Processo (MB)']:
+            if coluna in grupo and grupo[coluna].notna().any(): linha[coluna] = float(grupo[coluna].max())
+        resultado.append(linha)
+    return resultado
+
+
+def ambiente():
+    import numpy, fitz, reportlab
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=DIR_BENCH,
+                                capture_output=True, text=True, timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {'data': time.strftime("%Y-%m-%dT%H:%M:%S"), 'commit': commit, 'python': platform.python_version(),
+            'plataforma': platform.platform(), 'cpus': os.cpu_count(), 'pandas': pd.__version__,
+            'numpy': numpy.__version__, 'pymupdf': fitz.VersionBind, 'reportlab': reportlab.Version}
+
+
+def comparar(resultados, caminho_base, tolerancia):
+    with open(caminho_base, encoding='utf-8') as fh: base = json.load(fh)
+    anteriores = {(r['cenario'], r['etapa']): r['Tempo (s)'] for r in base['resultados'] if 'Tempo (s)' in r}
+    regressoes = 0
+    print(f"\nComparação com {caminho_base} (commit {base['ambiente'].get('commit') or '?'}):")
+    for r in resultados:
+        antes = anteriores.get((r['cenario'], r['etapa']))
+        if antes is None or 'Tempo (s)' not in r: continue
+        agora = r['Tempo (s)']
+        razao = agora / antes if antes else float('inf')
+        pior = agora > antes * (1 + tolerancia) and agora - antes > PISO_REGRESSAO
+        regressoes += pior
+        print(f"  {'REGRESSÃO' if pior else '':9} {r['cenario']:>16} {r['etapa']:<40} {antes:9.3f}s -> {agora:9.3f}s ({razao:5.2f}x)")
+    print(f"{regressoes} etapa(s) acima da tolerância de {tolerancia:.0%}")
+    return regressoes
+
+
+def _lista_int(texto):
+    return [int(x) for x in texto.split(",") if x.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--extratos", type=_lista_int, default=[10, 100, 1000])
+    parser.add_argument("--linhas", type=_lista_int, default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--linhas-por-conta", type=int, default=4)
+    parser.add_argument("--salvar", default=os.path.join(DIR_BENCH, "resultados", time.strftime("%Y%m%d-%H%M%S") + ".json"))
+    parser.add_argument("--comparar", help="JSON de uma execução anterior (linha de base)")
+    parser.add_argument("--tolerancia", type=float, default=0.25)
+    args = parser.parse_args()
+
+    caminho_depara = os.path.join(DIR_TEMP, "depara_unidade.xlsx")
+    planilha_depara(caminho_depara, contas_sinteticas(5_000, semente=7))
+
+    resultados = []
+    for quantidade in args.extratos:
+        print(f"cenário extratos={quantidade}")
+        pasta = os.path.join(DIR_TEMP, f"extratos_{quantidade}")
+        resultados += resumir(f"extratos={quantidade}", cenario_extratos(quantidade, pasta, caminho_depara))
+    for linhas in args.linhas:
+        print(f"cenário linhas={linhas}")
+        pasta = os.path.join(DIR_TEMP, f"linhas_{linhas}")
+        resultados += resumir(f"linhas={linhas}", cenario_linhas(linhas, pasta, caminho_depara, args.linhas_por_conta))
+    print("cenário depara")
+    resultados += resumir("depara", cenario_depara(DIR_TEMP))
+
+    for r in resultados:
+        print(f"  {r['cenario']:>16} {r['etapa']:<40} {r.get('Tempo (s)', 0):9.3f}s  (n={r['n']})")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.salvar)), exist_ok=True)
+    with open(args.salvar, 'w', encoding='utf-8') as fh:
+        json.dump({'versao': 1, 'ambiente': ambiente(), 'resultados': resultados}, fh, ensure_ascii=False, indent=2)
+    print(f"\nresultado gravado em {args.salvar}")
+    shutil.rmtree(DIR_TEMP, ignore_errors=True)
+
+    sys.exit(1 if args.comparar and comparar(resultados, args.comparar, args.tolerancia) else 0)
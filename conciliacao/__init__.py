@@ -0,0 +1,18 @@
+from .limpeza import (
+    gerar_chave_padronizada, limpar_valor_monetario, formatar_moeda_br,
+    gerar_chaves_padronizadas, limpar_valores_monetarios, formatar_moedas_br,
+)
+from .extrato_pdf import extrair_pdf_melhorado, extrair_pdf_medindo, extrair_lote, ler_bytes
+from .depara import carregar_depara, aplicar_depara
+from .bancos import identificar_bancos
+from .contabil import processar_contabil
+from .processo import executar_processo, impressao_entradas, mascara_divergencias
+from .pacote_zip import extratos_do_zip, classificar_extrato
+from .recepcao import receber, pendentes, situacao_recepcao, resultados_recebidos
+from .resultados import resultado_compartilhado, resultado_guardado, situacao_resultados
+from .historico import registrar_execucao, execucoes_registradas, historico_conta, divergencias_consecutivas
+from .relatorios import (
+    tabela_relatorio, impressao_digital, preparar_relatorio, relatorio_sob_demanda,
+    medicoes_relatorios, to_excel_styled, to_pdf,
+)
+from .medicao import medir, perfilar, tabela_medicoes, medicoes_json, medicoes_csv
@@ -0,0 +1,54 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# IDENTIFICAÇÃO DO BANCO DE CADA CONTA
+# ==========================================
+# Ordem de prioridade: nome vindo do PDF; palavras-chave de todos os bancos
+# (na ordem da tabela); códigos bancários de todos os bancos (idem).
+# Para incluir um banco basta acrescentar uma linha.
+REGRAS_BANCOS = [
+    # (nome no relatório, palavras-chave, códigos bancários)
+    ("BANCO DO BRASIL", ('BRASIL', 'BB ', 'BCO DO BRASIL'), ('001',)),
+    ("CAIXA ECONÔMICA", ('CAIXA', 'CEF', 'FEDERAL', 'ECONÔMICA'), ('104',)),
+]
+
+# Valores de Nome_Banco que significam "sem banco do PDF" (o merge preenche com 0)
+NOMES_VAZIOS = {'0', '0.0', 'nan', 'None'}
+
+def _compilar(termos):
+    return re.compile('|'.join(re.escape(t) for t in termos))
+
+# Um padrão por banco e por etapa, já na ordem em que são testados
+_PADROES = (
+    [(_compilar(palavras), nome) for nome, palavras, _ in REGRAS_BANCOS] +
+    [(_compilar(codigos), nome) for nome, _, codigos in REGRAS_BANCOS]
+)
+
+def _distintos(serie):
+    """(códigos, valores distintos); cada ausente vira um valor próprio (None != NaN em str())."""
+    valores = serie.astype(object).to_numpy()
+    codigos, distintos = pd.factorize(valores)
+    ausentes = np.flatnonzero(codigos == -1)
+    codigos[ausentes] = len(distintos) + np.arange(len(ausentes))
+    return codigos, list(distintos) + list(valores[ausentes])
+
+def identificar_bancos(df):
+    """Banco / descrição de cada linha do df_final (colunas Nome_Banco e Descrição_ERP)."""
+    nomes_pdf = df['Nome_Banco'] if 'Nome_Banco' in df.columns else pd.Series(None, index=df.index, dtype=object)
+    descricoes = df['Descrição_ERP'] if 'Descrição_ERP' in df.columns else pd.Series('', index=df.index, dtype=object)
+
+    # As regras rodam só sobre os valores distintos e depois são expandidas
+    cod_nome, nomes = _distintos(nomes_pdf)
+    tem_nome = np.array([pd.notna(v) and str(v) not in NOMES_VAZIOS for v in nomes], dtype=bool)
+    nomes = np.array([str(v).upper() for v in nomes], dtype=object)
+
+    cod_desc, textos = _distintos(descricoes)
+    textos = pd.Series([str(v).upper() for v in textos], dtype=object)
+    condicoes = [textos.str.contains(padrao, regex=True).to_numpy(dtype=bool) for padrao, _ in _PADROES]
+    bancos = np.select(condicoes, [nome for _, nome in _PADROES], default=textos.to_numpy())
+
+    resultado = np.where(tem_nome[cod_nome], nomes[cod_nome], bancos[cod_desc])
+    return pd.Series(resultado, index=df.index, dtype=object)
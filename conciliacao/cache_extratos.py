@@ -0,0 +1,67 @@
+import hashlib
+import json
+import os
+import tempfile
+
+# Diretório e tamanho máximo (MB) do cache de extratos já lidos
+DIR_CACHE = os.environ.get(
+    "CONCILIACAO_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "conciliacao", "extratos"),
+)
+LIMITE_CACHE_MB = float(os.environ.get("CONCILIACAO_CACHE_MB", "200"))
+
+
+# ==========================================
+# CACHE EM DISCO DOS EXTRATOS LIDOS
+# ==========================================
+def chave_cache(conteudo, tipo_extrato, versao):
+    """SHA-256 do PDF + tipo de extrato + versão do parser."""
+    return f"{hashlib.sha256(conteudo).hexdigest()}_{tipo_extrato}_v{versao}"
+
+def _caminho(chave, diretorio):
+    return os.path.join(diretorio, chave[:2], f"{chave}.json")
+
+def obter_cache(chave, diretorio=DIR_CACHE):
+    """Devolve o resultado guardado ou None. Um acerto renova a data de uso (LRU)."""
+    caminho = _caminho(chave, diretorio)
+    try:
+        with open(caminho, encoding='utf-8') as fh:
+            resultado = json.load(fh)
+        os.utime(caminho)
+        return resultado
+    except (OSError, ValueError):
+        return None
+
+def gravar_cache(chave, resultado, diretorio=DIR_CACHE):
+    caminho = _caminho(chave, diretorio)
+    try:
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        # Escrita atômica: outra sessão nunca lê um JSON pela metade
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(caminho), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as fh:
+            json.dump(resultado, fh, ensure_ascii=False)
+        os.replace(temporario, caminho)
+    except OSError:
+        pass
+
+def podar_cache(diretorio=DIR_CACHE, limite_mb=LIMITE_CACHE_MB):
+    """Remove as entradas usadas há mais tempo até o cache caber em `limite_mb`."""
+    entradas = []
+    for raiz, _, arquivos in os.walk(diretorio):
+        for nome in arquivos:
+            caminho = os.path.join(raiz, nome)
+            try:
+                info = os.stat(caminho)
+            except OSError:
+                continue
+            entradas.append((info.st_mtime, info.st_size, caminho))
+
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    limite = limite_mb * 1024 * 1024
+    for _, tamanho, caminho in sorted(entradas):
+        if total <= limite: break
+        try:
+            os.remove(caminho)
+            total -= tamanho
+        except OSError:
+            pass
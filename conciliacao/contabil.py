@@ -0,0 +1,116 @@
+import io
+import os
+
+import pandas as pd
+
+from .limpeza import gerar_chaves_padronizadas, limpar_valores_monetarios
+
+# ==========================================
+# LEITURA CONTÁBIL (CSV Flexvision)
+# ==========================================
+# Tamanho da amostra usada para achar o cabeçalho e de cada bloco de leitura do CSV
+TAMANHO_AMOSTRA_CSV = 64 * 1024
+LINHAS_POR_BLOCO_CSV = 200_000
+
+POSSIVEIS_CHAVES = ['Domicílio bancário', 'Conta', 'Nº Conta', 'Descrição', 'Conta Contabil']
+POSSIVEIS_VALORES = ['Saldo Final', 'Saldo Atual', 'Movimento', 'Valor']
+
+def _coluna_chave(colunas):
+    col_chave = None
+    for col in colunas:
+        for p in POSSIVEIS_CHAVES:
+            if p.lower() in str(col).lower(): col_chave = col; break
+    return col_chave
+
+def _detectar_layout(amostra):
+    """Linha de cabeçalho e colunas do CSV, a partir dos primeiros KB do arquivo."""
+    for header in (1, 0):
+        try:
+            colunas = list(pd.read_csv(io.BytesIO(amostra), encoding='latin-1', sep=';', header=header, dtype=str, nrows=0).columns)
+        except Exception:
+            continue
+        col_chave = _coluna_chave(colunas)
+        if col_chave: return header, colunas, col_chave
+    return None, [], None
+
+def processar_contabil(arquivo, tipo='SALDO'):
+    if arquivo is None: return pd.DataFrame()
+    try:
+        if isinstance(arquivo, (str, os.PathLike)):
+            with open(arquivo, 'rb') as fh: return processar_contabil(fh, tipo)
+
+        arquivo.seek(0)
+        amostra = arquivo.read(TAMANHO_AMOSTRA_CSV)
+        arquivo.seek(0)
+        header, colunas, col_chave = _detectar_layout(amostra)
+        if not col_chave: return pd.DataFrame()
+
+        col_valor = None
+        for col in colunas:
+            if 'anterior' in str(col).lower(): continue
+            for p in POSSIVEIS_VALORES:
+                if p.lower() in str(col).lower(): col_valor = col; break
+        if not col_valor: return pd.DataFrame()
+
+        col_desc_original = col_chave 
+        for col in colunas:
+            if ('descri' in str(col).lower() or 'nome' in str(col).lower()) and col != col_chave:
+                col_desc_original = col
+                break
+        col_contabil = next((c for c in colunas if 'contábil' in str(c).lower()), None) if tipo == 'SALDO' else None
+
+        # Só as colunas usadas são lidas, em blocos; as somas são acumuladas bloco a bloco
+        usadas = {col_chave, col_valor, col_desc_original} | ({col_contabil} if col_contabil else set())
+        indices = sorted(i for i, c in enumerate(colunas) if c in usadas)
+        somas = None
+        descricoes = None
+        blocos = pd.read_csv(arquivo, encoding='latin-1', sep=';', header=header, dtype=str,
+                             usecols=indices, chunksize=LINHAS_POR_BLOCO_CSV)
+        for bloco in blocos:
+            bloco.columns = [colunas[i] for i in indices]
+            bloco['Chave Primaria'] = gerar_chaves_padronizadas(bloco[col_chave])
+            bloco = bloco.dropna(subset=['Chave Primaria'])
+            bloco['Valor_Numerico'] = limpar_valores_monetarios(bloco[col_valor].astype(str))
+
+            grupos = ['Chave Primaria', col_contabil] if col_contabil else ['Chave Primaria']
+            parcial = bloco.groupby(grupos)['Valor_Numerico'].sum()
+            somas = parcial if somas is None else pd.concat([somas, parcial]).groupby(level=list(range(len(grupos)))).sum()
+
+            if tipo == 'SALDO':
+                desc = bloco[['Chave Primaria', col_desc_original]].drop_duplicates(subset='Chave Primaria')
+                descricoes = desc if descricoes is None else pd.concat([descricoes, desc]).drop_duplicates(subset='Chave Primaria')
+
+        if somas is None:
+            somas = pd.Series(dtype=float, index=pd.Index([], name='Chave Primaria'), name='Valor_Numerico')
+            descricoes = pd.DataFrame(columns=['Chave Primaria', col_desc_original])
+
+        if tipo == 'SALDO':
+            if col_contabil:
+                df_pivot = somas.unstack(col_contabil).reset_index()
+                
+                col_mov = next((c for c in df_pivot.columns if '1111119' in str(c) or 'Conta Movimento' in str(c) or 'MOVIMENTO' in str(c).upper()), None)
+                col_app = next((c for c in df_pivot.columns if '1111150' in str(c) or 'Aplicação' in str(c) or 'APLICACAO' in str(c).upper()), None)
+                
+                df_res = pd.DataFrame()
+                df_res['Chave Primaria'] = df_pivot['Chave Primaria']
+                df_res['Saldo_Contabil_CC'] = df_pivot[col_mov].fillna(0) if col_mov else 0.0
+                df_res['Saldo_Contabil_Aplic'] = df_pivot[col_app].fillna(0) if col_app else 0.0
+                
+                df_res = df_res.merge(descricoes, on='Chave Primaria', how='left')
+                df_res.rename(columns={col_desc_original: 'Descrição_ERP'}, inplace=True)
+                return df_res
+            else:
+                df_agrup = somas.reset_index()
+                df_agrup.rename(columns={'Valor_Numerico': 'Saldo_Contabil_CC'}, inplace=True)
+                df_agrup['Saldo_Contabil_Aplic'] = 0.0
+                
+                df_agrup = df_agrup.merge(descricoes, on='Chave Primaria', how='left')
+                df_agrup.rename(columns={col_desc_original: 'Descrição_ERP'}, inplace=True)
+                return df_agrup
+
+        elif tipo == 'RENDIMENTO':
+            df_agrup = somas.reset_index()
+            df_agrup.rename(columns={'Valor_Numerico': 'Rendimento_Contabil'}, inplace=True)
+            return df_agrup
+    except Exception as e:
+        return pd.DataFrame()
@@ -0,0 +1,122 @@
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from .limpeza import gerar_chaves_padronizadas
+
+DIR_PROJETO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CAMINHO_DEPARA = os.path.join(DIR_PROJETO, "depara", "DEPARA_CONTAS BANCÁRIAS_CEF.xlsx")
+ABA_DEPARA = "2025_JUNHO (2)"
+
+# Artefato compilado (arrays NumPy ordenados) com a tabela de chaves da planilha
+CAMINHO_DEPARA_COMPILADO = os.environ.get(
+    "CONCILIACAO_DEPARA_CACHE",
+    os.path.join(os.path.expanduser("~"), ".cache", "conciliacao", "depara.npz"),
+)
+
+# Formato do artefato: incrementar quando a compilação mudar de resultado, para recompilar
+VERSAO_COMPILADO = 2
+
+# Tabela já carregada neste processo, por planilha: (assinatura, df_depara)
+_carregadas = {}
+
+
+# ==========================================
+# DE-PARA DE CONTAS
+# ==========================================
+def carregar_depara(caminho=CAMINHO_DEPARA, compilado=CAMINHO_DEPARA_COMPILADO):
+    """Tabela DE-PARA com as colunas 'Chave Antiga' (única e ordenada) e 'Chave Nova'.
+
+    A planilha só é aberta com openpyxl quando muda; nas demais execuções a
+    tabela vem da memória do processo ou do artefato compilado em disco.
+    """
+    try:
+        info = os.stat(caminho)
+    except OSError:
+        return pd.DataFrame()
+    assinatura = (info.st_mtime_ns, info.st_size)
+
+    if caminho in _carregadas and _carregadas[caminho][0] == assinatura:
+        return _carregadas[caminho][1]
+
+    df_depara = _ler_compilado(caminho, compilado, assinatura)
+    if df_depara is None:
+        df_depara = _compilar(caminho, compilado, assinatura)
+    _carregadas[caminho] = (assinatura, df_depara)
+    return df_depara
+
+def aplicar_depara(serie, df_depara):
+    """Troca as chaves antigas pelas novas (equivale a Series.replace(dict), sem o dict)."""
+    if df_depara.empty or serie.empty: return serie
+    antigas = df_depara['Chave Antiga'].to_numpy(dtype=str)
+    novas = df_depara['Chave Nova'].to_numpy(dtype=object)
+
+    valores = serie.to_numpy(dtype=object)
+    presente = ~pd.isna(valores)
+    chaves = np.where(presente, valores, "").astype(str)
+    posicao = np.searchsorted(antigas, chaves).clip(max=len(antigas) - 1)
+    encontrada = presente & (antigas[posicao] == chaves)
+
+    resultado = valores.copy()
+    resultado[encontrada] = novas[posicao[encontrada]]
+    return pd.Series(resultado, index=serie.index, name=serie.name, dtype=serie.dtype)
+
+def _hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as fh:
+        for bloco in iter(lambda: fh.read(1024 * 1024), b''): sha.update(bloco)
+    return sha.hexdigest()
+
+def _montar_tabela(antigas, novas):
+    # Chave Nova vazia no artefato representa "sem chave" (None), como no replace original
+    return pd.DataFrame({'Chave Antiga': pd.Series(antigas, dtype=object),
+                         'Chave Nova': pd.Series(np.where(novas == "", None, novas.astype(object)), dtype=object)})
+
+def _ler_compilado(caminho, compilado, assinatura):
+    try:
+        with np.load(compilado, allow_pickle=False) as dados:
+            origem, hash_origem = str(dados['origem']), str(dados['hash'])
+            antigas, novas = dados['antigas'], dados['novas']
+            assinatura_salva = tuple(int(x) for x in dados['assinatura'])
+            versao = int(dados['versao']) if 'versao' in dados else 1
+    except (OSError, KeyError, ValueError):
+        return None
+    if origem != os.path.abspath(caminho) or versao != VERSAO_COMPILADO: return None
+
+    if assinatura_salva != assinatura:
+        # Data alterada sem mudança de conteúdo (cópia, checkout): basta atualizar a assinatura
+        if _hash_arquivo(caminho) != hash_origem: return None
+        _salvar(compilado, caminho, assinatura, hash_origem, antigas, novas)
+    return _montar_tabela(antigas, novas)
+
+def _compilar(caminho, compilado, assinatura):
+    try:
+        df_depara = pd.read_excel(caminho, sheet_name=ABA_DEPARA, dtype=str, engine='openpyxl')
+    except Exception:
+        return pd.DataFrame()
+    df_depara.columns = ['Conta Antiga', 'Conta Nova']
+
+    # Mesmo critério do dict(zip(...)) usado antes: em chave antiga repetida, vale a última linha
+    mapa = {antiga: nova for antiga, nova in zip(gerar_chaves_padronizadas(df_depara['Conta Antiga']),
+                                                 gerar_chaves_padronizadas(df_depara['Conta Nova']))
+            if not pd.isna(antiga)}
+    antigas = np.array(sorted(mapa), dtype=str)
+    # Conta Nova em branco (None ou NaN) vira "", e não o texto "nan"
+    novas = np.array(["" if pd.isna(mapa[k]) else mapa[k] for k in antigas], dtype=str)
+
+    _salvar(compilado, caminho, assinatura, _hash_arquivo(caminho), antigas, novas)
+    return _montar_tabela(antigas, novas)
+
+def _salvar(compilado, caminho, assinatura, hash_origem, antigas, novas):
+    try:
+        os.makedirs(os.path.dirname(compilado), exist_ok=True)
+        fd, temporario = tempfile.mkstemp(dir=os.path.dirname(compilado), suffix='.npz')
+        with os.fdopen(fd, 'wb') as fh:
+            np.savez(fh, versao=VERSAO_COMPILADO, origem=os.path.abspath(caminho), hash=hash_origem,
+                     assinatura=np.array(assinatura, dtype=np.int64), antigas=antigas, novas=novas)
+        os.replace(temporario, compilado)
+    except OSError:
+        pass
@@ -0,0 +1,360 @@
+import multiprocessing
+import os
+import re
+import threading
+import time
+
+import fitz  # PyMuPDF
+
+from .cache_extratos import LIMITE_CACHE_MB, chave_cache, obter_cache, gravar_cache, podar_cache
+from .limpeza import limpar_valor_monetario
+from .medicao import medir
+
+# Versão do parser: incrementar sempre que a leitura mudar de resultado, para invalidar o cache
+VERSAO_PARSER = 5
+
+# Páginas iniciais em que a conta é procurada no cabeçalho
+PAGINAS_CABECALHO = 3
+
+# Quantidade de processos de leitura (0 = um por núcleo) e tempo máximo por arquivo, em segundos
+WORKERS_PDF = int(os.environ.get("CONCILIACAO_WORKERS_PDF", "0")) or os.cpu_count() or 1
+TIMEOUT_PDF = float(os.environ.get("CONCILIACAO_TIMEOUT_PDF", "120"))
+
+
+# ==========================================
+# GATILHOS E PADRÕES (compilados uma única vez)
+# ==========================================
+GATILHOS_SALDO = ["SALDO FINAL", "SALDO TOTAL", "SALDO ATUAL", "SALDO EM", "SALDO LÍQUIDO", "SALDO BRUTO", "VALOR LIQUIDO", "TOTAL DISPONIVEL", "POSICAO EM", "TOTAL EM COTAS", "S A L D O"]
+IGNORAR_SALDO = ["ANTERIOR", "BLOQUEADO", "PROVISORIO", "RENDIMENTO", "RENTABILIDADE"]
+GATILHOS_RENDIMENTO = ["RENDIMENTO BRUTO", "RENTABILIDADE", "RENDIMENTO NO MÊS", "RENDIMENTO LIQUIDO", "RENTAB."]
+IGNORAR_RENDIMENTO = ["ACUMULADO", "ANO"]
+
+# Categorias devolvidas por classificar_linha (bitmask)
+SALDO, IGNORA_SALDO, RENDIMENTO, IGNORA_RENDIMENTO = 1, 2, 4, 8
+
+RE_VALOR = re.compile(r"(\d{1,3}(?:\.\d{3})*,\d{2}|\d{1,3}(?:,\d{3})*\.\d{2})")
+RE_CONTA_SOLTA = re.compile(r"(\d{4,6}-\d)")
+RE_SALDO_SEM_MOVIMENTO = re.compile(r"(?:SALDO ANTERIOR|SALDO).*?(\d{1,3}(?:\.\d{3})*,\d{2})", re.IGNORECASE | re.DOTALL)
+RE_SALDO_INV_FALLBACK = re.compile(r"(?:TOTAL|SALDO|ATUAL|LÍQUIDO).*?(\d{1,3}(?:\.\d{3})*,\d{2})", re.IGNORECASE)
+PADROES_CONTA = [re.compile(p, re.IGNORECASE) for p in [
+    r"Conta:\s*(\d{4}\/\d{3,4}\/[\d\-]+)",
+    r"Conta\s*Vinculada:\s*(\d{4}\/\d{3,4}\/[\d\-]+)",
+    r"Conta\s*Corrente\s*[:\s]*([\d\.\-\/]+)",
+    r"Conta\s*[:\s]*([\d\.\-\/]+)",
+    r"Agência.*?Conta.*?([\d\.\-]{5,})",
+    r"C\/C\s*[:\s]*([\d\.\-\/]+)"
+]]
+
+def _montar_gatilhos():
+    """Uma alternância com todos os gatilhos, do mais longo ao mais curto.
+
+    Cada gatilho encontrado vale também pelos gatilhos que são seu prefixo
+    ("RENDIMENTO BRUTO" também é "RENDIMENTO"), já que só o mais longo
+    casa em cada posição.
+    """
+    categorias = {}
+    for categoria, gatilhos in [(SALDO, GATILHOS_SALDO), (IGNORA_SALDO, IGNORAR_SALDO),
+                                (RENDIMENTO, GATILHOS_RENDIMENTO), (IGNORA_RENDIMENTO, IGNORAR_RENDIMENTO)]:
+        for g in gatilhos: categorias[g] = categorias.get(g, 0) | categoria
+
+    literais = sorted(categorias, key=len, reverse=True)
+    por_literal = {g: 0 for g in literais}
+    for g in literais:
+        for prefixo in literais:
+            if g.startswith(prefixo): por_literal[g] |= categorias[prefixo]
+    return re.compile("|".join(re.escape(g) for g in literais)), por_literal
+
+RE_GATILHOS, CATEGORIAS_GATILHO = _montar_gatilhos()
+
+def classificar_linha(linha_upper):
+    """Categorias de todos os gatilhos presentes na linha, numa única varredura."""
+    categorias = 0
+    match = RE_GATILHOS.search(linha_upper)
+    while match:
+        categorias |= CATEGORIAS_GATILHO[match.group(0)]
+        # Recomeça na posição seguinte para não perder gatilhos sobrepostos
+        match = RE_GATILHOS.search(linha_upper, match.start() + 1)
+    return categorias
+
+
+# ==========================================
+# MOTOR DE LEITURA DE PDF
+# ==========================================
+def extrair_pdf_melhorado(arquivo, tipo_extrato):
+    """Lê conta, saldo final e rendimento de um extrato, página a página.
+
+    O texto nunca é montado inteiro: o cabeçalho (conta) vem das primeiras
+    páginas e o saldo da última linha de saldo do documento. Em conta
+    corrente as páginas são lidas de trás para frente e a leitura para no
+    primeiro saldo encontrado; em investimentos os rendimentos somam todas
+    as linhas, então o documento é percorrido inteiro, sem acumular texto.
+    """
+    try:
+        conteudo = arquivo if isinstance(arquivo, (bytes, bytearray)) else arquivo.read()
+        inicio = time.perf_counter()
+        with fitz.open(stream=conteudo, filetype="pdf") as doc:
+            _anotar('Abrir (s)', time.perf_counter() - inicio)
+            _anotar('Páginas', doc.page_count)
+            return _extrair_documento(doc, tipo_extrato)
+    except Exception as e:
+        return resultado_erro(str(e))
+
+def extrair_pdf_medindo(arquivo, tipo_extrato):
+    """(resultado, medição): extrair_pdf_melhorado com o tempo de cada fase e as páginas/linhas lidas."""
+    with medir(None, 'PDF', origem='leitura') as linha:
+        linha.update({'Abrir (s)': 0.0, 'Texto (s)': 0.0, 'Páginas': 0, 'Páginas Lidas': 0, 'Linhas': 0})
+        _medicao.linha = linha
+        try:
+            res = extrair_pdf_melhorado(arquivo, tipo_extrato)
+        finally:
+            _medicao.linha = None
+    linha['Varredura (s)'] = max(0.0, linha['Tempo (s)'] - linha['Abrir (s)'] - linha['Texto (s)'])
+    return res, linha
+
+# Medição da extração em andamento nesta thread (None = sem medição)
+_medicao = threading.local()
+
+def _anotar(campo, valor):
+    linha = getattr(_medicao, 'linha', None)
+    if linha is not None: linha[campo] = linha.get(campo, 0) + valor
+
+def _extrair_documento(doc, tipo_extrato):
+    total_paginas = doc.page_count
+
+    # 1. Cabeçalho: conta da primeira página (ou das seguintes, até PAGINAS_CABECALHO)
+    lidas = []
+    conta_encontrada = "N/A"
+    while len(lidas) < min(PAGINAS_CABECALHO, total_paginas):
+        lidas.append(_texto_pagina(doc, len(lidas)))
+        conta_encontrada = _procurar_conta("".join(lidas))
+        if conta_encontrada != "N/A": break
+    cabecalho = "".join(lidas)
+
+    if conta_encontrada == "N/A":
+        match_solto = RE_CONTA_SOLTA.search("\n".join(cabecalho.split('\n')[:25]))
+        if match_solto: conta_encontrada = match_solto.group(1)
+
+    # 2. Saldo e rendimento
+    if tipo_extrato == 'INV':
+        saldo_final, rendimento_total, sem_movimento = _varrer_do_inicio(doc, lidas, tipo_extrato)
+    else:
+        saldo_final, sem_movimento = _varrer_do_fim(doc, lidas, tipo_extrato)
+        rendimento_total = 0.0
+
+    # 3. Fallbacks, lidos em janelas de páginas só quando necessários
+    if saldo_final == 0.0 and sem_movimento:
+        valor = _saldo_sem_movimento(doc, lidas)
+        if valor: saldo_final = limpar_valor_monetario(valor)
+
+    if saldo_final == 0.0 and tipo_extrato == 'INV':
+        valor = _ultimo_total(doc, lidas)
+        if valor: saldo_final = limpar_valor_monetario(valor)
+
+    while len(cabecalho) < 300 and len(lidas) < total_paginas:
+        lidas.append(_texto_pagina(doc, len(lidas)))
+        cabecalho = "".join(lidas)
+    texto_limpo = cabecalho[:300].replace('\n', ' ').replace(';', ',')
+    return {"Conta": conta_encontrada, "Saldo": saldo_final, "Rendimento": rendimento_total, "Texto_Raw": texto_limpo}
+
+def _texto_pagina(doc, indice):
+    if getattr(_medicao, 'linha', None) is None: return doc[indice].get_text() + "\n"
+    inicio = time.perf_counter()
+    texto = doc[indice].get_text() + "\n"
+    _anotar('Texto (s)', time.perf_counter() - inicio)
+    _anotar('Páginas Lidas', 1)
+    return texto
+
+def _paginas(doc, indices, lidas):
+    """Texto das páginas pedidas, reaproveitando as que já foram lidas."""
+    for indice in indices:
+        yield lidas[indice] if indice < len(lidas) else _texto_pagina(doc, indice)
+
+def _linhas(trecho):
+    # Cada trecho termina em quebra de linha: o último pedaço do split é vazio
+    linhas = trecho.split('\n')[:-1]
+    _anotar('Linhas', len(linhas))
+    return linhas
+
+def _tem_sem_movimento(trecho):
+    trecho_upper = trecho.upper()
+    return "NAO HOUVE MOVIMENTO" in trecho_upper or "SEM MOVIMENTO" in trecho_upper
+
+def _procurar_conta(texto):
+    for padrao in PADROES_CONTA:
+        match = padrao.search(texto)
+        if match:
+            conta_raw = match.group(1).strip()
+            if len(re.sub(r'\D', '', conta_raw)) > 4:
+                return conta_raw
+    return "N/A"
+
+def _avaliar_linha(linha, proxima, tipo_extrato):
+    """(saldo, rendimento) indicados pela linha; saldo é None quando a linha não traz saldo."""
+    linha_upper = linha.upper().strip()
+    categorias = classificar_linha(linha_upper)
+    if not categorias: return None, 0.0
+
+    saldo = None
+    if categorias & SALDO and not categorias & IGNORA_SALDO:
+        match_val = RE_VALOR.search(linha_upper)
+        if match_val:
+            sinal = "-" if " D" in linha_upper or "DEB" in linha_upper or "-" in linha_upper else ""
+            v = limpar_valor_monetario(f"{sinal}{match_val.group(0)}")
+            if v != 0: saldo = v
+        else:
+            match_prox = RE_VALOR.search(proxima)
+            if match_prox:
+                v = limpar_valor_monetario(match_prox.group(0))
+                if v != 0: saldo = v
+
+    rendimento = 0.0
+    if tipo_extrato == 'INV' and categorias & RENDIMENTO and not categorias & IGNORA_RENDIMENTO:
+        valor_capturado = 0.0
+        match_val = RE_VALOR.search(linha)
+        if match_val: valor_capturado = limpar_valor_monetario(match_val.group(0))
+        else:
+            match_prox = RE_VALOR.search(proxima)
+            if match_prox: valor_capturado = limpar_valor_monetario(match_prox.group(0))
+        
+        if valor_capturado != 0 and valor_capturado < 50000000:
+             rendimento = valor_capturado
+    return saldo, rendimento
+
+def _varrer_do_inicio(doc, lidas, tipo_extrato):
+    """Percorre todas as linhas em ordem: o último saldo vale e os rendimentos somam."""
+    saldo_final = 0.0
+    rendimento_total = 0.0
+    sem_movimento = False
+    anterior = None
+    for trecho in _paginas(doc, range(doc.page_count), lidas):
+        sem_movimento = sem_movimento or _tem_sem_movimento(trecho)
+        for linha in _linhas(trecho):
+            if anterior is not None:
+                saldo, rendimento = _avaliar_linha(anterior, linha, tipo_extrato)
+                if saldo is not None: saldo_final = saldo
+                rendimento_total += rendimento
+            anterior = linha
+    if anterior is not None:
+        saldo, rendimento = _avaliar_linha(anterior, "", tipo_extrato)
+        if saldo is not None: saldo_final = saldo
+        rendimento_total += rendimento
+    return saldo_final, rendimento_total, sem_movimento
+
+def _varrer_do_fim(doc, lidas, tipo_extrato):
+    """Procura o saldo da última para a primeira página e para no primeiro encontrado."""
+    sem_movimento = False
+    primeira_da_seguinte = ""
+    for trecho in _paginas(doc, reversed(range(doc.page_count)), lidas):
+        sem_movimento = sem_movimento or _tem_sem_movimento(trecho)
+        linhas = _linhas(trecho)
+        for i in range(len(linhas) - 1, -1, -1):
+            proxima = linhas[i+1] if i + 1 < len(linhas) else primeira_da_seguinte
+            saldo, _ = _avaliar_linha(linhas[i], proxima, tipo_extrato)
+            if saldo is not None: return saldo, sem_movimento
+        primeira_da_seguinte = linhas[0]
+    return 0.0, sem_movimento
+
+def _saldo_sem_movimento(doc, lidas):
+    """Primeiro valor após a primeira menção a SALDO, lendo do início só o necessário."""
+    janela = []
+    for trecho in _paginas(doc, range(doc.page_count), lidas):
+        # Páginas antes da primeira menção a SALDO não podem fazer parte do resultado
+        if not janela and "SALDO" not in trecho.upper(): continue
+        janela.append(trecho)
+        match_ant = RE_SALDO_SEM_MOVIMENTO.search("".join(janela))
+        if match_ant: return match_ant.group(1)
+    return None
+
+def _ultimo_total(doc, lidas):
+    """Último TOTAL/SALDO com valor do documento, procurado da última página para trás."""
+    # O padrão não atravessa quebras de linha, então cada página pode ser lida sozinha
+    for trecho in _paginas(doc, reversed(range(doc.page_count)), lidas):
+        match_last = RE_SALDO_INV_FALLBACK.findall(trecho)
+        if match_last: return match_last[-1]
+    return None
+
+def chave_extrato(conteudo, tipo_extrato):
+    """Chave do cache de um extrato: conteúdo, tipo e versão do parser."""
+    return chave_cache(conteudo, tipo_extrato, VERSAO_PARSER)
+
+def resultado_erro(mensagem):
+    return {"Conta": "Erro", "Saldo": 0.0, "Rendimento": 0.0, "Texto_Raw": mensagem}
+
+def ler_bytes(arquivo):
+    """Obtém o conteúdo completo de um upload, arquivo aberto ou caminho, sem depender da posição de leitura.
+
+    A posição de um arquivo aberto volta a ser a de antes, para quem for lê-lo depois.
+    """
+    if isinstance(arquivo, (bytes, bytearray)): return bytes(arquivo)
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as fh: return fh.read()
+    if hasattr(arquivo, 'getvalue'): return arquivo.getvalue()
+    posicao = arquivo.tell()
+    try:
+        arquivo.seek(0)
+        return arquivo.read()
+    finally:
+        arquivo.seek(posicao)
+
+# ==========================================
+# LEITURA EM LOTE (POOL DE PROCESSOS)
+# ==========================================
+def extrair_lote(itens, num_workers=None, timeout=TIMEOUT_PDF, usar_cache=LIMITE_CACHE_MB > 0, medicoes=None):
+    """Extrai vários PDFs em paralelo, reaproveitando o cache em disco.
+
+    `itens` é uma lista de tuplas (conteudo_bytes, tipo_extrato). O retorno segue a mesma
+    ordem da entrada; um arquivo que falhe ou passe de `timeout` segundos vira um
+    resultado de erro sem interromper os demais (timeout=None lê no próprio
+    processo, sem limite). Com `medicoes` (lista), recebe
+    uma linha de medição por arquivo, também na ordem da entrada.
+    """
+    if not itens: return []
+    resultados = [None] * len(itens)
+    chaves = [None] * len(itens)
+    linhas = [None] * len(itens)
+    if usar_cache:
+        for i, (conteudo, tipo) in enumerate(itens):
+            inicio = time.perf_counter()
+            chaves[i] = chave_extrato(conteudo, tipo)
+            resultados[i] = obter_cache(chaves[i])
+            if resultados[i] is not None:
+                linhas[i] = {'Etapa': 'PDF', 'Origem': 'cache', 'Tempo (s)': time.perf_counter() - inicio}
+
+    faltantes = [i for i, res in enumerate(resultados) if res is None]
+    lidos = _extrair_em_paralelo([itens[i] for i in faltantes], num_workers, timeout, medicoes is not None)
+    for i, lido in zip(faltantes, lidos):
+        res, linhas[i] = lido if medicoes is not None else (lido, None)
+        resultados[i] = res
+        # Erros (timeout, arquivo corrompido) não vão para o cache: um novo envio tenta de novo
+        if usar_cache and res['Conta'] != "Erro": gravar_cache(chaves[i], res)
+
+    if usar_cache and faltantes: podar_cache()
+    if medicoes is not None: medicoes.extend(linhas)
+    return resultados
+
+def _extrair_em_paralelo(itens, num_workers, timeout, medindo=False):
+    if not itens: return []
+    funcao = extrair_pdf_medindo if medindo else extrair_pdf_melhorado
+    falha = (lambda msg: (resultado_erro(msg), {'Etapa': 'PDF', 'Origem': 'erro'})) if medindo else resultado_erro
+    num_workers = min(num_workers or WORKERS_PDF, len(itens))
+    # Mesmo com um arquivo só (ou um núcleo só) a leitura vai para outro processo:
+    # só assim um PDF travado pode ser interrompido. Sem tempo limite, lê aqui mesmo.
+    if timeout is None:
+        return [funcao(conteudo, tipo) for conteudo, tipo in itens]
+
+    pool = multiprocessing.get_context().Pool(processes=num_workers)
+    try:
+        pendentes = [pool.apply_async(funcao, (conteudo, tipo)) for conteudo, tipo in itens]
+        resultados = []
+        for pendente in pendentes:
+            try:
+                resultados.append(pendente.get(timeout=timeout))
+            except multiprocessing.TimeoutError:
+                resultados.append(falha(f"Tempo limite de leitura excedido ({timeout:.0f}s)"))
+            except Exception as e:
+                resultados.append(falha(str(e)))
+        return resultados
+    finally:
+        # terminate() também derruba workers presos em um PDF problemático
+        pool.terminate()
+        pool.join()
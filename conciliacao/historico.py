@@ -0,0 +1,130 @@
+import os
+import re
+import sqlite3
+import time
+from contextlib import closing
+
+import pandas as pd
+
+from .processo import DIFERENCAS, TOLERANCIA_DIVERGENCIA, VALORES_BANCO, VALORES_CONTABIL
+
+# Arquivo SQLite com o histórico de todas as execuções (uma por unidade e competência)
+CAMINHO_HISTORICO = os.environ.get(
+    "CONCILIACAO_HISTORICO",
+    os.path.join(os.path.expanduser("~"), ".local", "share", "conciliacao", "historico.sqlite"),
+)
+
+COLUNAS_VALOR = VALORES_CONTABIL + VALORES_BANCO + DIFERENCAS
+RE_COMPETENCIA = re.compile(r"^(\d{4})-(0[1-9]|1[0-2])$")
+
+# Contas indexadas por (unidade, competência, conta), por (conta, competência) e,
+# só as divergentes, por mês: o histórico de uma conta e as divergências de uma
+# faixa de meses saem direto dos índices, sem varrer a tabela
+ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS execucoes (
+    unidade TEXT NOT NULL, competencia TEXT NOT NULL, registrado_em TEXT NOT NULL,
+    contas INTEGER NOT NULL, divergencias INTEGER NOT NULL,
+    PRIMARY KEY (unidade, competencia)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contas (
+    unidade TEXT NOT NULL, competencia TEXT NOT NULL, mes INTEGER NOT NULL, chave TEXT NOT NULL,
+    descricao TEXT, {", ".join(f"{c} REAL NOT NULL" for c in COLUNAS_VALOR)}, divergente INTEGER NOT NULL,
+    PRIMARY KEY (unidade, competencia, chave)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS contas_por_chave ON contas (chave, competencia);
+CREATE INDEX IF NOT EXISTS contas_divergentes ON contas (mes, unidade, chave) WHERE divergente = 1;
+CREATE TABLE IF NOT EXISTS leituras (
+    unidade TEXT NOT NULL, competencia TEXT NOT NULL, arquivo TEXT, banco TEXT, conta_lida TEXT,
+    chave TEXT, saldo REAL, rendimento REAL
+);
+CREATE INDEX IF NOT EXISTS leituras_por_execucao ON leituras (unidade, competencia);
+"""
+
+# ==========================================
+# GRAVAÇÃO
+# ==========================================
+def _conectar(caminho):
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    # Várias unidades (processos da linha de comando) podem gravar ao mesmo tempo
+    conexao = sqlite3.connect(caminho, timeout=60)
+    conexao.execute("PRAGMA journal_mode=WAL")
+    conexao.executescript(ESQUEMA)
+    return conexao
+
+def mes_da_competencia(competencia):
+    """'AAAA-MM' -> número do mês contado desde o ano 0 (meses seguidos diferem de 1)."""
+    match = RE_COMPETENCIA.match(competencia or "")
+    if not match: raise ValueError(f"competência inválida (use AAAA-MM): {competencia!r}")
+    return int(match.group(1)) * 12 + int(match.group(2)) - 1
+
+def registrar_execucao(df_final, df_log, competencia, unidade='', caminho=CAMINHO_HISTORICO):
+    """Grava o resultado de uma execução; uma nova execução da mesma competência substitui a anterior."""
+    mes = mes_da_competencia(competencia)
+    # A linha sem chave (DE-PARA em branco) junta contas diferentes e não se repete
+    # de um mês para o outro: fica fora do histórico, que é consultado por chave
+    df_final = df_final[df_final['Chave Primaria'].notna()]
+    valores = df_final.reindex(columns=COLUNAS_VALOR).fillna(0.0).to_numpy(dtype='float64')
+    divergente = (abs(df_final.reindex(columns=DIFERENCAS).fillna(0.0).to_numpy(dtype='float64')) > TOLERANCIA_DIVERGENCIA).any(axis=1)
+    descricoes = df_final['Descrição'] if 'Descrição' in df_final.columns else pd.Series(None, index=df_final.index)
+    linhas_contas = [(unidade, competencia, mes, chave, descricao, *map(float, linha), int(div))
+                     for chave, descricao, linha, div in zip(df_final['Chave Primaria'], descricoes, valores, divergente)]
+
+    log = df_log.reindex(columns=['Arquivo', 'Banco', 'Conta Lida', 'Chave Gerada', 'Saldo', 'Rendimento'])
+    linhas_log = [(unidade, competencia, *linha) for linha in log.astype(object).where(log.notna(), None).itertuples(index=False)]
+
+    marcadores = ", ".join("?" * (5 + len(COLUNAS_VALOR) + 1))
+    with closing(_conectar(caminho)) as conexao, conexao:
+        for tabela in ('execucoes', 'contas', 'leituras'):
+            conexao.execute(f"DELETE FROM {tabela} WHERE unidade = ? AND competencia = ?", (unidade, competencia))
+        conexao.execute("INSERT INTO execucoes VALUES (?, ?, ?, ?, ?)",
+                        (unidade, competencia, time.strftime("%Y-%m-%d %H:%M:%S"), len(linhas_contas), int(divergente.sum())))
+        conexao.executemany(f"INSERT INTO contas VALUES ({marcadores})", linhas_contas)
+        conexao.executemany("INSERT INTO leituras (unidade, competencia, arquivo, banco, conta_lida, chave, saldo, rendimento) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", linhas_log)
+    return len(linhas_contas)
+
+# ==========================================
+# CONSULTAS
+# ==========================================
+def _consultar(sql, parametros, caminho):
+    if not os.path.exists(caminho): return pd.DataFrame()
+    with closing(_conectar(caminho)) as conexao:
+        return pd.read_sql_query(sql, conexao, params=parametros)
+
+def execucoes_registradas(caminho=CAMINHO_HISTORICO):
+    """Uma linha por unidade e competência gravadas, da mais recente para a mais antiga."""
+    return _consultar("SELECT * FROM execucoes ORDER BY competencia DESC, unidade", (), caminho)
+
+def historico_conta(chave, unidade=None, caminho=CAMINHO_HISTORICO):
+    """Valores de uma conta (Chave Primaria) em cada competência gravada."""
+    filtro = "" if unidade is None else " AND unidade = ?"
+    colunas = ", ".join(COLUNAS_VALOR)
+    return _consultar(f"SELECT competencia, unidade, descricao, {colunas}, divergente FROM contas "
+                      f"WHERE chave = ?{filtro} ORDER BY competencia, unidade",
+                      (chave,) if unidade is None else (chave, unidade), caminho)
+
+def divergencias_consecutivas(meses, ate=None, unidade=None, caminho=CAMINHO_HISTORICO):
+    """Contas divergentes em todas as `meses` competências seguidas que terminam em `ate`.
+
+    `ate` é 'AAAA-MM' (padrão: a competência mais recente gravada). As
+    diferenças mostradas são as da competência `ate`.
+    """
+    if ate is None:
+        recentes = _consultar("SELECT MAX(competencia) AS ate FROM execucoes" + ("" if unidade is None else " WHERE unidade = ?"),
+                              () if unidade is None else (unidade,), caminho)
+        if recentes.empty or recentes['ate'].isna().all(): return pd.DataFrame()
+        ate = recentes['ate'].iloc[0]
+    fim = mes_da_competencia(ate)
+    filtro = "" if unidade is None else " AND unidade = ?"
+    sql = f"""
+        WITH seguidas AS (
+            SELECT unidade, chave FROM contas
+            WHERE divergente = 1 AND mes BETWEEN ? AND ?{filtro}
+            GROUP BY unidade, chave HAVING COUNT(*) = ?
+        )
+        SELECT c.chave, c.unidade, c.descricao, {", ".join("c." + d for d in DIFERENCAS)}
+        FROM seguidas s JOIN contas c ON c.unidade = s.unidade AND c.competencia = ? AND c.chave = s.chave
+        ORDER BY c.unidade, c.chave
+    """
+    parametros = (fim - int(meses) + 1, fim) + (() if unidade is None else (unidade,)) + (int(meses), ate)
+    return _consultar(sql, parametros, caminho)
@@ -0,0 +1,131 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# FUNÇÕES DE LIMPEZA E FORMATAÇÃO
+# ==========================================
+def gerar_chave_padronizada(texto_conta):
+    if not isinstance(texto_conta, str): return None
+    texto_conta = texto_conta.strip()
+    
+    if '.' in texto_conta and len(texto_conta) > 12:
+        partes = texto_conta.split('.')
+        maior_parte = ""
+        for p in partes:
+            limpo = re.sub(r'\D', '', p)
+            if len(limpo) > len(maior_parte): maior_parte = limpo
+        if len(maior_parte) > 4: texto_conta = maior_parte
+    elif '/' in texto_conta:
+        texto_conta = texto_conta.split('/')[-1]
+            
+    parte_numerica = re.sub(r'\D', '', texto_conta)
+    if not parte_numerica: return None
+    
+    return parte_numerica[-7:].zfill(7)
+
+def limpar_valor_monetario(valor_str):
+    if not isinstance(valor_str, str): return 0.0
+    valor_upper = valor_str.upper()
+    eh_negativo = 'D' in valor_upper or 'DEB' in valor_upper or '-' in valor_str or '(' in valor_str
+    
+    limpo = re.sub(r'[^\d,\.]', '', valor_str)
+    
+    try:
+        if not limpo: return 0.0
+        if ',' in limpo and '.' in limpo:
+             limpo = limpo.replace('.', '').replace(',', '.')
+        elif ',' in limpo:
+             limpo = limpo.replace(',', '.')
+        
+        valor_float = float(limpo)
+        return -valor_float if eh_negativo else valor_float
+    except ValueError:
+        return 0.0
+
+def formatar_moeda_br(valor):
+    if pd.isna(valor): return "0,00"
+    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+# ==========================================
+# VERSÕES VETORIZADAS (colunas inteiras)
+# ==========================================
+# Exportações contábeis repetem muito as mesmas contas e valores: cada coluna
+# é reduzida aos valores distintos, tratada com operações .str e depois
+# expandida de volta pelos códigos do factorize.
+def gerar_chaves_padronizadas(serie):
+    """Mesmo resultado de gerar_chave_padronizada, aplicado a uma Series inteira."""
+    codigos, texto, eh_texto = _valores_distintos(serie)
+    texto = texto.str.strip()
+
+    # Contas pontuadas longas: o maior grupo de dígitos entre pontos, se tiver mais de 4
+    com_ponto = texto.str.contains('.', regex=False) & (texto.str.len() > 12)
+    if com_ponto.any():
+        segmentos = texto[com_ponto].str.replace(r'[^\d.]', '', regex=True).str.split('.', expand=True)
+        tamanhos = segmentos.apply(lambda c: c.str.len()).fillna(-1).to_numpy(dtype=float)
+        posicao = tamanhos.argmax(axis=1)
+        linhas = np.arange(len(segmentos))
+        usa_maior = tamanhos[linhas, posicao] > 4
+        maior_parte = pd.Series(segmentos.to_numpy(dtype=object)[linhas, posicao][usa_maior],
+                                index=segmentos.index[usa_maior], dtype=texto.dtype)
+        texto = texto.where(~texto.index.isin(maior_parte.index), maior_parte.reindex(texto.index))
+
+    # Contas com barra: só o que vem depois da última
+    com_barra = ~com_ponto & texto.str.contains('/', regex=False)
+    if com_barra.any():
+        texto = texto.where(~com_barra, texto.str.replace(r'(?s)^.*/', '', regex=True))
+
+    parte_numerica = texto.str.replace(r'\D', '', regex=True)
+    chaves = np.array(parte_numerica.str.slice(start=-7).str.pad(7, side='left', fillchar='0'), dtype=object)
+    chaves[~(eh_texto & (parte_numerica != "")).to_numpy(dtype=bool)] = None
+    return _expandir(chaves, codigos, serie.index, None)
+
+def limpar_valores_monetarios(serie):
+    """Mesmo resultado de limpar_valor_monetario, aplicado a uma Series inteira."""
+    codigos, texto, _ = _valores_distintos(serie)
+
+    eh_negativo = (texto.str.upper().str.contains('D', regex=False)
+                   | texto.str.contains('-', regex=False)
+                   | texto.str.contains('(', regex=False)).to_numpy(dtype=bool)
+
+    limpo = texto.str.replace(r'[^\d,\.]', '', regex=True)
+    tem_virgula = limpo.str.contains(',', regex=False)
+    tem_ponto = limpo.str.contains('.', regex=False)
+    limpo = limpo.where(~(tem_virgula & tem_ponto), limpo.str.replace('.', '', regex=False))
+    limpo = limpo.str.replace(',', '.', regex=False)
+
+    # float() só aceita um número decimal simples; o resto (vazio, "1.2.3", ".") vale 0.0
+    valido = limpo.str.fullmatch(r'\d+\.?\d*|\.\d+').fillna(False).to_numpy(dtype=bool)
+    valores = np.zeros(len(limpo))
+    # Conversão por float() (e não to_numeric) para manter o arredondamento exato do escalar
+    valores[valido] = np.array(limpo.to_numpy(dtype=object)[valido], dtype=float)
+    valores[valido & eh_negativo] *= -1
+    return _expandir(valores, codigos, serie.index, 0.0).astype(float)
+
+def formatar_moedas_br(serie):
+    """Mesmo resultado de formatar_moeda_br, aplicado a uma Series inteira."""
+    texto = serie.astype(float).map("{:,.2f}".format, na_action='ignore')
+    texto = texto.astype(object).where(serie.notna(), "0,00")
+    return texto.str.translate(_TROCA_SEPARADORES)
+
+_TROCA_SEPARADORES = str.maketrans({",": ".", ".": ","})
+
+def _valores_distintos(serie):
+    """(códigos, valores distintos como texto, máscara de quais eram texto)."""
+    codigos, distintos = pd.factorize(serie)
+    distintos = pd.Series(distintos)
+    if isinstance(distintos.dtype, pd.StringDtype):
+        return codigos, distintos, pd.Series(True, index=distintos.index)
+
+    # Colunas object podem misturar texto com números ou None
+    eh_texto = distintos.map(lambda v: isinstance(v, str)).astype(bool)
+    distintos = distintos.astype(object).where(eh_texto, "")
+    return codigos, distintos.astype(str), eh_texto
+
+def _expandir(valores, codigos, indice, vazio):
+    # Código -1 = valor ausente (NaN/None) na coluna original
+    resultado = np.append(np.asarray(valores, dtype=object if vazio is None else float), vazio)
+    # dtype object explícito: sem ele o pandas 3 infere str e troca o None por NaN
+    return pd.Series(resultado[codigos], index=indice, dtype=object if vazio is None else float)
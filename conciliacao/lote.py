@@ -0,0 +1,246 @@
+"""Conciliação sem interface, para rodar várias unidades de uma vez.
+
+    python -m conciliacao ENTRADA SAIDA [--paralelas N] [--formatos xlsx,pdf] [--medicoes] [--perfil]
+                                        [--competencia AAAA-MM [--historico ARQUIVO]] [--consolidado]
+
+ENTRADA tem uma pasta por unidade (ou é ela mesma uma unidade), no formato:
+
+    UNIDADE/
+        saldos_013083.csv          # Flexvision 013083 ("013083" ou "saldo" no nome)
+        rendimentos_014387.csv     # Flexvision 014387 ("014387" ou "rend" no nome)
+        depara.xlsx                # opcional: DE-PARA próprio da unidade
+        BB/CC/*.pdf   BB/INV/*.pdf
+        CEF/CC/*.pdf  CEF/INV/*.pdf
+
+Os relatórios de cada unidade são gravados em SAIDA/UNIDADE/, junto com as
+medições por etapa (--medicoes) e o perfil cProfile da execução (--perfil).
+Com --competencia, o resultado de cada unidade também é gravado no histórico
+de conciliações (conciliacao.historico), com o nome da pasta como unidade.
+Com --consolidado, os resultados de todas as unidades também são reunidos
+num só relatório, com a coluna Unidade, em SAIDA/_consolidado/.
+
+Cada unidade é conciliada num processo próprio; o DE-PARA padrão é carregado
+uma vez antes de os processos começarem e compartilhado por todos.
+"""
+import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .depara import CAMINHO_DEPARA, carregar_depara
+from .extrato_pdf import WORKERS_PDF
+from .historico import CAMINHO_HISTORICO, registrar_execucao, mes_da_competencia
+from .medicao import medir, perfilar, medicoes_json, medicoes_csv
+from .processo import executar_processo, mascara_divergencias
+from .relatorios import tabela_relatorio, to_excel_styled, to_pdf
+
+# Nomes de pasta aceitos (maiúsculos, com "_" e "-" trocados por espaço)
+PASTAS_BANCO = {
+    'BB': 'BANCO DO BRASIL', 'BANCO DO BRASIL': 'BANCO DO BRASIL',
+    'CEF': 'CAIXA ECONÔMICA', 'CAIXA': 'CAIXA ECONÔMICA', 'CAIXA ECONOMICA': 'CAIXA ECONÔMICA',
+    'CAIXA ECONÔMICA': 'CAIXA ECONÔMICA',
+}
+PASTAS_TIPO = {
+    'CC': 'CC', 'CONTA CORRENTE': 'CC',
+    'INV': 'INV', 'INVESTIMENTOS': 'INV', 'APLICACAO': 'INV', 'APLICAÇÃO': 'INV',
+}
+
+ARQUIVOS_SAIDA = {
+    'xlsx': ('conciliacao_completa.xlsx', to_excel_styled),
+    'pdf': ('relatorio_conciliacao.pdf', to_pdf),
+}
+
+# Subpasta de SAIDA com o relatório de todas as unidades juntas
+PASTA_CONSOLIDADO = '_consolidado'
+
+# ==========================================
+# DESCOBERTA DAS UNIDADES E ARQUIVOS
+# ==========================================
+def _normalizar_pasta(nome):
+    return nome.upper().replace('_', ' ').replace('-', ' ').strip()
+
+def _listar(pasta, extensao):
+    return sorted(os.path.join(pasta, n) for n in os.listdir(pasta)
+                  if n.lower().endswith(extensao) and os.path.isfile(os.path.join(pasta, n)))
+
+def localizar_arquivos(pasta):
+    """(csv de saldos, csv de rendimentos, lista_arquivos_bancarios, DE-PARA) de uma unidade."""
+    saldos = rendimentos = None
+    csvs = _listar(pasta, '.csv')
+    for caminho in csvs:
+        nome = os.path.basename(caminho).lower()
+        if '014387' in nome or 'rend' in nome: rendimentos = rendimentos or caminho
+        elif '013083' in nome or 'saldo' in nome: saldos = saldos or caminho
+    # Um único CSV sem nome reconhecível é tratado como o de saldos
+    if saldos is None and len(csvs) == 1 and csvs[0] != rendimentos: saldos = csvs[0]
+
+    lista_arquivos = []
+    for pasta_banco in sorted(os.listdir(pasta)):
+        banco = PASTAS_BANCO.get(_normalizar_pasta(pasta_banco))
+        caminho_banco = os.path.join(pasta, pasta_banco)
+        if not banco or not os.path.isdir(caminho_banco): continue
+        for pasta_tipo in sorted(os.listdir(caminho_banco)):
+            tipo = PASTAS_TIPO.get(_normalizar_pasta(pasta_tipo))
+            caminho_tipo = os.path.join(caminho_banco, pasta_tipo)
+            if not tipo or not os.path.isdir(caminho_tipo): continue
+            for pdf in _listar(caminho_tipo, '.pdf'):
+                lista_arquivos.append({'arquivo': pdf, 'banco': banco, 'tipo': tipo})
+
+    # Sem planilha na pasta da unidade, vale o DE-PARA padrão do projeto
+    planilhas = _listar(pasta, '.xlsx')
+    return saldos, rendimentos, lista_arquivos, planilhas[0] if planilhas else CAMINHO_DEPARA
+
+def localizar_unidades(entrada):
+    """{nome da unidade: pasta}. Se a própria entrada tem CSVs, ela é a única unidade."""
+    if _listar(entrada, '.csv'):
+        return {os.path.basename(os.path.normpath(entrada)): entrada}
+    return {nome: os.path.join(entrada, nome) for nome in sorted(os.listdir(entrada))
+            if os.path.isdir(os.path.join(entrada, nome))}
+
+# ==========================================
+# PROCESSAMENTO
+# ==========================================
+def _gravar_relatorios(df_final, df_log, destino, formatos, medicoes=None):
+    os.makedirs(destino, exist_ok=True)
+    df_display = tabela_relatorio(df_final)
+    for formato in formatos:
+        nome, gerador = ARQUIVOS_SAIDA[formato]
+        with medir(medicoes, 'Exportação', formato) as linha:
+            linha['Linhas'] = len(df_display)
+            conteudo = gerador(df_display)
+        with open(os.path.join(destino, nome), 'wb') as fh: fh.write(conteudo)
+    df_log.to_csv(os.path.join(destino, 'log_leitura.csv'), sep=';', index=False, encoding='utf-8-sig')
+
+def processar_unidade(unidade, pasta, saida, formatos=('xlsx', 'pdf'), num_workers=None,
+                      gravar_medicoes=False, gravar_perfil=False, competencia=None, caminho_historico=CAMINHO_HISTORICO,
+                      devolver_tabelas=False):
+    """Concilia uma unidade e grava os relatórios; devolve um resumo para o console.
+
+    Com `devolver_tabelas`, o resumo leva também o df_final e o df_log, para a consolidação.
+    """
+    saldos, rendimentos, lista_arquivos, caminho_depara = localizar_arquivos(pasta)
+    if not saldos: return {'Unidade': unidade, 'Erro': "CSV de saldos não encontrado."}
+
+    avisos = []
+    medicoes = [] if gravar_medicoes else None
+    destino = os.path.join(saida, unidade)
+    with perfilar(gravar_perfil) as perfil:
+        df_final, df_log = executar_processo(saldos, rendimentos, lista_arquivos, num_workers=num_workers,
+                                             avisar=avisos.append, medicoes=medicoes, caminho_depara=caminho_depara)
+        if df_final.empty:
+            return {'Unidade': unidade, 'Erro': "; ".join(avisos) or "O processamento não retornou dados."}
+
+        _gravar_relatorios(df_final, df_log, destino, formatos, medicoes)
+    if competencia: registrar_execucao(df_final, df_log, competencia, unidade, caminho_historico)
+
+    if gravar_medicoes:
+        with open(os.path.join(destino, 'medicoes.json'), 'wb') as fh: fh.write(medicoes_json(medicoes))
+        with open(os.path.join(destino, 'medicoes.csv'), 'wb') as fh: fh.write(medicoes_csv(medicoes))
+    if gravar_perfil:
+        with open(os.path.join(destino, 'perfil.prof'), 'wb') as fh: fh.write(perfil['prof'])
+        with open(os.path.join(destino, 'perfil.txt'), 'w', encoding='utf-8') as fh: fh.write(perfil['resumo'])
+
+    resumo = {'Unidade': unidade, 'Contas': len(df_final), 'Extratos': len(lista_arquivos),
+              'Divergências': int(mascara_divergencias(df_final).sum()), 'Pasta': destino}
+    if devolver_tabelas: resumo.update({'df_final': df_final, 'df_log': df_log})
+    return resumo
+
+def _processar_unidade_protegida(*args, **kwargs):
+    # Uma unidade com problema não derruba as demais
+    try:
+        return processar_unidade(*args, **kwargs)
+    except Exception as e:
+        return {'Unidade': args[0], 'Erro': f"{type(e).__name__}: {e}"}
+
+def _com_unidade(partes):
+    df = pd.concat(partes, ignore_index=True)
+    return df[['Unidade'] + [c for c in df.columns if c != 'Unidade']]
+
+def consolidar_unidades(resumos):
+    """(df_final, df_log) de todas as unidades que deram certo, com a coluna Unidade na frente."""
+    concluidas = [r for r in resumos if 'df_final' in r]
+    if not concluidas: return pd.DataFrame(), pd.DataFrame()
+    return (_com_unidade([r['df_final'].assign(Unidade=r['Unidade']) for r in concluidas]),
+            _com_unidade([r['df_log'].assign(Unidade=r['Unidade']) for r in concluidas]))
+
+def processar_lote(entrada, saida, paralelas=None, formatos=('xlsx', 'pdf'), gravar_medicoes=False, gravar_perfil=False,
+                   competencia=None, caminho_historico=CAMINHO_HISTORICO, consolidar=False):
+    """Processa todas as unidades de ENTRADA, várias ao mesmo tempo; devolve os resumos em ordem.
+
+    Com `consolidar`, grava também o relatório de todas as unidades juntas em
+    SAIDA/_consolidado/ e acrescenta o resumo dele ao fim da lista.
+    """
+    unidades = localizar_unidades(entrada)
+    if not unidades: return []
+    paralelas = max(1, min(paralelas or os.cpu_count() or 1, len(unidades)))
+    # Os processos de leitura de PDF são divididos entre as unidades simultâneas
+    num_workers = max(1, WORKERS_PDF // paralelas)
+    # DE-PARA padrão carregado (e compilado, se preciso) uma vez aqui: os processos das
+    # unidades o herdam já na memória ou, no mínimo, encontram o compilado em disco
+    carregar_depara(CAMINHO_DEPARA)
+
+    opcoes = (saida, formatos, num_workers, gravar_medicoes, gravar_perfil, competencia, caminho_historico, consolidar)
+    if paralelas == 1:
+        resumos = [_processar_unidade_protegida(u, p, *opcoes) for u, p in unidades.items()]
+    else:
+        with ProcessPoolExecutor(max_workers=paralelas) as executor:
+            futuros = {executor.submit(_processar_unidade_protegida, u, p, *opcoes): u for u, p in unidades.items()}
+            # Cada unidade é recolhida assim que termina; a ordem final é a das pastas
+            concluidos = {futuros[f]: f.result() for f in as_completed(futuros)}
+        resumos = [concluidos[u] for u in unidades]
+    if not consolidar: return resumos
+
+    df_final, df_log = consolidar_unidades(resumos)
+    for r in resumos:
+        r.pop('df_final', None)
+        r.pop('df_log', None)
+    if df_final.empty: return resumos + [{'Unidade': PASTA_CONSOLIDADO, 'Erro': "nenhuma unidade conciliada."}]
+    destino = os.path.join(saida, PASTA_CONSOLIDADO)
+    _gravar_relatorios(df_final, df_log, destino, formatos)
+    return resumos + [{'Unidade': PASTA_CONSOLIDADO, 'Contas': len(df_final), 'Extratos': len(df_log),
+                       'Divergências': int(mascara_divergencias(df_final).sum()), 'Pasta': destino}]
+
+# ==========================================
+# LINHA DE COMANDO
+# ==========================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m conciliacao",
+                                     description="Conciliação contábil x extratos bancários, sem interface.")
+    parser.add_argument("entrada", help="pasta com uma subpasta por unidade (ou uma unidade só)")
+    parser.add_argument("saida", help="pasta onde os relatórios serão gravados")
+    parser.add_argument("--paralelas", type=int, default=None,
+                        help="unidades processadas ao mesmo tempo (padrão: nº de CPUs)")
+    parser.add_argument("--formatos", default="xlsx,pdf",
+                        help="relatórios a gerar, separados por vírgula (xlsx, pdf)")
+    parser.add_argument("--medicoes", action="store_true",
+                        help="grava tempo, CPU e memória por etapa (medicoes.json e medicoes.csv)")
+    parser.add_argument("--perfil", action="store_true",
+                        help="grava o perfil cProfile de cada unidade (perfil.prof e perfil.txt)")
+    parser.add_argument("--competencia", default=None,
+                        help="grava o resultado de cada unidade no histórico, nesta competência (AAAA-MM)")
+    parser.add_argument("--historico", default=CAMINHO_HISTORICO,
+                        help=f"arquivo SQLite do histórico (padrão: {CAMINHO_HISTORICO})")
+    parser.add_argument("--consolidado", action="store_true",
+                        help=f"grava também um relatório único com todas as unidades em SAIDA/{PASTA_CONSOLIDADO}/")
+    args = parser.parse_args(argv)
+
+    formatos = tuple(f.strip().lower() for f in args.formatos.split(",") if f.strip())
+    invalidos = [f for f in formatos if f not in ARQUIVOS_SAIDA]
+    if invalidos: parser.error(f"formato desconhecido: {', '.join(invalidos)}")
+    if not os.path.isdir(args.entrada): parser.error(f"pasta de entrada não encontrada: {args.entrada}")
+    if args.competencia:
+        try: mes_da_competencia(args.competencia)
+        except ValueError as e: parser.error(str(e))
+
+    resumos = processar_lote(args.entrada, args.saida, args.paralelas, formatos, args.medicoes, args.perfil,
+                             args.competencia, args.historico, args.consolidado)
+    if not resumos:
+        print("Nenhuma unidade encontrada.", file=sys.stderr)
+        return 1
+    for r in resumos:
+        if 'Erro' in r: print(f"[ERRO] {r['Unidade']}: {r['Erro']}", file=sys.stderr)
+        else: print(f"[OK]   {r['Unidade']}: {r['Contas']} contas, {r['Extratos']} extratos, "
+                    f"{r['Divergências']} com divergência -> {r['Pasta']}")
+    return 1 if any('Erro' in r for r in resumos) else 0
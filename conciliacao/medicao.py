@@ -0,0 +1,169 @@
+import cProfile
+import io
+import json
+import marshal
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource  # só existe em Unix
+except ImportError:
+    resource = None
+
+# Colunas da tabela de medições, na ordem em que aparecem na tela e nas exportações
+COLUNAS_MEDICAO = [
+    'Etapa', 'Item', 'Origem', 'Tempo (s)', 'CPU (s)', 'Pico RSS da Etapa (MB)', 'Pico Alocado (MB)', 'Pico RSS do Processo (MB)',
+    'Abrir (s)', 'Texto (s)', 'Varredura (s)', 'Páginas', 'Páginas Lidas', 'Linhas',
+]
+
+# Os picos de memória (RSS no /proc do Linux e o do tracemalloc) são um só para o
+# processo: cada etapa zera os dois ao começar. Antes de zerar, o pico atual é
+# creditado a todas as etapas abertas (aninhadas ou em outras threads), para que
+# nenhuma perca o seu; etapas simultâneas podem receber a memória umas das outras.
+_trava_picos = threading.Lock()
+_abertas = []    # marcos de cada medição em andamento: {'rss'|'alocado': [base, pico]}
+_maior_rss = 0   # maior pico de RSS já visto, em bytes (zerar o pico também baixa o ru_maxrss)
+
+# ==========================================
+# MEDIÇÃO POR ETAPA
+# ==========================================
+def _rss():
+    """(RSS atual, pico de RSS desde a última vez que foi zerado) em bytes, ou None sem /proc."""
+    try:
+        with open('/proc/self/status') as fh:
+            campos = dict(linha.split(':', 1) for linha in fh if linha.startswith(('VmRSS', 'VmHWM')))
+        return int(campos['VmRSS'].split()[0]) * 1024, int(campos['VmHWM'].split()[0]) * 1024
+    except (OSError, KeyError, ValueError):
+        return None
+
+def _zerar_pico_rss():
+    # "5" em clear_refs só reinicia o pico de RSS (VmHWM), sem mexer nas páginas
+    try:
+        with open('/proc/self/clear_refs', 'w') as fh: fh.write('5')
+        return True
+    except OSError:
+        return False
+
+def _creditar_picos():
+    global _maior_rss
+    alocado = tracemalloc.get_traced_memory()[1] if tracemalloc.is_tracing() else None
+    rss = _rss()
+    if rss: _maior_rss = max(_maior_rss, rss[1])
+    for marcos in _abertas:
+        if rss and 'rss' in marcos: marcos['rss'][1] = max(marcos['rss'][1], rss[1])
+        if alocado is not None and 'alocado' in marcos: marcos['alocado'][1] = max(marcos['alocado'][1], alocado)
+
+def _abrir_marcos():
+    with _trava_picos:
+        _creditar_picos()
+        marcos = {}
+        rss = _rss()
+        if rss and _zerar_pico_rss(): marcos['rss'] = [rss[0], rss[0]]
+        if tracemalloc.is_tracing():
+            tracemalloc.reset_peak()
+            atual = tracemalloc.get_traced_memory()[0]
+            marcos['alocado'] = [atual, atual]
+        _abertas.append(marcos)
+        return marcos
+
+def _fechar_marcos(marcos):
+    """{'rss'|'alocado': pico da etapa acima do que havia no começo, em MB}."""
+    with _trava_picos:
+        _creditar_picos()
+        _abertas[:] = [m for m in _abertas if m is not marcos]
+    return {nome: round((pico - base) / 2**20, 1) for nome, (base, pico) in marcos.items()}
+
+def _cpu_filhos():
+    # CPU dos processos filhos já encerrados (o pool de leitura dos PDFs termina dentro da etapa)
+    if resource is None: return 0.0
+    uso = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return uso.ru_utime + uso.ru_stime
+
+def pico_rss_mb():
+    """Maior memória residente do processo desde que ele começou (MB), ou None fora de Unix.
+
+    É a marca máxima do processo inteiro (ru_maxrss), não o gasto de uma etapa:
+    num servidor Streamlit reflete tudo o que já rodou nele.
+    """
+    if resource is None: return None
+    # Linux informa em KB; macOS, em bytes
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+    with _trava_picos:
+        rss = _rss()
+        pico = max(pico, _maior_rss, rss[1] if rss else 0)
+    return round(pico / 2**20, 1)
+
+@contextmanager
+def medir(medicoes, etapa, item='', origem=''):
+    """Acrescenta a `medicoes` (lista) uma linha com tempo, CPU e memória da etapa.
+
+    A linha é entregue ao bloco para receber contagens (páginas, linhas...).
+    Com `medicoes` None nada é registrado. 'CPU (s)' soma a da thread e a dos
+    processos filhos encerrados durante a etapa. 'Pico RSS da Etapa (MB)' é
+    quanto a memória residente subiu acima da do começo da etapa (Linux);
+    'Pico Alocado (MB)', o mesmo pelo tracemalloc, só medido quando ele está
+    ligado (execução com perfil), porque deixa toda alocação mais lenta.
+    'Pico RSS do Processo (MB)' é a marca máxima do processo ao fim da etapa
+    (pico_rss_mb), não um custo da etapa.
+    """
+    linha = {'Etapa': etapa, 'Item': item, 'Origem': origem}
+    marcos = _abrir_marcos()
+    inicio, cpu, cpu_filhos = time.perf_counter(), time.thread_time(), _cpu_filhos()
+    try:
+        yield linha
+    finally:
+        linha['Tempo (s)'] = time.perf_counter() - inicio
+        linha['CPU (s)'] = time.thread_time() - cpu + _cpu_filhos() - cpu_filhos
+        picos = _fechar_marcos(marcos)
+        if 'rss' in picos: linha['Pico RSS da Etapa (MB)'] = picos['rss']
+        if 'alocado' in picos: linha['Pico Alocado (MB)'] = picos['alocado']
+        linha['Pico RSS do Processo (MB)'] = pico_rss_mb()
+        if medicoes is not None: medicoes.append(linha)
+
+def tabela_medicoes(medicoes):
+    df = pd.DataFrame(list(medicoes))
+    if df.empty: return pd.DataFrame(columns=COLUNAS_MEDICAO)
+    return df[[c for c in COLUNAS_MEDICAO if c in df.columns] + [c for c in df.columns if c not in COLUNAS_MEDICAO]]
+
+def medicoes_json(medicoes):
+    df = tabela_medicoes(medicoes)
+    linhas = [{k: v for k, v in linha.items() if pd.notna(v)} for linha in df.to_dict(orient='records')]
+    return json.dumps(linhas, ensure_ascii=False, indent=2, default=float).encode('utf-8')
+
+def medicoes_csv(medicoes):
+    return tabela_medicoes(medicoes).to_csv(sep=';', index=False, decimal=',').encode('utf-8-sig')
+
+# ==========================================
+# PERFIL COMPLETO (cProfile), OPCIONAL
+# ==========================================
+@contextmanager
+def perfilar(ativo=True):
+    """cProfile + tracemalloc em volta do bloco; o dict entregue recebe o resultado.
+
+    'prof': bytes no formato do cProfile (abrir com pstats, snakeviz...);
+    'resumo': texto com as 30 funções de maior tempo acumulado.
+    """
+    saida = {}
+    if not ativo:
+        yield saida
+        return
+    ligou_tracemalloc = not tracemalloc.is_tracing()
+    if ligou_tracemalloc: tracemalloc.start()
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield saida
+    finally:
+        perfil.disable()
+        if ligou_tracemalloc: tracemalloc.stop()
+        perfil.create_stats()
+        saida['prof'] = marshal.dumps(perfil.stats)
+        texto = io.StringIO()
+        pstats.Stats(perfil, stream=texto).sort_stats('cumulative').print_stats(30)
+        saida['resumo'] = texto.getvalue()
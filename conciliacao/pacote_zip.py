@@ -0,0 +1,141 @@
+import io
+import os
+import re
+import unicodedata
+import zipfile
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz  # PyMuPDF
+
+from .extrato_pdf import TIMEOUT_PDF, WORKERS_PDF
+from .recepcao import agendar
+
+# Soma máxima (MB) dos PDFs descompactados de um pacote. Os extratos classificados
+# ficam em memória no servidor até o processamento: o limite é o que cabe numa sessão
+LIMITE_ZIP_MB = float(os.environ.get("CONCILIACAO_ZIP_MB", "512"))
+
+# Membros com a classificação pelo cabeçalho em curso ao mesmo tempo, por pacote
+JANELA_CLASSIFICACAO = 2 * WORKERS_PDF
+
+# Palavras do caminho do membro (pastas e nome do arquivo) que indicam banco e tipo
+BANCOS_NO_NOME = {
+    'BB': 'BANCO DO BRASIL', 'BRASIL': 'BANCO DO BRASIL',
+    'CEF': 'CAIXA ECONÔMICA', 'CAIXA': 'CAIXA ECONÔMICA',
+}
+TIPOS_NO_NOME = {
+    'CC': 'CC', 'CORRENTE': 'CC', 'VINCULADA': 'CC',
+    'INV': 'INV', 'INVEST': 'INV', 'INVESTIMENTO': 'INV', 'INVESTIMENTOS': 'INV', 'APLIC': 'INV',
+    'APLICACAO': 'INV', 'APLICACOES': 'INV', 'FUNDO': 'INV', 'FUNDOS': 'INV', 'CDB': 'INV',
+}
+
+# Quando o nome não basta: títulos procurados só no cabeçalho da primeira página
+# (a faixa superior, FRACAO_CABECALHO da altura). Palavras soltas como "APLICACAO"
+# ou "RENDIMENTO" não servem: aparecem nos lançamentos de conta corrente.
+FRACAO_CABECALHO = 0.30
+BANCOS_NO_TEXTO = [('BANCO DO BRASIL', 'BANCO DO BRASIL'), ('CAIXA ECONOMICA', 'CAIXA ECONÔMICA')]
+TIPOS_NO_TEXTO = [
+    ('EXTRATO DE INVESTIMENTO', 'INV'), ('EXTRATO DE FUNDO', 'INV'), ('FUNDOS DE INVESTIMENTO', 'INV'),
+    ('FUNDO DE INVESTIMENTO', 'INV'), ('EXTRATO DE APLICAC', 'INV'), ('APLICACOES FINANCEIRAS', 'INV'),
+    ('EXTRATO DE CONTA CORRENTE', 'CC'), ('EXTRATO CONTA CORRENTE', 'CC'), ('EXTRATO POR PERIODO', 'CC'),
+]
+
+RE_PALAVRAS = re.compile(r"[A-Z0-9]+")
+
+
+# ==========================================
+# CLASSIFICAÇÃO DOS EXTRATOS
+# ==========================================
+def _normalizar(texto):
+    """Maiúsculas sem acentos, para comparar nomes e textos de extrato."""
+    return unicodedata.normalize('NFKD', texto).encode('ascii', 'ignore').decode('ascii').upper()
+
+def _unico(encontrados):
+    # Duas indicações diferentes (ex.: "BB" e "CAIXA" no mesmo nome) não decidem nada
+    return encontrados.pop() if len(encontrados) == 1 else None
+
+def _pelo_nome(nome):
+    palavras = RE_PALAVRAS.findall(_normalizar(nome))
+    banco = _unico({BANCOS_NO_NOME[p] for p in palavras if p in BANCOS_NO_NOME})
+    tipo = _unico({TIPOS_NO_NOME[p] for p in palavras if p in TIPOS_NO_NOME})
+    return banco, tipo
+
+def _pelo_texto(conteudo):
+    try:
+        with fitz.open(stream=conteudo, filetype="pdf") as doc:
+            if not doc.page_count: return None, None
+            area = doc[0].rect
+            texto = _normalizar(doc[0].get_text(clip=fitz.Rect(area.x0, area.y0, area.x1, area.y0 + area.height * FRACAO_CABECALHO)))
+    except Exception:
+        return None, None
+    # Cabeçalho com indicações dos dois tipos (ou dos dois bancos) fica sem classificação
+    banco = _unico({nome for expressao, nome in BANCOS_NO_TEXTO if expressao in texto})
+    tipo = _unico({nome for expressao, nome in TIPOS_NO_TEXTO if expressao in texto})
+    return banco, tipo
+
+def classificar_extrato(nome, conteudo):
+    """(banco, tipo) de um extrato pelo caminho no pacote ou, se faltar algo, pelo cabeçalho da primeira página.
+
+    Fica None o que não foi possível identificar, inclusive quando as indicações se contradizem.
+    """
+    banco, tipo = _pelo_nome(nome)
+    if banco and tipo: return banco, tipo
+    banco_texto, tipo_texto = _pelo_texto(conteudo)
+    return banco or banco_texto, tipo or tipo_texto
+
+# ==========================================
+# LEITURA DO PACOTE
+# ==========================================
+def _concluir(item, futuro):
+    # item = [membro, conteudo, banco, tipo]; completa banco e tipo pelo cabeçalho
+    try:
+        banco_texto, tipo_texto = _pelo_texto(item[1]) if futuro is None else futuro.result(timeout=TIMEOUT_PDF)
+    except Exception:  # tempo esgotado ou processo de leitura perdido: fica sem classificação
+        banco_texto = tipo_texto = None
+    item[2], item[3] = item[2] or banco_texto, item[3] or tipo_texto
+    # O que não foi classificado não precisa mais do conteúdo
+    if not item[2] or not item[3]: item[1] = None
+
+def extratos_do_zip(arquivo):
+    """(lista_arquivos_bancarios, ignorados) a partir de um ZIP de extratos em PDF.
+
+    O pacote é lido em memória, membro a membro, sem gravar nada em disco.
+    Os membros sem banco ou tipo no caminho são classificados pelo cabeçalho
+    nos processos de leitura da recepção, JANELA_CLASSIFICACAO por vez; só o
+    conteúdo dos classificados e dos que estão na janela fica em memória.
+    Cada PDF vira um item {'arquivo', 'banco', 'tipo'} como os dos uploads,
+    pronto para executar_processo ou para a recepção em segundo plano.
+    `ignorados` lista (membro, motivo) dos PDFs sem banco ou tipo identificável.
+    """
+    fonte = arquivo if hasattr(arquivo, 'seek') or isinstance(arquivo, (str, os.PathLike)) else io.BytesIO(arquivo)
+    id_pacote = getattr(arquivo, 'file_id', None) or os.path.basename(getattr(arquivo, 'name', None) or str(arquivo))
+    itens, em_curso = [], deque()
+    with zipfile.ZipFile(fonte) as pacote:
+        membros = [m for m in pacote.infolist()
+                   if not m.is_dir() and m.filename.lower().endswith('.pdf') and not m.filename.startswith('__MACOSX/')]
+        total_mb = sum(m.file_size for m in membros) / 2**20
+        if total_mb > LIMITE_ZIP_MB:
+            raise ValueError(f"pacote com {total_mb:.0f} MB de PDFs descompactados (limite: {LIMITE_ZIP_MB:.0f} MB)")
+        for membro in membros:
+            item = [membro.filename, pacote.read(membro), *_pelo_nome(membro.filename)]
+            itens.append(item)
+            if item[2] and item[3]: continue
+            try:
+                em_curso.append((item, agendar(_pelo_texto, item[1])))
+            except BrokenProcessPool:
+                # Sem processos de leitura: o cabeçalho é lido aqui mesmo
+                _concluir(item, None)
+            if len(em_curso) >= JANELA_CLASSIFICACAO: _concluir(*em_curso.popleft())
+    while em_curso: _concluir(*em_curso.popleft())
+
+    lista_arquivos, ignorados = [], []
+    for nome, conteudo, banco, tipo in itens:
+        if conteudo is None:
+            falta = " e ".join(n for n, v in (("banco", banco), ("tipo", tipo)) if not v)
+            ignorados.append((nome, f"{falta} não identificado"))
+            continue
+        # Objeto de arquivo como o do upload: nome para o log e file_id para a fila de recepção
+        pdf = io.BytesIO(conteudo)
+        pdf.name, pdf.size, pdf.file_id = nome, len(conteudo), (id_pacote, nome)
+        lista_arquivos.append({'arquivo': pdf, 'banco': banco, 'tipo': tipo})
+    return lista_arquivos, ignorados
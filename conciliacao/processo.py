@@ -0,0 +1,298 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .bancos import identificar_bancos
+from .contabil import processar_contabil
+from .depara import CAMINHO_DEPARA, carregar_depara, aplicar_depara
+from .extrato_pdf import VERSAO_PARSER, chave_extrato, extrair_lote, ler_bytes
+from .limpeza import gerar_chave_padronizada
+from .medicao import medir
+
+# ==========================================
+# CONSOLIDAÇÃO, DE-PARA E CLASSIFICAÇÃO
+# ==========================================
+# Resultados intermediários por conteúdo: um reenvio só relê o que mudou
+MAX_CONTABEIS_EM_MEMORIA = 4
+MAX_EXTRATOS_EM_MEMORIA = 5000
+# Acima dessa fração de contas afetadas, refazer o cruzamento inteiro sai mais barato
+FRACAO_MAXIMA_INCREMENTAL = 0.5
+
+_trava = threading.Lock()
+_contabeis = OrderedDict()  # (sha do CSV, tipo, sha do DE-PARA) -> DataFrame já com DE-PARA
+_extratos = OrderedDict()   # chave_extrato do PDF -> resultado de extrair_pdf_melhorado
+
+# Colunas de valor de cada lado do cruzamento (float64, zero onde a fonte não tem a conta)
+VALORES_SALDOS = ['Saldo_Contabil_CC', 'Saldo_Contabil_Aplic']
+VALORES_CONTABIL = VALORES_SALDOS + ['Rendimento_Contabil']
+VALORES_BANCO = ['Saldo_Banco_CC', 'Saldo_Banco_Aplic', 'Rendimento_Banco']
+DIFERENCAS = ['Diferenca_Saldo_CC', 'Diferenca_Saldo_Aplic', 'Diferenca_Rendimento']
+# Diferenças até esse valor (em módulo) são arredondamento, não divergência
+TOLERANCIA_DIVERGENCIA = 0.01
+
+
+def nome_arquivo(arquivo):
+    """Nome para o log: uploads têm .name; na linha de comando chegam caminhos."""
+    return os.path.basename(getattr(arquivo, 'name', None) or str(arquivo))
+
+def executar_processo(file_saldos, file_rendim, lista_arquivos_bancarios, num_workers=None, avisar=None,
+                      estado=None, medicoes=None, caminho_depara=CAMINHO_DEPARA, extraidos=None):
+    """Cruza contábil x extratos. Erros de leitura vão para avisar(msg) (st.error na tela).
+
+    `estado` é um dict que a chamada guarda entre execuções (na tela, em
+    st.session_state). Com ele, só as contas cujas entradas mudaram desde a
+    última execução são cruzadas de novo; o resto do df_final é reaproveitado.
+    Com `medicoes` (lista), cada etapa acrescenta uma linha de medição
+    (ver conciliacao.medicao). `caminho_depara` troca a planilha DE-PARA padrão.
+    `extraidos` traz resultados de PDFs já lidos (ver conciliacao.recepcao), na
+    ordem de lista_arquivos_bancarios, com None nos que ainda precisam ser lidos.
+    """
+    with medir(medicoes, 'DE-PARA') as linha:
+        df_depara = carregar_depara(caminho_depara)
+        sha_depara = _hash_tabela(df_depara)
+        linha['Linhas'] = len(df_depara)
+
+    with medir(medicoes, 'Hash das entradas contábeis'):
+        entradas_contabil = (_hash_entrada(file_saldos), _hash_entrada(file_rendim), sha_depara)
+
+    df_saldos = _ler_contabil(file_saldos, entradas_contabil[0], 'SALDO', df_depara, sha_depara, medicoes)
+    if df_saldos.empty:
+        if avisar: avisar("Erro na leitura do CSV de Saldos.")
+        return pd.DataFrame(), pd.DataFrame()
+
+    # O cruzamento contábil só é refeito se um dos CSVs (ou o DE-PARA) mudou
+    reaproveitar = estado is not None and estado.get('entradas_contabil') == entradas_contabil
+    if reaproveitar:
+        df_contabil = estado['df_contabil']
+    else:
+        df_rendim = _ler_contabil(file_rendim, entradas_contabil[1], 'RENDIMENTO', df_depara, sha_depara, medicoes)
+    with medir(medicoes, 'Cruzamento contábil', origem='reaproveitado' if reaproveitar else 'completo') as linha:
+        if not reaproveitar: df_contabil = _cruzar_contabil(df_saldos, df_rendim)
+        linha['Linhas'] = len(df_contabil)
+
+    # Leitura dos PDFs em paralelo; os resultados voltam na ordem de lista_arquivos_bancarios
+    with medir(medicoes, 'Extratos (lote)') as linha:
+        extraidos = extraidos or [None] * len(lista_arquivos_bancarios)
+        conteudos = [None if pronto is not None else (ler_bytes(item['arquivo']), item['tipo'])
+                     for item, pronto in zip(lista_arquivos_bancarios, extraidos)]
+        por_arquivo = [] if medicoes is not None else None
+        resultados = _extrair_com_memoria(conteudos, num_workers, por_arquivo, extraidos)
+        linha['Linhas'] = len(conteudos)
+    with medir(medicoes, 'Montagem dos extratos') as linha:
+        df_banco, df_log = _montar_banco(lista_arquivos_bancarios, resultados)
+        linha['Linhas'] = len(df_banco)
+
+    with medir(medicoes, 'Cruzamento final') as linha:
+        df_final = None
+        anterior = estado.get('df_final') if estado is not None else None
+        if anterior is not None:
+            afetadas = _chaves_alteradas(estado['df_contabil'], df_contabil, estado['df_banco'], df_banco)
+            if afetadas is not None and len(afetadas) <= FRACAO_MAXIMA_INCREMENTAL * max(len(anterior), 1):
+                df_final = _atualizar_final(anterior, afetadas, df_contabil, df_banco)
+                linha['Origem'] = f"incremental ({len(afetadas)} contas)"
+        if df_final is None:
+            df_final = _cruzar_final(df_contabil, df_banco)
+            linha['Origem'] = 'completo'
+        linha['Linhas'] = len(df_final)
+
+    if medicoes is not None:
+        for item, medida in zip(lista_arquivos_bancarios, por_arquivo):
+            medicoes.append(dict(medida, Etapa=f"PDF {item['banco']} {item['tipo']}", Item=nome_arquivo(item['arquivo'])))
+
+    if estado is not None:
+        estado.update(entradas_contabil=entradas_contabil, df_contabil=df_contabil,
+                      df_banco=df_banco, df_final=df_final)
+
+    cols = ['Descrição', 'Chave Primaria', 'Saldo_Contabil_CC', 'Saldo_Banco_CC', 'Diferenca_Saldo_CC',
+            'Saldo_Contabil_Aplic', 'Saldo_Banco_Aplic', 'Diferenca_Saldo_Aplic',
+            'Rendimento_Contabil', 'Rendimento_Banco', 'Diferenca_Rendimento']
+    colunas_finais = [c for c in cols if c in df_final.columns]
+    return df_final[colunas_finais], df_log
+
+def mascara_divergencias(df_final):
+    """Array booleano das contas com alguma diferença acima de TOLERANCIA_DIVERGENCIA."""
+    diferencas = df_final[[c for c in DIFERENCAS if c in df_final.columns]].to_numpy(dtype='float64')
+    return (np.abs(diferencas) > TOLERANCIA_DIVERGENCIA).any(axis=1)
+
+def impressao_entradas(file_saldos, file_rendim, lista_arquivos_bancarios, caminho_depara=CAMINHO_DEPARA):
+    """Identifica um conjunto de entradas pelo conteúdo: entradas iguais dão o mesmo resultado.
+
+    Os nomes dos PDFs entram junto porque aparecem no log de leitura.
+    """
+    return (_hash_entrada(file_saldos), _hash_entrada(file_rendim), _hash_tabela(carregar_depara(caminho_depara)),
+            VERSAO_PARSER, tuple((_hash_entrada(item['arquivo']), nome_arquivo(item['arquivo']), item['banco'], item['tipo'])
+                                 for item in lista_arquivos_bancarios))
+
+# ==========================================
+# ETAPAS DO CRUZAMENTO
+# ==========================================
+def _alinhar(fontes):
+    """Uma linha por conta, juntando todas as fontes de uma vez (sem merges encadeados).
+
+    `fontes` é uma lista de (df, colunas de valor, colunas de texto). As chaves
+    de todas as fontes viram códigos inteiros de um único índice de contas,
+    ordenado como o merge fazia; os valores são somados por código em arrays
+    float64 (0 onde a fonte não tem a conta) e os textos ficam com a primeira
+    linha da conta (NaN onde não há, em vez do 0 que o fillna punha). Linhas
+    sem chave (DE-PARA com Conta Nova em branco) ficam juntas numa conta sem
+    chave, no fim, como o merge fazia com as chaves ausentes.
+    """
+    chaves = [df['Chave Primaria'] if 'Chave Primaria' in df.columns else pd.Series([], dtype='str')
+              for df, _, _ in fontes]
+    codigos, contas = pd.factorize(pd.concat(chaves, ignore_index=True), sort=True, use_na_sentinel=False)
+    n = len(contas)
+
+    colunas = {'Chave Primaria': contas}
+    inicio = 0
+    for (df, valores, textos), chave in zip(fontes, chaves):
+        cod = codigos[inicio:inicio + len(chave)]
+        inicio += len(chave)
+        for col in valores:
+            pesos = df[col].to_numpy(dtype='float64', na_value=0.0) if col in df.columns else np.zeros(len(cod))
+            colunas[col] = np.bincount(cod, weights=pesos, minlength=n)
+        primeiras = None
+        for col in textos:
+            if primeiras is None: posicoes, primeiras = np.unique(cod, return_index=True)
+            texto = np.full(n, np.nan, dtype=object)
+            if col in df.columns: texto[posicoes] = df[col].to_numpy(dtype=object)[primeiras]
+            colunas[col] = texto
+    return pd.DataFrame(colunas)
+
+def _cruzar_contabil(df_saldos, df_rendim):
+    return _alinhar([(df_saldos, VALORES_SALDOS, ['Descrição_ERP']), (df_rendim, ['Rendimento_Contabil'], [])])
+
+def _montar_banco(lista_arquivos_bancarios, resultados):
+    """(df_banco somado por conta, df_log) a partir dos resultados de cada PDF."""
+    dados_banco = []
+    log_leitura = []
+
+    for item, res in zip(lista_arquivos_bancarios, resultados):
+        f = item['arquivo']
+        banco_nome = item['banco']
+        tipo_extrato = item['tipo']
+        
+        chave = gerar_chave_padronizada(res['Conta'])
+        
+        log_leitura.append({
+            'Arquivo': nome_arquivo(f), 
+            'Banco': banco_nome,
+            'Conta Lida': res['Conta'], 
+            'Chave Gerada': str(chave), 
+            'Saldo': res['Saldo'], 
+            'Rendimento': res['Rendimento'] if tipo_extrato == 'INV' else 0.0
+        })
+
+        if chave: 
+            dados_banco.append({
+                'Chave Primaria': chave, 
+                'Nome_Banco': banco_nome,
+                'Saldo_Banco_CC': res['Saldo'] if tipo_extrato == 'CC' else 0.0,
+                'Saldo_Banco_Aplic': res['Saldo'] if tipo_extrato == 'INV' else 0.0, 
+                'Rendimento_Banco': res['Rendimento'] if tipo_extrato == 'INV' else 0.0
+            })
+
+    df_log = pd.DataFrame(log_leitura)
+    # Vários extratos da mesma conta (CC + INV, meses...) são somados; fica o primeiro nome de banco
+    df_banco = _alinhar([(pd.DataFrame(dados_banco), VALORES_BANCO, ['Nome_Banco'])])
+    return df_banco, df_log
+
+def _cruzar_final(df_contabil, df_banco):
+    df_final = _alinhar([(df_contabil, VALORES_CONTABIL, ['Descrição_ERP']), (df_banco, VALORES_BANCO, ['Nome_Banco'])])
+
+    df_final['Descrição'] = identificar_bancos(df_final)
+    
+    df_final['Descrição'] = df_final['Descrição'].astype(str).str.upper().replace(['NAN', 'NONE', '0', ''], '-')
+
+    for contabil, banco, diferenca in zip(VALORES_CONTABIL, VALORES_BANCO, DIFERENCAS):
+        df_final[diferenca] = df_final[contabil].to_numpy() - df_final[banco].to_numpy()
+    return df_final
+
+# ==========================================
+# ATUALIZAÇÃO INCREMENTAL
+# ==========================================
+def _chaves_alteradas(contabil_antes, contabil_agora, banco_antes, banco_agora):
+    """Contas com alguma linha nova, removida ou diferente; None se a estrutura mudou."""
+    afetadas = set()
+    for antes, agora in ((contabil_antes, contabil_agora), (banco_antes, banco_agora)):
+        if antes is agora: continue
+        if list(antes.columns) != list(agora.columns) or not antes.dtypes.equals(agora.dtypes): return None
+        linhas_antes, linhas_agora = _linhas_com_hash(antes), _linhas_com_hash(agora)
+        afetadas.update(antes['Chave Primaria'][~linhas_antes.isin(linhas_agora)])
+        afetadas.update(agora['Chave Primaria'][~linhas_agora.isin(linhas_antes)])
+    return afetadas
+
+def _linhas_com_hash(df):
+    # Par (conta, hash da linha inteira): iguais nas duas execuções = linha inalterada
+    return pd.MultiIndex.from_arrays([df['Chave Primaria'], pd.util.hash_pandas_object(df, index=False)])
+
+def _atualizar_final(anterior, afetadas, df_contabil, df_banco):
+    """Refaz só as linhas das contas afetadas e as encaixa no df_final anterior."""
+    if not afetadas: return anterior
+    afetadas = list(afetadas)
+    novas = _cruzar_final(df_contabil[df_contabil['Chave Primaria'].isin(afetadas)],
+                          df_banco[df_banco['Chave Primaria'].isin(afetadas)])
+    if list(novas.columns) != list(anterior.columns): return None
+    mantidas = anterior[~anterior['Chave Primaria'].isin(afetadas)]
+    # O merge completo devolve as contas em ordem; a mesma ordem é refeita aqui
+    df_final = pd.concat([mantidas, novas], ignore_index=True)
+    return df_final.sort_values('Chave Primaria', kind='stable', ignore_index=True)
+
+# ==========================================
+# RESULTADOS INTERMEDIÁRIOS POR CONTEÚDO
+# ==========================================
+def _hash_entrada(arquivo):
+    if arquivo is None: return None
+    sha = hashlib.sha256()
+    if isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, 'rb') as fh:
+            for bloco in iter(lambda: fh.read(1024 * 1024), b''): sha.update(bloco)
+    else:
+        sha.update(ler_bytes(arquivo))
+    return sha.hexdigest()
+
+def _hash_tabela(df):
+    return hashlib.sha256(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes()).hexdigest()
+
+def _lembrar(memoria, chave, valor, limite):
+    with _trava:
+        memoria[chave] = valor
+        memoria.move_to_end(chave)
+        while len(memoria) > limite: memoria.popitem(last=False)
+
+def _ler_contabil(arquivo, sha, tipo, df_depara, sha_depara, medicoes=None):
+    """processar_contabil + DE-PARA, reaproveitando o resultado de um CSV já lido."""
+    if arquivo is None: return pd.DataFrame()
+    chave = (sha, tipo, sha_depara)
+    with _trava:
+        df = _contabeis.get(chave)
+        if df is not None: _contabeis.move_to_end(chave)
+    with medir(medicoes, f"CSV {tipo.capitalize()}", nome_arquivo(arquivo), 'memória' if df is not None else 'leitura') as linha:
+        if df is None:
+            df = processar_contabil(arquivo, tipo)
+            if not df.empty and not df_depara.empty:
+                df['Chave Primaria'] = aplicar_depara(df['Chave Primaria'], df_depara)
+            if not df.empty: _lembrar(_contabeis, chave, df, MAX_CONTABEIS_EM_MEMORIA)
+        linha['Linhas'] = len(df)
+        # Quem chama pode alterar o DataFrame; a cópia guardada fica intacta
+        return df.copy()
+
+def _extrair_com_memoria(conteudos, num_workers, medicoes=None, extraidos=None):
+    """extrair_lote só para os PDFs que ainda não foram lidos (aqui ou na recepção)."""
+    extraidos = extraidos or [None] * len(conteudos)
+    chaves = [chave_extrato(*item) if item is not None else None for item in conteudos]
+    with _trava:
+        resultados = [pronto if pronto is not None else _extratos.get(chave) for pronto, chave in zip(extraidos, chaves)]
+    faltantes = [i for i, res in enumerate(resultados) if res is None]
+    medidas = [{'Origem': 'recepção' if pronto is not None else 'memória'} for pronto in extraidos]
+    lidas = [] if medicoes is not None else None
+    lidos = extrair_lote([conteudos[i] for i in faltantes], num_workers=num_workers, medicoes=lidas)
+    for n, (i, res) in enumerate(zip(faltantes, lidos)):
+        resultados[i] = res
+        if lidas is not None: medidas[i] = lidas[n]
+        if res['Conta'] != "Erro": _lembrar(_extratos, chaves[i], res, MAX_EXTRATOS_EM_MEMORIA)
+    if medicoes is not None: medicoes.extend(medidas)
+    return resultados
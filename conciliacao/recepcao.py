@@ -0,0 +1,155 @@
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from .extrato_pdf import TIMEOUT_PDF, WORKERS_PDF, extrair_lote, ler_bytes, resultado_erro
+from .processo import nome_arquivo
+
+# Situação de cada extrato na fila e a fração de progresso mostrada na tela
+NA_FILA, LENDO, LIDO, ERRO = 'Na fila', 'Lendo', 'Lido', 'Erro'
+PROGRESSO = {NA_FILA: 0.0, LENDO: 0.5, LIDO: 1.0, ERRO: 1.0}
+
+# Cada leitura se limita a TIMEOUT_PDF dentro do processo; o executor marca como
+# "rodando" também a próxima da fila, então uma tarefa só é dada como presa depois
+# de duas leituras completas e uma folga
+LIMITE_TAREFA_S = 2 * TIMEOUT_PDF + 10
+
+_trava = threading.Lock()
+_executor = None
+_rodando = {}  # Future -> instante em que foi visto rodando pela primeira vez
+_vigia = None
+
+
+# ==========================================
+# RECEPÇÃO EM SEGUNDO PLANO DOS EXTRATOS
+# ==========================================
+# A leitura de cada PDF começa assim que ele chega ao upload. A fila é um
+# dict guardado pela chamada entre execuções (na tela, em st.session_state):
+# identidade do arquivo -> situação e Future com (resultado, medição).
+def agendar(funcao, *args):
+    """Future de funcao(*args) num dos processos de leitura, compartilhados por todas as sessões."""
+    global _executor, _vigia
+    with _trava:
+        if _vigia is None:
+            _vigia = threading.Thread(target=_vigiar, name="recepcao-vigia", daemon=True)
+            _vigia.start()
+        for _ in range(2):
+            if _executor is None: _executor = ProcessPoolExecutor(max_workers=WORKERS_PDF)
+            try:
+                futuro = _executor.submit(funcao, *args)
+                _rodando[futuro] = None
+                return futuro
+            except BrokenProcessPool:
+                # Um processo de leitura morreu (ex.: falta de memória): o próximo envio usa um executor novo
+                _executor = None
+        raise BrokenProcessPool("não foi possível iniciar os processos de leitura")
+
+def _estourar(sinal, quadro):
+    raise TimeoutError(f"Tempo limite de leitura excedido ({TIMEOUT_PDF:.0f}s)")
+
+def _ler(conteudo, tipo):
+    # Roda num processo de leitura: cache em disco, extração e medição, como no lote.
+    # O tempo limite é um alarme (SIGALRM) neste mesmo processo: o PDF demorado vira
+    # erro e o processo fica livre para o próximo. Preso dentro do MuPDF, o alarme
+    # só dispara na volta ao Python; aí quem resolve é o vigia, trocando o executor.
+    alarme = hasattr(signal, 'setitimer')
+    if alarme:
+        anterior = signal.signal(signal.SIGALRM, _estourar)
+        signal.setitimer(signal.ITIMER_REAL, TIMEOUT_PDF)
+    try:
+        medicoes = []
+        resultado = extrair_lote([(conteudo, tipo)], timeout=None, medicoes=medicoes)[0]
+        return resultado, medicoes[0]
+    except TimeoutError as e:
+        return resultado_erro(str(e)), {'Etapa': 'PDF', 'Origem': 'erro'}
+    finally:
+        if alarme:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, anterior)
+
+def _descartar(executor):
+    # Antes do Python 3.14 não há terminate_workers(): os processos são encerrados diretamente
+    encerrar = getattr(executor, 'terminate_workers', None)
+    if encerrar is not None:
+        encerrar()
+        return
+    for processo in list((getattr(executor, '_processes', None) or {}).values()): processo.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+def _vigiar():
+    # Rede de segurança do servidor: se uma tarefa passar muito do tempo limite
+    # (processo de leitura travado fora do PDF), o executor inteiro é trocado. As
+    # leituras que estavam nele terminam em erro e são refeitas ao processar.
+    global _executor
+    while True:
+        time.sleep(1)
+        agora = time.monotonic()
+        with _trava:
+            for futuro in [f for f in _rodando if f.done()]: del _rodando[futuro]
+            for futuro in _rodando:
+                if _rodando[futuro] is None and futuro.running(): _rodando[futuro] = agora
+            presa = any(inicio is not None and agora - inicio > LIMITE_TAREFA_S for inicio in _rodando.values())
+            if not presa or _executor is None: continue
+            executor, _executor = _executor, None
+            _rodando.clear()
+        _descartar(executor)
+
+def identidade(arquivo, tipo):
+    """Chave do arquivo na fila: file_id do upload (ou nome e tamanho) e tipo do extrato."""
+    id_arquivo = getattr(arquivo, 'file_id', None) or (nome_arquivo(arquivo), getattr(arquivo, 'size', None))
+    return (id_arquivo, tipo)
+
+def receber(fila, lista_arquivos_bancarios):
+    """Agenda a leitura dos arquivos ainda não vistos e tira da fila os que saíram dos uploads."""
+    presentes = set()
+    for item in lista_arquivos_bancarios:
+        chave = identidade(item['arquivo'], item['tipo'])
+        presentes.add(chave)
+        if chave in fila: continue
+        conteudo = ler_bytes(item['arquivo'])
+        fila[chave] = {'Arquivo': nome_arquivo(item['arquivo']), 'Banco': item['banco'], 'Tipo': item['tipo'],
+                       'Tamanho (KB)': round(len(conteudo) / 1024, 1),
+                       'futuro': agendar(_ler, conteudo, item['tipo'])}
+    for chave in [c for c in fila if c not in presentes]:
+        fila.pop(chave)['futuro'].cancel()
+
+def _situacao(futuro):
+    if not futuro.done(): return LENDO if futuro.running() else NA_FILA
+    if futuro.cancelled() or futuro.exception() is not None: return ERRO
+    return ERRO if futuro.result()[0]['Conta'] == "Erro" else LIDO
+
+def pendentes(fila):
+    return sum(not entrada['futuro'].done() for entrada in fila.values())
+
+def situacao_recepcao(fila):
+    """Uma linha por arquivo da fila, para a tabela de acompanhamento."""
+    linhas = []
+    for entrada in fila.values():
+        futuro = entrada['futuro']
+        estado = _situacao(futuro)
+        linha = {k: v for k, v in entrada.items() if k != 'futuro'}
+        linha.update({'Situação': estado, 'Progresso': PROGRESSO[estado], 'Conta Lida': None, 'Tempo (s)': None})
+        if futuro.done() and not futuro.cancelled() and futuro.exception() is None:
+            resultado, medicao = futuro.result()
+            linha.update({'Conta Lida': resultado['Conta'], 'Tempo (s)': medicao.get('Tempo (s)')})
+        linhas.append(linha)
+    return linhas
+
+def resultados_recebidos(fila, lista_arquivos_bancarios, timeout=TIMEOUT_PDF):
+    """Resultados na ordem de lista_arquivos_bancarios, esperando os que ainda estão sendo lidos.
+
+    Fica None o arquivo que não está na fila, cujo processo falhou ou que não
+    terminou em `timeout` segundos (contados da chamada): executar_processo lê
+    esses de novo, no lote com tempo limite.
+    """
+    limite = time.monotonic() + timeout
+    resultados = []
+    for item in lista_arquivos_bancarios:
+        entrada = fila.get(identidade(item['arquivo'], item['tipo']))
+        try:
+            resultados.append(entrada['futuro'].result(timeout=max(0.0, limite - time.monotonic()))[0] if entrada else None)
+        except Exception:  # tempo esgotado, cancelado ou processo de leitura perdido
+            resultados.append(None)
+    return resultados
@@ -0,0 +1,279 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+from xlsxwriter.utility import xl_col_to_name
+
+# O ReportLab só é importado quando um PDF é gerado, para que o pacote
+# carregue rápido (processos de leitura, linha de comando)
+
+from .limpeza import formatar_moedas_br
+from .medicao import medir
+
+# Altura (pt) do cabeçalho de duas linhas e de cada linha de dados da tabela do PDF
+ALTURA_CABECALHO_PDF = 39
+ALTURA_LINHA_PDF = 18
+# Descrições mais longas que isso são cortadas para caber na coluna fixa
+MAX_CARACTERES_TEXTO_PDF = 40
+
+# Quantos resultados (impressões digitais) guardam seus relatórios já gerados
+MAX_RELATORIOS_EM_MEMORIA = 8
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="relatorios")
+_trava = threading.Lock()
+_gerados = OrderedDict()  # (impressao_digital, tipo) -> Future com os bytes
+_medidos = {}             # (impressao_digital, tipo) -> medição da geração
+
+
+# ==========================================
+# TABELA DO RELATÓRIO (cabeçalho em dois níveis)
+# ==========================================
+MAPA_COLUNAS_RELATORIO = {
+    'Unidade': ('Dados', 'Unidade'),
+    'Descrição': ('Dados', 'Banco / Descrição'), 
+    'Chave Primaria': ('Dados', 'Conta Reduzida'),
+    'Saldo_Contabil_CC': ('Conta Corrente', 'Contábil'), 
+    'Saldo_Banco_CC': ('Conta Corrente', 'Banco'), 
+    'Diferenca_Saldo_CC': ('Conta Corrente', 'Diferença'),
+    'Saldo_Contabil_Aplic': ('Aplicação', 'Contábil'), 
+    'Saldo_Banco_Aplic': ('Aplicação', 'Banco'), 
+    'Diferenca_Saldo_Aplic': ('Aplicação', 'Diferença'),
+    'Rendimento_Contabil': ('Rendimentos', 'Contábil'), 
+    'Rendimento_Banco': ('Rendimentos', 'Banco'), 
+    'Diferenca_Rendimento': ('Rendimentos', 'Diferença')
+}
+
+def tabela_relatorio(df_final):
+    """df_final com as colunas do relatório, no MultiIndex usado na tela, no Excel e no PDF.
+
+    Com copy-on-write a tabela compartilha os dados do df_final: nada é copiado.
+    """
+    cols_existentes = [c for c in df_final.columns if c in MAPA_COLUNAS_RELATORIO]
+    df_display = df_final[cols_existentes]
+    df_display.columns = pd.MultiIndex.from_tuples([MAPA_COLUNAS_RELATORIO[c] for c in df_display.columns])
+    return df_display
+
+
+# ==========================================
+# GERAÇÃO SOB DEMANDA DOS RELATÓRIOS
+# ==========================================
+def impressao_digital(df):
+    """Hash do conteúdo (valores, índice e colunas) de um DataFrame."""
+    sha = hashlib.sha256()
+    sha.update(repr(list(df.columns)).encode())
+    sha.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return sha.hexdigest()
+
+def preparar_relatorio(chave, tipo, gerador, *args):
+    """Agenda `gerador(*args)` em segundo plano, uma única vez por (chave, tipo)."""
+    with _trava:
+        futuro = _gerados.get((chave, tipo))
+        if futuro is None or (futuro.done() and futuro.exception() is not None):
+            futuro = _executor.submit(_gerar_medindo, chave, tipo, gerador, *args)
+            _gerados[(chave, tipo)] = futuro
+        _gerados.move_to_end((chave, tipo))
+        while len(_gerados) > 2 * MAX_RELATORIOS_EM_MEMORIA:
+            _medidos.pop(_gerados.popitem(last=False)[0], None)
+        return futuro
+
+def _gerar_medindo(chave, tipo, gerador, *args):
+    medicoes = []
+    with medir(medicoes, 'Exportação', tipo) as linha:
+        if args and hasattr(args[0], '__len__'): linha['Linhas'] = len(args[0])
+        conteudo = gerador(*args)
+    with _trava:
+        if (chave, tipo) in _gerados: _medidos[(chave, tipo)] = medicoes[0]
+    return conteudo
+
+def medicoes_relatorios(chave):
+    """Medições dos relatórios desta impressão digital que já terminaram de ser gerados."""
+    with _trava:
+        return [dict(linha) for (c, _), linha in _medidos.items() if c == chave]
+
+def relatorio_sob_demanda(chave, tipo, gerador, *args):
+    """Função sem argumentos que devolve os bytes do relatório (para st.download_button)."""
+    return lambda: preparar_relatorio(chave, tipo, gerador, *args).result()
+
+
+# ==========================================
+# GERADORES DE ARQUIVO (Excel e PDF)
+# ==========================================
+def to_excel_styled(df):
+    """Gera Excel com formatação profissional, bordas e cores.
+
+    A planilha é gravada linha a linha pelo xlsxwriter (constant_memory): os
+    formatos são registrados uma única vez e compartilhados, e as cores de
+    negativos e divergências vêm de formatação condicional.
+    """
+    output = io.BytesIO()
+    
+    wb = xlsxwriter.Workbook(output, {
+        'constant_memory': True,
+        'strings_to_formulas': False,
+        'strings_to_urls': False,
+        'nan_inf_to_errors': True,
+    })
+    ws = wb.add_worksheet("Conciliação")
+
+    # Estilos
+    header_fmt = wb.add_format({'bold': True, 'font_name': 'Calibri', 'font_size': 11, 'bg_color': '#D9D9D9',
+                                'align': 'center', 'valign': 'vcenter', 'border': 1})
+    text_fmt = wb.add_format({'border': 1})
+    number_fmt = wb.add_format({'border': 1, 'num_format': '#,##0.00'})
+    negativo_fmt = wb.add_format({'font_color': '#FF0000'})
+    divergencia_fmt = wb.add_format({'font_color': '#FF0000', 'bold': True})
+    
+    # Extrai headers do MultiIndex
+    headers_lvl0 = [c[0] for c in df.columns]
+    headers_lvl1 = [c[1] for c in df.columns]
+    formatos = [number_fmt if pd.api.types.is_numeric_dtype(df.iloc[:, j]) else text_fmt for j in range(len(df.columns))]
+
+    # Ajuste de largura das colunas
+    if len(df.columns): ws.set_column(0, len(df.columns) - 1, 18)
+    
+    # Escreve Linha 1 (Categorias) e Linha 2 (Detalhes)
+    ws.write_row(0, 0, headers_lvl0, header_fmt)
+    ws.write_row(1, 0, headers_lvl1, header_fmt)
+
+    # Escreve Dados
+    colunas = [df.iloc[:, j].tolist() for j in range(len(df.columns))]
+    for r_idx, row in enumerate(zip(*colunas), 2):
+        for c_idx, value in enumerate(row):
+            ws.write(r_idx, c_idx, value, formatos[c_idx])
+
+    # Negativos em vermelho; diferenças acima de 1 centavo em vermelho e negrito
+    ultima_linha = len(df) + 1
+    if len(df):
+        for c_idx, fmt in enumerate(formatos):
+            if fmt is not number_fmt: continue
+            if "Diferença" in headers_lvl1[c_idx]:
+                letra = xl_col_to_name(c_idx)
+                ws.conditional_format(2, c_idx, ultima_linha, c_idx, {
+                    'type': 'formula', 'criteria': f'=ABS({letra}3)>0.01',
+                    'format': divergencia_fmt, 'stop_if_true': True})
+            ws.conditional_format(2, c_idx, ultima_linha, c_idx, {
+                'type': 'cell', 'criteria': '<', 'value': -0.01, 'format': negativo_fmt})
+
+    wb.close()
+    return output.getvalue()
+
+def to_pdf(df):
+    """Gera PDF em paisagem com tabela zebrada.
+
+    As colunas são formatadas de uma vez, as larguras e alturas são fixas e a
+    tabela é dividida em blocos do tamanho de uma página, cada um com o
+    cabeçalho repetido; assim o ReportLab não precisa medir nem quebrar
+    tabelas grandes.
+    """
+    from reportlab.lib.pagesizes import letter, landscape
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=landscape(letter), rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
+    
+    elements = []
+    
+    # Título
+    styles = getSampleStyleSheet()
+    title_style = styles['Heading1']
+    title_style.alignment = 1 # Center
+    titulo = Paragraph("Relatório de Conciliação Contábil", title_style)
+    elements.append(titulo)
+    elements.append(Spacer(1, 12))
+
+    # Achata o cabeçalho MultiIndex
+    headers = [f"{c[0]}\n{c[1]}" for c in df.columns]
+
+    # Formata cada coluna inteira: números no padrão BR, o resto como texto
+    colunas = []
+    for j in range(len(df.columns)):
+        serie = df.iloc[:, j]
+        if pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie):
+            colunas.append(formatar_moedas_br(serie))
+        else:
+            texto = serie.astype(object).map(str)
+            longo = texto.str.len() > MAX_CARACTERES_TEXTO_PDF
+            colunas.append(texto.where(~longo, texto.str.slice(0, MAX_CARACTERES_TEXTO_PDF - 1) + "…"))
+    linhas = [list(r) for r in zip(*(c.tolist() for c in colunas))]
+
+    # Negativos em vermelho: mesmo critério do texto formatado ("-" ou "(", exceto "0,00");
+    # as colunas de texto (Unidade, Descrição, Conta) ficam de fora
+    negativos = [((c.str.contains("-", regex=False) | c.str.contains("(", regex=False)) & (c != "0,00")).to_numpy()
+                 if pd.api.types.is_numeric_dtype(df.iloc[:, j]) and not pd.api.types.is_bool_dtype(df.iloc[:, j]) else None
+                 for j, c in enumerate(colunas)]
+
+    larguras = _larguras_colunas(headers, colunas, doc.width)
+
+    # Linhas por página: a primeira divide espaço com o título
+    util = doc.height - 12  # padding do frame
+    altura_titulo = titulo.wrap(doc.width, util)[1] + title_style.spaceBefore + title_style.spaceAfter + 12
+    cabem_primeira = max(1, int((util - altura_titulo - ALTURA_CABECALHO_PDF) // ALTURA_LINHA_PDF))
+    cabem_demais = max(1, int((util - ALTURA_CABECALHO_PDF) // ALTURA_LINHA_PDF))
+
+    inicio = 0
+    while inicio < len(linhas) or inicio == 0:
+        fim = min(len(linhas), inicio + (cabem_primeira if inicio == 0 else cabem_demais))
+        elements.append(_tabela_pdf(headers, linhas[inicio:fim], negativos, inicio, larguras))
+        inicio = fim
+        if fim == len(linhas): break
+    
+    doc.build(elements)
+    return buffer.getvalue()
+
+def _larguras_colunas(headers, colunas, largura_disponivel):
+    """Largura fixa por coluna: o maior entre cabeçalho e valor mais longo, ajustada à página."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    larguras = []
+    for header, coluna in zip(headers, colunas):
+        largura = max(stringWidth(parte, 'Helvetica-Bold', 8) for parte in header.split("\n"))
+        if len(coluna):
+            mais_longo = coluna.iloc[int(coluna.str.len().to_numpy().argmax())]
+            largura = max(largura, stringWidth(mais_longo, 'Helvetica', 7))
+        larguras.append(largura + 12)
+    total = sum(larguras)
+    if total > largura_disponivel:
+        larguras = [l * largura_disponivel / total for l in larguras]
+    return larguras
+
+def _tabela_pdf(headers, linhas, negativos, inicio, larguras):
+    from reportlab.lib import colors
+    from reportlab.platypus import Table, TableStyle
+
+    t = Table([headers] + linhas, colWidths=larguras,
+              rowHeights=[ALTURA_CABECALHO_PDF] + [ALTURA_LINHA_PDF] * len(linhas), repeatRows=1)
+
+    # Zebra contínua entre blocos: a cor da primeira linha depende da posição no relatório
+    zebra = [colors.white, colors.whitesmoke] if inicio % 2 == 0 else [colors.whitesmoke, colors.white]
+    style = TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 8),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('ROWBACKGROUNDS', (0, 1), (-1, -1), zebra),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 7),
+    ])
+    # Texto à esquerda, valores à direita
+    for j, mascara in enumerate(negativos):
+        style.add('ALIGN', (j, 1), (j, -1), 'LEFT' if mascara is None else 'RIGHT')
+
+    # Pinta texto de vermelho se negativo: um comando por sequência de linhas negativas
+    fim = inicio + len(linhas)
+    for j, mascara in enumerate(negativos):
+        if mascara is None: continue
+        trecho = np.concatenate(([False], mascara[inicio:fim], [False])).astype(np.int8)
+        bordas = np.flatnonzero(np.diff(trecho))
+        for comeco, final in zip(bordas[::2], bordas[1::2]):
+            style.add('TEXTCOLOR', (j, comeco + 1), (j, final), colors.red)
+
+    t.setStyle(style)
+    return t
@@ -0,0 +1,109 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import numpy as np
+import pandas as pd
+
+# Orçamento de memória (MB) e validade (s) dos resultados guardados no servidor,
+# compartilhados por todas as sessões
+LIMITE_RESULTADOS_MB = float(os.environ.get("CONCILIACAO_RESULTADOS_MB", "512"))
+VALIDADE_RESULTADOS_S = float(os.environ.get("CONCILIACAO_RESULTADOS_TTL", "3600"))
+
+# Origem do resultado devolvido por resultado_compartilhado
+ACERTO, AGUARDADO, CALCULADO = 'acerto', 'aguardado', 'calculado'
+
+_trava = threading.Lock()
+_guardados = OrderedDict()  # impressão das entradas -> (instante, MB, resultado)
+_em_andamento = {}          # impressão das entradas -> Future do cálculo em curso
+_contagem = {ACERTO: 0, AGUARDADO: 0, CALCULADO: 0}
+
+
+# ==========================================
+# RESULTADOS COMPARTILHADOS ENTRE SESSÕES
+# ==========================================
+def tamanho_mb(valor):
+    """Memória aproximada de um resultado (DataFrames, arrays, bytes e coleções deles)."""
+    if isinstance(valor, pd.DataFrame): return float(valor.memory_usage(deep=True).sum()) / 2**20
+    if isinstance(valor, np.ndarray): return valor.nbytes / 2**20
+    if isinstance(valor, (bytes, bytearray, str)): return len(valor) / 2**20
+    if isinstance(valor, dict): return sum(tamanho_mb(v) for v in valor.values())
+    if isinstance(valor, (list, tuple)): return sum(tamanho_mb(v) for v in valor)
+    return 0.0
+
+def _podar(agora):
+    # Vencidos primeiro; depois os usados há mais tempo, até caber no orçamento
+    for chave in [c for c, (instante, _, _) in _guardados.items() if agora - instante > VALIDADE_RESULTADOS_S]:
+        del _guardados[chave]
+    while _guardados and sum(mb for _, mb, _ in _guardados.values()) > LIMITE_RESULTADOS_MB:
+        _guardados.popitem(last=False)
+
+def resultado_guardado(chave):
+    """Resultado ainda válido para estas entradas, ou None (sem contar acerto/falha)."""
+    with _trava:
+        _podar(time.monotonic())
+        guardado = _guardados.get(chave)
+        if guardado is None: return None
+        _guardados.move_to_end(chave)
+        return guardado[2]
+
+def resultado_compartilhado(chave, calcular, recalcular=False):
+    """(resultado, origem): o guardado, o de outra sessão que já está calculando, ou calcular().
+
+    Entradas iguais nunca são calculadas duas vezes ao mesmo tempo: quem chega
+    depois espera o cálculo em curso. Um resultado None (falha) não é guardado,
+    nem um que sozinho passe de LIMITE_RESULTADOS_MB. O resultado é o mesmo
+    objeto para todas as sessões e não deve ser alterado.
+
+    Com recalcular=True (execução instrumentada, ex.: com perfil) o cálculo é só
+    desta chamada: não espera nem serve outras sessões e não é guardado.
+    """
+    if recalcular:
+        with _trava: _contagem[CALCULADO] += 1
+        return calcular(), CALCULADO
+    with _trava:
+        _podar(time.monotonic())
+        guardado = _guardados.get(chave)
+        futuro = _em_andamento.get(chave)
+        if guardado is not None:
+            _guardados.move_to_end(chave)
+            _contagem[ACERTO] += 1
+            return guardado[2], ACERTO
+        calculando = futuro is None
+        if calculando:
+            futuro = _em_andamento[chave] = Future()
+        _contagem[CALCULADO if calculando else AGUARDADO] += 1
+    if not calculando:
+        try:
+            return futuro.result(), AGUARDADO
+        except BaseException:
+            # O cálculo da outra sessão foi interrompido: esta calcula por conta própria
+            return resultado_compartilhado(chave, calcular)
+
+    try:
+        resultado = calcular()
+    except BaseException as e:
+        with _trava:
+            if _em_andamento.get(chave) is futuro: del _em_andamento[chave]
+        futuro.set_exception(e)
+        raise
+    mb = tamanho_mb(resultado)
+    with _trava:
+        if resultado is not None and mb <= LIMITE_RESULTADOS_MB:
+            _guardados[chave] = (time.monotonic(), mb, resultado)
+            _guardados.move_to_end(chave)
+            _podar(time.monotonic())
+        if _em_andamento.get(chave) is futuro: del _em_andamento[chave]
+    futuro.set_result(resultado)
+    return resultado, CALCULADO
+
+def situacao_resultados():
+    """Ocupação e contagem de acertos do cache de resultados, para a tela."""
+    with _trava:
+        _podar(time.monotonic())
+        return {'Resultados guardados': len(_guardados),
+                'Memória (MB)': round(sum(mb for _, mb, _ in _guardados.values()), 1),
+                'Limite (MB)': LIMITE_RESULTADOS_MB, 'Validade (s)': VALIDADE_RESULTADOS_S,
+                'Acertos': _contagem[ACERTO], 'Aguardados': _contagem[AGUARDADO], 'Calculados': _contagem[CALCULADO]}
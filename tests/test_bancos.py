@@ -0,0 +1,33 @@
+"""identificar_bancos deve classificar cada conta como a versão antiga, linha a linha."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_bancos import df_final_sintetico, identificar_banco_por_texto
+from conciliacao.bancos import identificar_bancos
+
+
+@pytest.mark.parametrize('semente', range(5))
+def test_igual_a_classificacao_linha_a_linha(semente):
+    df = df_final_sintetico(20_000, semente)
+    esperado = df.apply(identificar_banco_por_texto, axis=1)
+    obtido = identificar_bancos(df)
+    assert obtido.dtype == object
+    assert obtido.tolist() == esperado.tolist()
+    assert obtido.index.equals(df.index)
+
+
+def test_casos_de_borda():
+    df = pd.DataFrame({
+        'Nome_Banco': pd.Series([np.nan, 'nan', 0, 'Caixa Econômica', None, None, None], dtype=object),
+        'Descrição_ERP': pd.Series(['FUNDO BB RF', 'cef - fundo', 'ag 001', 'BB ', None, np.nan, 'xyz'], dtype=object),
+    })
+    esperado = df.apply(identificar_banco_por_texto, axis=1).tolist()
+    assert identificar_bancos(df).tolist() == esperado
+    assert esperado == ["BANCO DO BRASIL", "CAIXA ECONÔMICA", "BANCO DO BRASIL", "CAIXA ECONÔMICA", "NONE", "NAN", "XYZ"]
+
+
+def test_colunas_ausentes():
+    # Sem Nome_Banco (nenhum PDF) a descrição decide; sem Descrição_ERP fica vazio
+    assert identificar_bancos(pd.DataFrame({'Descrição_ERP': ['Caixa 1']})).tolist() == ["CAIXA ECONÔMICA"]
+    assert identificar_bancos(pd.DataFrame({'Nome_Banco': [None]})).tolist() == [""]
@@ -0,0 +1,72 @@
+"""Leitura em blocos dos CSVs contábeis: o resultado não depende do tamanho do bloco."""
+import pandas as pd
+import pytest
+
+from benchmarks.sinteticos import contas_sinteticas, csv_rendimentos, csv_saldos
+from conciliacao import contabil
+from conciliacao.contabil import processar_contabil
+from conciliacao.limpeza import gerar_chave_padronizada, limpar_valor_monetario
+
+BLOCOS = [3, 50, 200_000]
+
+
+def variantes(tmp_path):
+    """(nome, caminho, tipo, linha do cabeçalho, coluna de chave, coluna de valor, coluna contábil)."""
+    contas = contas_sinteticas(40)
+    saldos, rendimentos = tmp_path / "saldos.csv", tmp_path / "rendimentos.csv"
+    csv_saldos(saldos, 300, contas)
+    csv_rendimentos(rendimentos, 120, contas)
+    texto_saldos = saldos.read_text(encoding='latin-1').splitlines(keepends=True)
+
+    # Sem a coluna Item Contábil e, nessa versão, também sem a linha de título. (Com o título
+    # ausente, a primeira linha de dados é lida como cabeçalho; nela não pode haver "Conta".)
+    sem_contabil = tmp_path / "sem_contabil.csv"
+    sem_contabil.write_text("".join(";".join(l.rstrip("\n").split(";")[:1] + l.rstrip("\n").split(";")[2:]) + "\n"
+                                    for l in texto_saldos), encoding='latin-1')
+    sem_titulo = tmp_path / "sem_titulo.csv"
+    sem_titulo.write_text("".join(sem_contabil.read_text(encoding='latin-1').splitlines(keepends=True)[1:]), encoding='latin-1')
+    return [
+        ('saldos', str(saldos), 'SALDO', 1, 'Domicílio bancário', 'Saldo Final', 'Item Contábil'),
+        ('sem título', str(sem_titulo), 'SALDO', 0, 'Domicílio bancário', 'Saldo Final', None),
+        ('sem conta contábil', str(sem_contabil), 'SALDO', 1, 'Domicílio bancário', 'Saldo Final', None),
+        ('rendimentos', str(rendimentos), 'RENDIMENTO', 1, 'Domicílio bancário', 'Valor', None),
+    ]
+
+
+def somas_esperadas(caminho, header, col_chave, col_valor, col_contabil):
+    """Referência escalar, com o arquivo inteiro: soma por (conta[, item contábil])."""
+    df = pd.read_csv(caminho, encoding='latin-1', sep=';', header=header, dtype=str)
+    df['Chave Primaria'] = df[col_chave].map(gerar_chave_padronizada)
+    df = df.dropna(subset=['Chave Primaria'])
+    df['Valor'] = df[col_valor].map(limpar_valor_monetario)
+    return df.groupby(['Chave Primaria'] + ([col_contabil] if col_contabil else []))['Valor'].sum()
+
+
+def test_blocos_de_qualquer_tamanho_dao_o_mesmo_resultado(tmp_path, monkeypatch):
+    for nome, caminho, tipo, header, col_chave, col_valor, col_contabil in variantes(tmp_path):
+        resultados = []
+        for linhas in BLOCOS:
+            monkeypatch.setattr(contabil, 'LINHAS_POR_BLOCO_CSV', linhas)
+            resultados.append(processar_contabil(caminho, tipo))
+        assert not resultados[0].empty, nome
+        for resultado in resultados[1:]:
+            pd.testing.assert_frame_equal(resultado, resultados[0], check_exact=False, rtol=1e-12, obj=nome)
+
+        df = resultados[0].set_index('Chave Primaria')
+        esperado = somas_esperadas(caminho, header, col_chave, col_valor, col_contabil)
+        if tipo == 'RENDIMENTO':
+            pd.testing.assert_series_equal(df['Rendimento_Contabil'], esperado, check_names=False, check_index_type=False)
+        elif col_contabil:
+            por_item = esperado.unstack(col_contabil).fillna(0.0)
+            pd.testing.assert_series_equal(df['Saldo_Contabil_CC'], por_item['1111119 - Conta Movimento'], check_names=False, check_index_type=False)
+            pd.testing.assert_series_equal(df['Saldo_Contabil_Aplic'], por_item['1111150 - Aplicação Financeira'], check_names=False, check_index_type=False)
+        else:
+            pd.testing.assert_series_equal(df['Saldo_Contabil_CC'], esperado, check_names=False, check_index_type=False)
+            assert (df['Saldo_Contabil_Aplic'] == 0.0).all()
+
+
+@pytest.mark.parametrize('tipo', ['SALDO', 'RENDIMENTO'])
+def test_arquivo_aberto_e_caminho(tmp_path, tipo):
+    caminho = variantes(tmp_path)[0 if tipo == 'SALDO' else 3][1]
+    with open(caminho, 'rb') as fh: aberto = processar_contabil(fh, tipo)
+    pd.testing.assert_frame_equal(aberto, processar_contabil(caminho, tipo))
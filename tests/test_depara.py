@@ -0,0 +1,55 @@
+"""DE-PARA com Conta Nova em branco: a conta fica sem chave, nunca com a chave "nan"."""
+import functools
+
+import pandas as pd
+import pytest
+
+from benchmarks.sinteticos import contas_sinteticas, csv_saldos
+from conciliacao import depara, processo
+from conciliacao.depara import ABA_DEPARA, aplicar_depara, carregar_depara
+
+
+@pytest.fixture
+def contas():
+    return contas_sinteticas(20)
+
+
+@pytest.fixture
+def planilha(tmp_path, contas, monkeypatch):
+    """DE-PARA de duas linhas: a primeira sem conta nova; artefato compilado só dentro de tmp_path."""
+    caminho = tmp_path / "depara.xlsx"
+    pd.DataFrame({'Conta Antiga': [f"600{contas[0]}", f"600{contas[1]}"],
+                  'Conta Nova': [None, f"575{contas[2]}"]}).to_excel(caminho, sheet_name=ABA_DEPARA, index=False)
+    compilado = str(tmp_path / "depara.npz")
+    monkeypatch.setattr(depara, '_carregadas', {})
+    monkeypatch.setattr(processo, 'carregar_depara', functools.partial(carregar_depara, compilado=compilado))
+    return str(caminho), compilado
+
+
+def test_conta_nova_em_branco_fica_sem_chave(planilha, contas, monkeypatch):
+    caminho, compilado = planilha
+    primeira = carregar_depara(caminho, compilado)
+    # Segunda leitura vem do artefato compilado em disco
+    monkeypatch.setattr(depara, '_carregadas', {})
+    do_artefato = carregar_depara(caminho, compilado)
+
+    for tabela in (primeira, do_artefato):
+        novas = dict(zip(tabela['Chave Antiga'], tabela['Chave Nova']))
+        assert novas[contas[0]] is None
+        assert novas[contas[1]] == contas[2]
+        trocadas = aplicar_depara(pd.Series([contas[0], contas[1], contas[3]], dtype=object), tabela)
+        assert pd.isna(trocadas.iloc[0])
+        assert trocadas.iloc[1:].tolist() == [contas[2], contas[3]]
+
+
+def test_executar_processo_sem_chave_nan(planilha, contas, tmp_path):
+    caminho, _ = planilha
+    saldos = tmp_path / "saldos.csv"
+    csv_saldos(saldos, 20, contas)
+
+    df_final, _ = processo.executar_processo(str(saldos), None, [], caminho_depara=caminho)
+    chaves = df_final['Chave Primaria']
+    assert "nan" not in chaves.astype(object).tolist()
+    assert contas[0] not in chaves.tolist()
+    # Os valores da conta sem destino continuam no resultado, numa linha sem chave
+    assert chaves.isna().sum() == 1
@@ -0,0 +1,44 @@
+"""Leitura dos extratos: rendimentos de todas as páginas e cache por conteúdo e tipo."""
+import pytest
+
+from benchmarks.sinteticos import pdf_de_linhas
+from conciliacao import extrato_pdf
+from conciliacao.extrato_pdf import extrair_lote, extrair_pdf_melhorado
+
+
+def extrato_varios_meses(banco, rendimentos):
+    """Investimento com um mês por página, cada um com sua linha de rendimento e saldo."""
+    cabecalho = ["CAIXA ECONÔMICA FEDERAL", "Extrato de Fundos de Investimento", "Conta Vinculada: 1234/0006/7654321-0"] \
+        if banco == 'CAIXA ECONÔMICA' else \
+        ["BANCO DO BRASIL", "Extrato de Investimentos - BB RF", "Agência: 1234-4   Conta corrente: 765432-1"]
+    paginas = []
+    for mes, rendimento in enumerate(rendimentos, 4):
+        linhas = list(cabecalho) if not paginas else [f"{banco} - página {len(paginas) + 1}"]
+        linhas += [f"Período: 01/{mes:02d}/2025 a 30/{mes:02d}/2025", f"05/{mes:02d}/2025  APLICACAO 1000   5.000,00 C",
+                   f"RENDIMENTO BRUTO  {rendimento:.2f}".replace(".", ","), f"SALDO FINAL  {10_000 * mes:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")]
+        paginas.append(linhas)
+    return pdf_de_linhas(paginas)
+
+
+def test_rendimento_de_varios_meses_soma_todas_as_paginas():
+    for banco in ('BANCO DO BRASIL', 'CAIXA ECONÔMICA'):
+        resultado = extrair_pdf_melhorado(extrato_varios_meses(banco, [100, 200, 300]), 'INV')
+        assert resultado['Rendimento'] == pytest.approx(600)
+        assert resultado['Saldo'] == pytest.approx(60_000)
+
+
+def test_cache_separa_tipos_de_extrato(monkeypatch):
+    guardados = {}
+    monkeypatch.setattr(extrato_pdf, 'obter_cache', guardados.get)
+    monkeypatch.setattr(extrato_pdf, 'gravar_cache', guardados.__setitem__)
+    monkeypatch.setattr(extrato_pdf, 'podar_cache', lambda: None)
+    conteudo = extrato_varios_meses('BANCO DO BRASIL', [100, 200])
+
+    como_cc = extrair_lote([(conteudo, 'CC')], timeout=None, usar_cache=True)[0]
+    como_inv = extrair_lote([(conteudo, 'INV')], timeout=None, usar_cache=True)[0]
+    assert como_cc['Rendimento'] == 0.0
+    assert como_inv['Rendimento'] == pytest.approx(300)
+    assert len(guardados) == 2
+    # Segunda leitura do mesmo extrato vem do cache
+    monkeypatch.setattr(extrato_pdf, 'extrair_pdf_melhorado', None)
+    assert extrair_lote([(conteudo, 'INV')], timeout=None, usar_cache=True)[0] == como_inv
@@ -0,0 +1,35 @@
+"""classificar_linha (uma alternância) deve achar as mesmas categorias que os any() de antes."""
+import random
+
+import pytest
+
+from benchmarks.bench_gatilhos import classificar_linha_antiga, linhas_sinteticas
+from benchmarks.sinteticos import contas_sinteticas, extratos_sinteticos
+from conciliacao.extrato_pdf import GATILHOS_RENDIMENTO, GATILHOS_SALDO, IGNORAR_SALDO, classificar_linha
+
+PEDACOS = GATILHOS_SALDO + IGNORAR_SALDO + GATILHOS_RENDIMENTO + ["ACUMULADO", "ANO", "SALD", "RENDIMENT", "S A L", " ", "1.234,56", "X"]
+
+
+def linhas_compostas(n, semente):
+    """Gatilhos colados e sobrepostos ("SALDO FINALANO", "RENDIMENTO BRUTOACUMULADO"...)."""
+    rnd = random.Random(semente)
+    return ["".join(rnd.choices(PEDACOS, k=rnd.randint(1, 5))) for _ in range(n)]
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_igual_a_varredura_antiga(semente):
+    linhas = linhas_sinteticas(20_000, semente) + linhas_compostas(20_000, semente)
+    for linha in linhas:
+        linha_upper = linha.upper().strip()
+        assert classificar_linha(linha_upper) == classificar_linha_antiga(linha_upper), linha
+
+
+def test_linhas_de_extratos_sinteticos():
+    import fitz  # PyMuPDF
+
+    for extrato in extratos_sinteticos(20, contas_sinteticas(10), max_paginas=3):
+        with fitz.open(stream=extrato['conteudo'], filetype="pdf") as doc:
+            for pagina in doc:
+                for linha in pagina.get_text().split('\n'):
+                    linha_upper = linha.upper().strip()
+                    assert classificar_linha(linha_upper) == classificar_linha_antiga(linha_upper), linha
@@ -0,0 +1,72 @@
+"""Histórico das execuções: consultas por conta e divergências em meses seguidos."""
+import pandas as pd
+import pytest
+
+from conciliacao.historico import divergencias_consecutivas, execucoes_registradas, historico_conta, registrar_execucao
+from conciliacao.processo import DIFERENCAS, VALORES_BANCO, VALORES_CONTABIL
+
+
+def execucao(contas):
+    """(df_final, df_log) com uma linha por (chave, saldo contábil, saldo no banco)."""
+    linhas = []
+    for chave, contabil, banco in contas:
+        linha = dict.fromkeys(VALORES_CONTABIL + VALORES_BANCO + DIFERENCAS, 0.0)
+        linha.update({'Chave Primaria': chave, 'Descrição': f"Conta {chave}", 'Saldo_Contabil_CC': contabil,
+                      'Saldo_Banco_CC': banco, 'Diferenca_Saldo_CC': contabil - banco})
+        linhas.append(linha)
+    df_final = pd.DataFrame(linhas).astype({'Chave Primaria': object})
+    df_log = pd.DataFrame([{'Arquivo': 'extrato.pdf', 'Banco': 'BANCO DO BRASIL', 'Conta Lida': '12345-6',
+                            'Chave Gerada': '123456', 'Saldo': 10.0, 'Rendimento': 0.0}])
+    return df_final, df_log
+
+
+@pytest.fixture
+def historico(tmp_path):
+    caminho = str(tmp_path / "historico.sqlite")
+    # 0000001 diverge em 03, 04 e 05; 0000002 só em 03 e 05; a linha sem chave sempre diverge
+    meses = {'2025-03': [('0000001', 10.0, 9.0), ('0000002', 5.0, 4.0), (None, 7.0, 0.0)],
+             '2025-04': [('0000001', 10.0, 8.0), ('0000002', 5.0, 5.0), (None, 7.0, 0.0)],
+             '2025-05': [('0000001', 10.0, 7.0), ('0000002', 5.0, 3.0), (None, 7.0, 0.0)]}
+    for competencia, contas in meses.items():
+        registrar_execucao(*execucao(contas), competencia, 'Unidade A', caminho)
+    registrar_execucao(*execucao([('0000001', 1.0, 1.0), (None, 2.0, 0.0)]), '2025-05', 'Unidade B', caminho)
+    return caminho
+
+
+def test_conta_sem_chave_nao_e_gravada(historico):
+    execucoes = execucoes_registradas(historico)
+    assert execucoes['contas'].tolist() == [2, 1, 2, 2]
+    for texto in ('nan', 'None', ''):
+        assert historico_conta(texto, caminho=historico).empty
+
+
+def test_historico_conta(historico):
+    df = historico_conta('0000001', caminho=historico)
+    assert list(zip(df['competencia'], df['unidade'])) == [('2025-03', 'Unidade A'), ('2025-04', 'Unidade A'),
+                                                           ('2025-05', 'Unidade A'), ('2025-05', 'Unidade B')]
+    assert df['Diferenca_Saldo_CC'].tolist() == [1.0, 2.0, 3.0, 0.0]
+    assert df['divergente'].tolist() == [1, 1, 1, 0]
+    assert historico_conta('0000001', unidade='Unidade B', caminho=historico)['competencia'].tolist() == ['2025-05']
+
+
+def test_regravar_competencia_substitui(historico):
+    registrar_execucao(*execucao([('0000001', 10.0, 10.0)]), '2025-04', 'Unidade A', historico)
+    df = historico_conta('0000001', unidade='Unidade A', caminho=historico)
+    assert df['divergente'].tolist() == [1, 0, 1]
+    assert historico_conta('0000002', unidade='Unidade A', caminho=historico)['competencia'].tolist() == ['2025-03', '2025-05']
+
+
+def test_divergencias_consecutivas(historico):
+    df = divergencias_consecutivas(3, caminho=historico)
+    assert list(zip(df['chave'], df['unidade'])) == [('0000001', 'Unidade A')]
+    assert df['Diferenca_Saldo_CC'].tolist() == [3.0]
+
+    assert divergencias_consecutivas(1, ate='2025-05', unidade='Unidade A', caminho=historico)['chave'].tolist() == ['0000001', '0000002']
+    assert divergencias_consecutivas(2, ate='2025-04', caminho=historico)['chave'].tolist() == ['0000001']
+    assert divergencias_consecutivas(3, unidade='Unidade B', caminho=historico).empty
+
+
+def test_historico_inexistente(tmp_path):
+    caminho = str(tmp_path / "nao_existe.sqlite")
+    assert historico_conta('0000001', caminho=caminho).empty
+    assert divergencias_consecutivas(2, caminho=caminho).empty
@@ -0,0 +1,84 @@
+"""As versões vetorizadas de limpeza devem dar exatamente o resultado das escalares.
+
+Entradas aleatórias (contas pontuadas, com barra, lixo, valores com D/DEB/
+parênteses...) em colunas object e str, que é o que o read_csv(dtype=str)
+entrega no pandas 3.
+"""
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conciliacao.limpeza import (
+    gerar_chave_padronizada, limpar_valor_monetario,
+    gerar_chaves_padronizadas, limpar_valores_monetarios,
+)
+
+ALFABETO = "0123456789..//--,, ()DdEBCabx\tº"
+SEMENTES = range(5)
+
+
+def texto_aleatorio(rnd):
+    return "".join(rnd.choice(ALFABETO) for _ in range(rnd.randint(0, 30)))
+
+
+def conta_aleatoria(rnd, so_texto):
+    modelo = rnd.random()
+    if modelo < 0.3:
+        return f"104.{rnd.randint(0, 9999)}.{rnd.randint(0, 999):03d}.{rnd.randint(0, 99999999):08d}-{rnd.randint(0, 9)}"
+    if modelo < 0.5:
+        return f" {rnd.randint(0, 9999)}/{rnd.randint(0, 9999999)}-{rnd.randint(0, 9)} "
+    if modelo < 0.6:
+        return str(rnd.randint(0, 10**12))
+    if modelo < 0.7:
+        # Ausentes; colunas object também podem trazer números soltos
+        return rnd.choice([None, np.nan] if so_texto else [None, np.nan, 123, 4.5])
+    return texto_aleatorio(rnd)
+
+
+def valor_aleatorio(rnd, so_texto):
+    modelo = rnd.random()
+    v = rnd.uniform(0, 10**7)
+    if modelo < 0.3:
+        return f"{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".") + rnd.choice(["", " C", " D", " DEB"])
+    if modelo < 0.45:
+        return rnd.choice(["(", "-", ""]) + f"{v:,.2f}" + rnd.choice([")", ""])
+    if modelo < 0.5:
+        return rnd.choice([None, np.nan, "nan", "", "0,00 D"] if so_texto else [None, np.nan, 10, "nan", "", "0,00 D"])
+    return texto_aleatorio(rnd)
+
+
+def serie_aleatoria(gerador, dtype, semente, n=5_000):
+    rnd = random.Random(semente)
+    return pd.Series([gerador(rnd, dtype == 'str') for _ in range(n)], dtype=dtype)
+
+
+@pytest.mark.parametrize('dtype', ['object', 'str'])
+@pytest.mark.parametrize('semente', SEMENTES)
+def test_chaves_iguais_as_do_escalar(dtype, semente):
+    contas = serie_aleatoria(conta_aleatoria, dtype, semente)
+    esperado = [gerar_chave_padronizada(v) for v in contas]
+    obtido = gerar_chaves_padronizadas(contas)
+    # Comparação de listas: None tem de continuar None (NaN não é igual a None)
+    assert obtido.tolist() == esperado
+    assert obtido.index.equals(contas.index)
+
+
+@pytest.mark.parametrize('dtype', ['object', 'str'])
+def test_chave_ausente_e_none(dtype):
+    contas = pd.Series(["104.1234.006.12345678-9", None, "sem dígitos", np.nan], dtype=dtype)
+    obtido = gerar_chaves_padronizadas(contas)
+    assert obtido.dtype == object
+    assert obtido.tolist() == ["3456789", None, None, None]
+
+
+@pytest.mark.parametrize('dtype', ['object', 'str'])
+@pytest.mark.parametrize('semente', SEMENTES)
+def test_valores_iguais_aos_do_escalar(dtype, semente):
+    valores = serie_aleatoria(valor_aleatorio, dtype, semente)
+    esperado = np.array([limpar_valor_monetario(v) for v in valores])
+    obtido = limpar_valores_monetarios(valores).to_numpy()
+    # Igualdade exata, inclusive o sinal de -0.0
+    assert np.array_equal(obtido, esperado)
+    assert np.array_equal(np.signbit(obtido), np.signbit(esperado))
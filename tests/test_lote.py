@@ -0,0 +1,79 @@
+"""Lote de várias unidades e o relatório consolidado (--consolidado)."""
+import os
+
+import pandas as pd
+import pytest
+
+from benchmarks.sinteticos import contas_sinteticas, csv_rendimentos, csv_saldos, extratos_sinteticos, planilha_depara
+from conciliacao import extrato_pdf, processo
+from conciliacao.lote import PASTA_CONSOLIDADO, consolidar_unidades, main, processar_unidade
+
+PASTAS = {'BANCO DO BRASIL': 'BB', 'CAIXA ECONÔMICA': 'CEF'}
+
+
+@pytest.fixture(autouse=True)
+def sem_memoria(monkeypatch):
+    monkeypatch.setattr(processo, '_contabeis', processo.OrderedDict())
+    monkeypatch.setattr(processo, '_extratos', processo.OrderedDict())
+    monkeypatch.setattr(extrato_pdf, 'obter_cache', lambda chave: None)
+    monkeypatch.setattr(extrato_pdf, 'gravar_cache', lambda chave, resultado: None)
+
+
+def criar_unidade(pasta, contas, extratos, semente):
+    """Pasta de uma unidade no formato do lote: CSVs, DE-PARA próprio e BANCO/TIPO/*.pdf."""
+    os.makedirs(pasta)
+    csv_saldos(os.path.join(pasta, "saldos_013083.csv"), len(contas) + 5, contas, semente=semente)
+    csv_rendimentos(os.path.join(pasta, "rendimentos_014387.csv"), len(contas) // 2, contas, semente=semente)
+    planilha_depara(os.path.join(pasta, "depara.xlsx"), contas, semente=semente)
+    for extrato in extratos_sinteticos(extratos, contas, semente=semente, max_paginas=2):
+        destino = os.path.join(pasta, PASTAS[extrato['banco']], extrato['tipo'])
+        os.makedirs(destino, exist_ok=True)
+        with open(os.path.join(destino, extrato['nome']), 'wb') as fh: fh.write(extrato['conteudo'])
+
+
+@pytest.fixture
+def unidades(tmp_path):
+    entrada = tmp_path / "entrada"
+    criar_unidade(str(entrada / "Unidade A"), contas_sinteticas(12, semente=11), 6, semente=11)
+    criar_unidade(str(entrada / "Unidade B"), contas_sinteticas(20, semente=12), 9, semente=12)
+    return str(entrada)
+
+
+def test_consolidar_unidades(unidades, tmp_path):
+    saida = str(tmp_path / "saida")
+    resumos = [processar_unidade(nome, os.path.join(unidades, nome), saida, formatos=(), num_workers=1, devolver_tabelas=True)
+               for nome in ("Unidade A", "Unidade B")]
+    resumos.append({'Unidade': "Unidade C", 'Erro': "CSV de saldos não encontrado."})
+    df_final, df_log = consolidar_unidades(resumos)
+
+    a, b = resumos[0], resumos[1]
+    assert len(df_final) == len(a['df_final']) + len(b['df_final'])
+    assert len(df_log) == len(a['df_log']) + len(b['df_log']) == 15
+    assert list(df_final.columns) == ['Unidade'] + list(a['df_final'].columns)
+    assert list(df_log.columns) == ['Unidade'] + list(a['df_log'].columns)
+    assert df_final['Unidade'].tolist() == ["Unidade A"] * len(a['df_final']) + ["Unidade B"] * len(b['df_final'])
+    assert df_log['Unidade'].value_counts().to_dict() == {"Unidade A": 6, "Unidade B": 9}
+    # Os valores de cada unidade chegam intactos
+    pd.testing.assert_frame_equal(df_final[df_final['Unidade'] == "Unidade B"].drop(columns='Unidade').reset_index(drop=True),
+                                  b['df_final'])
+    assert all(df.empty for df in consolidar_unidades(resumos[2:]))
+
+
+def test_linha_de_comando_consolidado(unidades, tmp_path):
+    saida = str(tmp_path / "saida")
+    assert main([unidades, saida, "--paralelas", "1", "--formatos", "xlsx", "--consolidado"]) == 0
+
+    logs = {nome: pd.read_csv(os.path.join(saida, nome, 'log_leitura.csv'), sep=';', encoding='utf-8-sig')
+            for nome in ("Unidade A", "Unidade B", PASTA_CONSOLIDADO)}
+    consolidado = logs[PASTA_CONSOLIDADO]
+    assert consolidado.columns[0] == 'Unidade'
+    assert len(consolidado) == len(logs["Unidade A"]) + len(logs["Unidade B"]) == 15
+    assert consolidado['Unidade'].value_counts().to_dict() == {"Unidade A": 6, "Unidade B": 9}
+
+    planilha = pd.read_excel(os.path.join(saida, PASTA_CONSOLIDADO, 'conciliacao_completa.xlsx'), header=None)
+    linhas_unidades = sum(len(pd.read_excel(os.path.join(saida, nome, 'conciliacao_completa.xlsx'), header=None))
+                          for nome in ("Unidade A", "Unidade B"))
+    # Cada planilha tem as mesmas linhas de cabeçalho; as de dados se somam
+    cabecalho = planilha.index[planilha.iloc[:, 0].astype(str).str.startswith("Unidade A")][0]
+    assert len(planilha) - cabecalho == linhas_unidades - 2 * cabecalho
+    assert set(planilha.iloc[cabecalho:, 0]) == {"Unidade A", "Unidade B"}
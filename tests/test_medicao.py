@@ -0,0 +1,58 @@
+"""Memória e CPU por etapa, inclusive com etapas aninhadas e processos filhos."""
+import multiprocessing
+import sys
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from conciliacao.medicao import medir, pico_rss_mb
+
+linux = pytest.mark.skipif(not sys.platform.startswith('linux'), reason="pico de RSS por etapa vem do /proc")
+
+
+def ocupar(mb):
+    bloco = np.ones(mb * 2**20 // 8)
+    del bloco
+
+
+def gastar_cpu(_):
+    return sum(i * i for i in range(3_000_000))
+
+
+@linux
+def test_etapa_aninhada_nao_apaga_o_pico_da_externa():
+    medicoes = []
+    with medir(medicoes, 'externa'):
+        ocupar(200)
+        with medir(medicoes, 'interna'): ocupar(20)
+    interna, externa = medicoes
+    assert 15 <= interna['Pico RSS da Etapa (MB)'] < 150
+    assert externa['Pico RSS da Etapa (MB)'] >= 180
+    assert externa['Pico RSS do Processo (MB)'] >= externa['Pico RSS da Etapa (MB)']
+    assert pico_rss_mb() >= externa['Pico RSS do Processo (MB)']
+
+
+def test_pico_alocado_com_tracemalloc():
+    medicoes = []
+    tracemalloc.start()
+    try:
+        with medir(medicoes, 'externa'):
+            ocupar(50)
+            with medir(medicoes, 'interna'): ocupar(5)
+    finally:
+        tracemalloc.stop()
+    interna, externa = medicoes
+    assert 4 <= interna['Pico Alocado (MB)'] < 40
+    assert externa['Pico Alocado (MB)'] >= 49
+
+
+def test_cpu_inclui_processos_filhos():
+    medicoes = []
+    with medir(medicoes, 'pool'):
+        with multiprocessing.get_context().Pool(2) as pool: pool.map(gastar_cpu, range(4))
+        pool.join()
+    sozinho = []
+    with medir(sozinho, 'thread'): gastar_cpu(0)
+    # Quatro tarefas nos filhos custam bem mais CPU do que uma na thread
+    assert medicoes[0]['CPU (s)'] > 2 * sozinho[0]['CPU (s)']
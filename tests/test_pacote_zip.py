@@ -0,0 +1,84 @@
+"""Tipo do extrato pelo cabeçalho: lançamentos de aplicação não fazem da conta corrente um investimento."""
+import io
+import random
+import zipfile
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from benchmarks.sinteticos import contas_sinteticas, linhas_extrato, pdf_de_linhas
+from conciliacao import pacote_zip
+from conciliacao.pacote_zip import classificar_extrato, extratos_do_zip
+
+BANCOS = ['BANCO DO BRASIL', 'CAIXA ECONÔMICA']
+
+
+def extratos_sem_tipo_no_nome(quantidade=40, semente=7):
+    """(nome, banco, tipo, conteudo) de extratos de uma página com nomes que não dizem banco nem tipo."""
+    rnd = random.Random(semente)
+    contas = contas_sinteticas(quantidade)
+    extratos = []
+    for i, chave in enumerate(contas):
+        banco, tipo = BANCOS[i % 2], ('CC', 'INV')[(i // 2) % 2]
+        paginas = linhas_extrato(banco, tipo, chave, rnd.randint(1000, 9999), rnd.uniform(0, 10**6),
+                                 rnd.uniform(0, 10**4), 1, rnd)
+        extratos.append((f"lote/extrato_{i:03d}.pdf", banco, tipo, pdf_de_linhas(paginas)))
+    return extratos
+
+
+def test_conta_corrente_nao_vira_investimento():
+    extratos = extratos_sem_tipo_no_nome()
+    for nome, banco, tipo, conteudo in extratos:
+        assert classificar_extrato(nome, conteudo) == (banco, tipo), nome
+
+
+def pacote(membros):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zip_:
+        for nome, conteudo in membros: zip_.writestr(nome, conteudo)
+    return buffer.getvalue()
+
+
+def test_pacote_classifica_pelo_cabecalho():
+    extratos = extratos_sem_tipo_no_nome()
+    lista, ignorados = extratos_do_zip(pacote([(nome, conteudo) for nome, _, _, conteudo in extratos]))
+    assert ignorados == []
+    assert [(i['banco'], i['tipo']) for i in lista] == [(banco, tipo) for _, banco, tipo, _ in extratos]
+
+
+def test_cabecalho_lido_nos_processos_da_recepcao(monkeypatch):
+    extratos = extratos_sem_tipo_no_nome(6)
+    enviados = []
+
+    def agendar(funcao, *args):
+        enviados.append(args[0])
+        raise BrokenProcessPool("sem processos")  # e o pacote é classificado mesmo assim
+
+    monkeypatch.setattr(pacote_zip, 'agendar', agendar)
+    membros = [(nome, conteudo) for nome, _, _, conteudo in extratos]
+    membros += [("BB/CC/pelo_nome.pdf", extratos[0][3]), ("sem_dica.pdf", b"nao e pdf")]
+    lista, ignorados = extratos_do_zip(pacote(membros))
+    # Só vai para os processos o que o caminho não classifica
+    assert enviados == [conteudo for nome, conteudo in membros if nome != "BB/CC/pelo_nome.pdf"]
+    assert [(i['arquivo'].name, i['banco'], i['tipo']) for i in lista] == \
+        [(nome, banco, tipo) for nome, banco, tipo, _ in extratos] + [("BB/CC/pelo_nome.pdf", 'BANCO DO BRASIL', 'CC')]
+    assert ignorados == [("sem_dica.pdf", "banco e tipo não identificado")]
+
+
+@pytest.mark.parametrize('titulos, tipo', [
+    (["Extrato de Conta Corrente", "Fundos de Investimento"], None),
+    (["Extrato de Conta Corrente"], 'CC'),
+    (["Extrato de Fundos de Investimento"], 'INV'),
+    (["Movimentação"], None),
+])
+def test_indicacoes_no_cabecalho(titulos, tipo):
+    conteudo = pdf_de_linhas([["BANCO DO BRASIL", *titulos, "05/06/2025  APLICACAO AUTOMATICA 1   10,00 D",
+                               "RENDIMENTO BRUTO  1,00"]])
+    assert classificar_extrato("extrato.pdf", conteudo) == ('BANCO DO BRASIL', tipo)
+
+
+def test_lancamentos_abaixo_do_cabecalho_nao_contam():
+    # Um título de investimento no fim da página é lançamento, não cabeçalho
+    conteudo = pdf_de_linhas([["CAIXA ECONÔMICA FEDERAL", "Extrato por período"]
+                              + ["05/06/2025  PIX 1   10,00 C"] * 60 + ["FUNDOS DE INVESTIMENTO 1   10,00 D"]])
+    assert classificar_extrato("extrato.pdf", conteudo) == ('CAIXA ECONÔMICA', 'CC')
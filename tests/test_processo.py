@@ -0,0 +1,146 @@
+"""Cruzamento contábil x extratos a partir de caminhos, uploads e arquivos abertos."""
+import io
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.sinteticos import contas_sinteticas, csv_rendimentos, csv_saldos, extratos_sinteticos
+from conciliacao import extrato_pdf, processo
+from conciliacao.processo import executar_processo
+
+
+@pytest.fixture(autouse=True)
+def sem_memoria(monkeypatch, tmp_path):
+    """Cada teste lê tudo de novo: sem resultados em memória, sem cache em disco e sem DE-PARA."""
+    monkeypatch.setattr(processo, '_contabeis', processo.OrderedDict())
+    monkeypatch.setattr(processo, '_extratos', processo.OrderedDict())
+    monkeypatch.setattr(extrato_pdf, 'obter_cache', lambda chave: None)
+    monkeypatch.setattr(extrato_pdf, 'gravar_cache', lambda chave, resultado: None)
+    return str(tmp_path / 'sem_depara.xlsx')
+
+
+@pytest.fixture
+def csvs(tmp_path):
+    contas = contas_sinteticas(30)
+    saldos, rendimentos = tmp_path / "saldos.csv", tmp_path / "rendimentos.csv"
+    csv_saldos(saldos, 40, contas)
+    csv_rendimentos(rendimentos, 20, contas)
+    return str(saldos), str(rendimentos)
+
+
+def test_arquivo_aberto_da_o_mesmo_que_o_caminho(csvs, sem_memoria):
+    saldos, rendimentos = csvs
+    esperado, _ = executar_processo(saldos, rendimentos, [], caminho_depara=sem_memoria)
+    processo._contabeis.clear()
+
+    avisos = []
+    with open(saldos, 'rb') as fh_saldos, open(rendimentos, 'rb') as fh_rendimentos:
+        obtido, _ = executar_processo(fh_saldos, fh_rendimentos, [], avisar=avisos.append, caminho_depara=sem_memoria)
+    assert avisos == []
+    assert len(esperado) > 0
+    assert obtido.equals(esperado)
+
+
+def upload(conteudo, nome):
+    arquivo = io.BytesIO(conteudo)
+    arquivo.name = nome
+    return arquivo
+
+
+def editar_linha(linhas, rnd):
+    """Troca o saldo final de uma linha de conta do CSV de saldos."""
+    i = rnd.randrange(2, len(linhas) - 1)
+    partes = linhas[i].split(b';')
+    partes[-1] = f"{rnd.randint(0, 99999)},{rnd.randint(0, 99):02d} C".encode()
+    linhas[i] = b';'.join(partes)
+
+
+@pytest.mark.parametrize('semente', range(3))
+def test_incremental_igual_ao_completo(csvs, sem_memoria, semente):
+    rnd = random.Random(semente)
+    contas = contas_sinteticas(30)
+    extratos = extratos_sinteticos(30, contas, semente=semente, max_paginas=3)
+    with open(csvs[0], 'rb') as fh: linhas_saldos = fh.read().split(b'\n')
+    with open(csvs[1], 'rb') as fh: rendimentos = fh.read()
+
+    presentes = list(range(20))                            # índices em `extratos`
+    conteudos = {i: e['conteudo'] for i, e in enumerate(extratos)}
+    estado, origens = {}, []
+    # Passos fixos (troca, inclusão, remoção de PDF, linha do CSV) e depois aleatórios
+    passos = ['nada', 'trocar', 'incluir', 'remover', 'csv'] + [rnd.choice(['trocar', 'incluir', 'remover', 'csv']) for _ in range(10)]
+    for passo in passos:
+        if passo == 'trocar': conteudos[rnd.choice(presentes)] = extratos[rnd.randrange(len(extratos))]['conteudo']
+        elif passo == 'incluir': presentes.append(rnd.randrange(len(extratos)))
+        elif passo == 'remover': presentes.remove(rnd.choice(presentes))
+        elif passo == 'csv': editar_linha(linhas_saldos, rnd)
+
+        def entradas():
+            lista = [{'arquivo': upload(conteudos[i], extratos[i]['nome']), 'banco': extratos[i]['banco'],
+                      'tipo': extratos[i]['tipo']} for i in presentes]
+            return upload(b'\n'.join(linhas_saldos), 'saldos.csv'), upload(rendimentos, 'rendimentos.csv'), lista
+
+        medicoes = []
+        incremental, log_incremental = executar_processo(*entradas(), num_workers=1, estado=estado, medicoes=medicoes,
+                                                         caminho_depara=sem_memoria)
+        origens.append(next(m['Origem'] for m in medicoes if m['Etapa'] == 'Cruzamento final'))
+        completo, log_completo = executar_processo(*entradas(), num_workers=1, caminho_depara=sem_memoria)
+        pd.testing.assert_frame_equal(incremental, completo)
+        pd.testing.assert_frame_equal(log_incremental, log_completo)
+    # Depois da primeira execução, as mudanças pequenas passam pelo caminho incremental
+    assert origens[0] == 'completo'
+    assert any(origem.startswith('incremental') for origem in origens[1:])
+
+
+def merge_antigo(fontes):
+    """Referência: cada fonte agregada por conta e as fontes juntadas por merges externos com fillna(0)."""
+    final = None
+    for df, valores, textos in fontes:
+        agregado = df.groupby('Chave Primaria', dropna=False, sort=True) \
+            .agg({**{c: 'sum' for c in valores}, **{c: 'first' for c in textos}}).reset_index()
+        final = agregado if final is None else pd.merge(final, agregado, on='Chave Primaria', how='outer')
+    valores = [c for _, cols, _ in fontes for c in cols]
+    final[valores] = final[valores].fillna(0.0)
+    return final.sort_values('Chave Primaria', na_position='last', ignore_index=True)
+
+
+def fonte_aleatoria(rnd, colunas, texto, linhas):
+    # Poucas contas para haver repetidas; None é a conta sem chave (DE-PARA em branco)
+    contas = [None] + [f"{n:07d}" for n in rnd.sample(range(10**7), 12)]
+    return pd.DataFrame({'Chave Primaria': pd.Series([rnd.choice(contas) for _ in range(linhas)], dtype=object),
+                         **{c: [round(rnd.uniform(-1e5, 1e5), 2) for _ in range(linhas)] for c in colunas},
+                         **({texto: [f"{texto} {i}" for i in range(linhas)]} if texto else {})})
+
+
+@pytest.mark.parametrize('semente', range(10))
+def test_alinhar_igual_ao_merge_antigo(semente):
+    rnd = random.Random(semente)
+    saldos = fonte_aleatoria(rnd, processo.VALORES_SALDOS, 'Descrição_ERP', rnd.randint(0, 30))
+    rendimentos = fonte_aleatoria(rnd, ['Rendimento_Contabil'], None, rnd.randint(0, 10))
+    banco = fonte_aleatoria(rnd, processo.VALORES_BANCO, 'Nome_Banco', rnd.randint(0, 30))
+    fontes = [(saldos, processo.VALORES_SALDOS, ['Descrição_ERP']), (rendimentos, ['Rendimento_Contabil'], []),
+              (banco, processo.VALORES_BANCO, ['Nome_Banco'])]
+
+    obtido = processo._alinhar(fontes)
+    esperado = merge_antigo(fontes)
+    assert obtido['Chave Primaria'].fillna('<sem chave>').tolist() == esperado['Chave Primaria'].fillna('<sem chave>').tolist()
+    assert obtido['Chave Primaria'].fillna('<sem chave>').is_unique
+    valores = processo.VALORES_CONTABIL + processo.VALORES_BANCO
+    np.testing.assert_allclose(obtido[valores].to_numpy(), esperado[valores].to_numpy(), rtol=0, atol=1e-6)
+    for texto in ('Descrição_ERP', 'Nome_Banco'):
+        assert obtido[texto].fillna('<ausente>').tolist() == esperado[texto].fillna('<ausente>').tolist()
+
+
+def test_alinhar_contas_de_uma_fonte_so():
+    saldos = pd.DataFrame({'Chave Primaria': ['1', '2', '2', None], 'Saldo_Contabil_CC': [1.0, 2.0, 3.0, 4.0],
+                           'Saldo_Contabil_Aplic': 0.0, 'Descrição_ERP': ['um', 'dois', 'dois b', 'sem chave']})
+    banco = pd.DataFrame({'Chave Primaria': ['3', '2'], 'Saldo_Banco_CC': [7.0, 5.0], 'Saldo_Banco_Aplic': 0.0,
+                          'Rendimento_Banco': 0.0, 'Nome_Banco': ['BB', 'CEF']})
+    df = processo._alinhar([(saldos, processo.VALORES_SALDOS, ['Descrição_ERP']), (banco, processo.VALORES_BANCO, ['Nome_Banco'])])
+    assert df['Chave Primaria'].tolist()[:3] == ['1', '2', '3'] and pd.isna(df['Chave Primaria'].iloc[3])
+    assert df['Saldo_Contabil_CC'].tolist() == [1.0, 5.0, 0.0, 4.0]
+    assert df['Saldo_Banco_CC'].tolist() == [0.0, 5.0, 7.0, 0.0]
+    # Texto: primeira linha da conta; NaN (e não 0) onde a fonte não tem a conta
+    assert df['Descrição_ERP'].tolist()[:2] == ['um', 'dois'] and pd.isna(df['Descrição_ERP'].iloc[2])
+    assert pd.isna(df['Nome_Banco'].iloc[0]) and df['Nome_Banco'].iloc[2] == 'BB'
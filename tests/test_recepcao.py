@@ -0,0 +1,28 @@
+"""Recepção em segundo plano: tempo limite dentro do próprio processo de leitura."""
+import multiprocessing
+import time
+
+from benchmarks.sinteticos import pdf_de_linhas
+from conciliacao import extrato_pdf, recepcao
+
+PDF = pdf_de_linhas([["BANCO DO BRASIL", "Agência: 1234-4   Conta corrente: 765432-1", "SALDO FINAL  10,00 C"]])
+
+
+def test_leitura_sem_pool_por_arquivo(monkeypatch):
+    monkeypatch.setattr(multiprocessing, 'get_context', None)
+    monkeypatch.setattr(extrato_pdf, 'obter_cache', lambda chave: None)
+    monkeypatch.setattr(extrato_pdf, 'gravar_cache', lambda chave, resultado: None)
+    resultado, medicao = recepcao._ler(PDF, 'CC')
+    assert resultado['Conta'] == "765432-1"
+    assert medicao['Origem'] == 'leitura'
+
+
+def test_pdf_demorado_vira_erro(monkeypatch):
+    monkeypatch.setattr(recepcao, 'TIMEOUT_PDF', 0.2)
+    monkeypatch.setattr(extrato_pdf, 'obter_cache', lambda chave: None)
+    monkeypatch.setattr(extrato_pdf, '_extrair_documento', lambda doc, tipo: time.sleep(5))
+    inicio = time.monotonic()
+    resultado, _ = recepcao._ler(PDF, 'CC')
+    assert time.monotonic() - inicio < 2
+    assert resultado['Conta'] == "Erro"
+    assert "Tempo limite" in resultado['Texto_Raw']
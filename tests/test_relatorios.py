@@ -0,0 +1,90 @@
+"""Relatórios exportados: conteúdo, formatos e cores do Excel e do PDF."""
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conciliacao.relatorios import tabela_relatorio, to_excel_styled
+
+
+def df_final(linhas):
+    rnd = np.random.default_rng(7)
+    contabil, banco = rnd.uniform(-1e5, 1e5, (2, linhas)).round(2)
+    banco[::3] = contabil[::3]  # um terço das contas sem divergência
+    return pd.DataFrame({
+        'Descrição': [f"BANCO {i}" for i in range(linhas)],
+        'Chave Primaria': [f"{1_000_000 + i}" for i in range(linhas)],
+        'Saldo_Contabil_CC': contabil, 'Saldo_Banco_CC': banco, 'Diferenca_Saldo_CC': contabil - banco,
+    })
+
+
+@pytest.fixture
+def planilha():
+    openpyxl = pytest.importorskip("openpyxl")
+    df = tabela_relatorio(df_final(10))
+    return df, openpyxl.load_workbook(io.BytesIO(to_excel_styled(df)))["Conciliação"]
+
+
+def test_excel_cabecalho_e_valores(planilha):
+    df, ws = planilha
+    assert [c.value for c in ws[1]] == ['Dados', 'Dados', 'Conta Corrente', 'Conta Corrente', 'Conta Corrente']
+    assert [c.value for c in ws[2]] == ['Banco / Descrição', 'Conta Reduzida', 'Contábil', 'Banco', 'Diferença']
+    assert all(c.font.bold for c in ws[1] + ws[2])
+    assert ws.max_row == len(df) + 2
+    for i, linha in enumerate(ws.iter_rows(min_row=3, values_only=True)):
+        assert list(linha[:2]) == df.iloc[i, :2].tolist()
+        assert list(linha[2:]) == pytest.approx(df.iloc[i, 2:].tolist())
+
+
+def test_excel_formatos(planilha):
+    _, ws = planilha
+    for linha in ws.iter_rows(min_row=3):
+        assert linha[0].number_format == 'General'
+        assert all(c.number_format == '#,##0.00' for c in linha[2:])
+
+    regras = {str(intervalo.sqref): intervalo.rules for intervalo in ws.conditional_formatting}
+    # Todas as colunas de valor: negativos em vermelho
+    for coluna in "CDE":
+        negativo = [r for r in regras[f"{coluna}3:{coluna}12"] if r.type == 'cellIs']
+        assert [(r.operator, r.formula) for r in negativo] == [('lessThan', ['-0.01'])]
+    # Só as diferenças: divergência acima de 1 centavo em vermelho e negrito, antes da regra de negativo
+    divergencia = regras["E3:E12"][0]
+    assert divergencia.type == 'expression' and divergencia.formula == ['ABS(E3)>0.01'] and divergencia.stopIfTrue
+    assert divergencia.dxf.font.b and divergencia.dxf.font.color.rgb.endswith('FF0000')
+    assert all(r.type == 'cellIs' for coluna in "CD" for r in regras[f"{coluna}3:{coluna}12"])
+
+
+def test_excel_vazio():
+    openpyxl = pytest.importorskip("openpyxl")
+    ws = openpyxl.load_workbook(io.BytesIO(to_excel_styled(tabela_relatorio(df_final(0)))))["Conciliação"]
+    assert ws.max_row == 2
+    assert not list(ws.conditional_formatting)
+
+
+def test_pdf_varias_paginas_com_cabecalho_e_negativos():
+    fitz = pytest.importorskip("fitz")
+    from conciliacao.relatorios import to_pdf
+
+    df = df_final(120)
+    df.loc[0, 'Descrição'] = "X" * 60
+    with fitz.open(stream=to_pdf(tabela_relatorio(df)), filetype="pdf") as doc:
+        assert doc.page_count >= 3
+        textos = [pagina.get_text() for pagina in doc]
+        spans = [s for pagina in doc for b in pagina.get_text('dict')['blocks'] for l in b.get('lines', []) for s in l['spans']]
+
+    # Cabeçalho de duas linhas repetido em todas as páginas; título só na primeira
+    for texto in textos:
+        assert "Conta Corrente" in texto and "Conta Reduzida" in texto and "Diferença" in texto
+    assert ["Relatório de Conciliação Contábil" in t for t in textos] == [True] + [False] * (len(textos) - 1)
+    # Cada conta aparece uma vez, na ordem
+    contas = [s['text'] for s in spans if s['text'].isdigit() and len(s['text']) == 7]
+    assert contas == df['Chave Primaria'].tolist()
+    assert "X" * 39 + "…" in textos[0]
+
+    # Valores negativos em vermelho, os demais em preto
+    valores = [s for s in spans if s['text'].replace('.', '').replace(',', '').lstrip('-').isdigit() and ',' in s['text']]
+    assert len(valores) == 3 * len(df)
+    for s in valores:
+        assert s['color'] == (0xFF0000 if s['text'].startswith('-') else 0), s['text']
+    assert any(s['text'].startswith('-') for s in valores)
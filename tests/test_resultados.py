@@ -0,0 +1,124 @@
+"""Cache de resultados compartilhado entre sessões: validade, orçamento de memória e espera."""
+import threading
+import types
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from conciliacao import resultados
+from conciliacao.resultados import ACERTO, AGUARDADO, CALCULADO, resultado_compartilhado, resultado_guardado, tamanho_mb
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio(monkeypatch):
+    """Cada teste com o cache vazio e um relógio controlado pelo teste."""
+    relogio = types.SimpleNamespace(agora=1000.0)
+    monkeypatch.setattr(resultados, '_guardados', OrderedDict())
+    monkeypatch.setattr(resultados, '_em_andamento', {})
+    monkeypatch.setattr(resultados, '_contagem', {ACERTO: 0, AGUARDADO: 0, CALCULADO: 0})
+    monkeypatch.setattr(resultados, 'time', types.SimpleNamespace(monotonic=lambda: relogio.agora))
+    return relogio
+
+
+def bloco(mb):
+    return np.zeros(int(mb * 2**20), dtype=np.uint8)
+
+
+def test_tamanho_conta_arrays():
+    assert tamanho_mb({'divergentes': bloco(3), 'outros': [bloco(1), b'x' * 2**20]}) == pytest.approx(5.0)
+
+
+def test_validade(monkeypatch, cache_vazio):
+    monkeypatch.setattr(resultados, 'VALIDADE_RESULTADOS_S', 60)
+    assert resultado_compartilhado('a', lambda: {'v': 1}) == ({'v': 1}, CALCULADO)
+    cache_vazio.agora += 59
+    assert resultado_compartilhado('a', lambda: {'v': 2}) == ({'v': 1}, ACERTO)
+    assert resultado_guardado('a') == {'v': 1}
+    cache_vazio.agora += 2
+    assert resultado_guardado('a') is None
+    assert resultado_compartilhado('a', lambda: {'v': 2}) == ({'v': 2}, CALCULADO)
+
+
+def test_orcamento_descarta_o_usado_ha_mais_tempo(monkeypatch):
+    monkeypatch.setattr(resultados, 'LIMITE_RESULTADOS_MB', 10)
+    for chave in 'abc': resultado_compartilhado(chave, lambda: {'divergentes': bloco(4)})
+    # a + b + c passam de 10 MB: sai o mais antigo
+    assert resultado_guardado('a') is None
+    assert resultado_guardado('b') is not None
+
+    # Usar b o torna recente: o próximo a sair é c
+    resultado_compartilhado('d', lambda: {'divergentes': bloco(4)})
+    assert resultado_guardado('c') is None
+    assert resultado_guardado('b') is not None and resultado_guardado('d') is not None
+    assert resultados.situacao_resultados()['Memória (MB)'] == pytest.approx(8.0)
+
+    # Um resultado maior que o orçamento inteiro é devolvido, mas não guardado
+    resultado, origem = resultado_compartilhado('e', lambda: {'divergentes': bloco(11)})
+    assert origem == CALCULADO and len(resultado['divergentes']) == 11 * 2**20
+    assert resultado_guardado('e') is None and resultado_guardado('b') is not None
+
+
+def test_espera_o_calculo_de_outra_sessao():
+    comecou, liberar = threading.Event(), threading.Event()
+    calculos = []
+
+    def calcular():
+        calculos.append(1)
+        comecou.set()
+        liberar.wait(5)
+        return {'v': 1}
+
+    obtidos = {}
+    primeira = threading.Thread(target=lambda: obtidos.setdefault(1, resultado_compartilhado('a', calcular)))
+    primeira.start()
+    assert comecou.wait(5)
+    segunda = threading.Thread(target=lambda: obtidos.setdefault(2, resultado_compartilhado('a', calcular)))
+    segunda.start()
+    segunda.join(0.2)
+    assert segunda.is_alive()  # esperando o cálculo em curso, sem calcular de novo
+    liberar.set()
+    primeira.join(5)
+    segunda.join(5)
+    assert len(calculos) == 1
+    assert obtidos[1] == ({'v': 1}, CALCULADO) and obtidos[2] == ({'v': 1}, AGUARDADO)
+    assert obtidos[1][0] is obtidos[2][0]
+
+
+def test_espera_recalcula_se_a_outra_sessao_falhar():
+    comecou, liberar = threading.Event(), threading.Event()
+
+    def falhar():
+        comecou.set()
+        liberar.wait(5)
+        raise RuntimeError("interrompido")
+
+    erros, obtidos = [], []
+
+    def primeira_sessao():
+        try:
+            resultado_compartilhado('a', falhar)
+        except RuntimeError as e:
+            erros.append(e)
+
+    primeira = threading.Thread(target=primeira_sessao)
+    primeira.start()
+    assert comecou.wait(5)
+    segunda = threading.Thread(target=lambda: obtidos.append(resultado_compartilhado('a', lambda: {'v': 2})))
+    segunda.start()
+    segunda.join(0.2)
+    liberar.set()
+    primeira.join(5)
+    segunda.join(5)
+    assert len(erros) == 1
+    assert obtidos == [({'v': 2}, CALCULADO)]
+
+
+def test_execucao_com_perfil_nao_e_guardada():
+    resultado_compartilhado('a', lambda: {'perfil': {}})
+    resultado, origem = resultado_compartilhado('a', lambda: {'perfil': {'prof': b'...'}}, recalcular=True)
+    assert origem == CALCULADO and resultado['perfil'] == {'prof': b'...'}
+    # Quem vem depois recebe o resultado sem perfil
+    assert resultado_compartilhado('a', lambda: None) == ({'perfil': {}}, ACERTO)
+    resultado_compartilhado('b', lambda: {'perfil': {'prof': b'...'}}, recalcular=True)
+    assert resultado_guardado('b') is None